@@ -3,5 +3,7 @@
 # Distributed under the terms of the Apache License 2.0
 from .numerical import DataFrame, Series, Field, Field3D, SparseDataFrame
 from .editor import Editor
-from .container import Container, TypedMeta
-
+from .container import Container, ContainerWriter, ContainerBuilder, TypedMeta, requires
+from .dataset import Dataset
+from .catalog import Catalog
+from .server import ContainerServer, ContainerClient
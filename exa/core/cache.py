@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Result Cache
+###################################
+Content-addressed, on-disk memoization of the results of compute methods
+(see :class:`~exa.core.container.TypedMeta`). Results are keyed by a hash of
+the compute method (its source, or declared version) and of the content of
+the data objects it requires (see :func:`~exa.core.container.requires`), so
+that a derived data object is read from disk instead of being recomputed
+whenever the inputs are identical, e.g. in a new session.
+
+.. code-block:: Python
+
+    container.result_cache = ResultCache('/scratch/exa-cache', max_size='50GB')
+    container.bond    # Computed once, read from the cache afterwards
+
+Entries are stored in the directory format (see :mod:`~exa.core.npydir`);
+least recently used entries are evicted when the cache exceeds its size.
+"""
+import os
+import json
+import pickle
+import shutil
+import inspect
+import hashlib
+from uuid import uuid4
+import numpy as np
+import pandas as pd
+from pandas.core.dtypes.dtypes import CategoricalDtype
+from exa.util.utility import parse_bytes
+from . import npydir
+
+
+def _hash_values(h, values):
+    """Update a hash with the content of an array (column or index values)."""
+    if isinstance(values, pd.MultiIndex):
+        values = values.to_frame(index=False)
+        for i in range(values.shape[1]):
+            _hash_values(h, values.iloc[:, i])
+        return
+    values = getattr(values, 'values', values)
+    h.update(str(values.dtype).encode())
+    if isinstance(values.dtype, CategoricalDtype):
+        h.update(np.ascontiguousarray(values.codes).data)
+        _hash_values(h, values.categories)
+    elif isinstance(values, np.ndarray) and values.dtype.kind in 'mM':    # No buffer protocol
+        h.update(np.ascontiguousarray(values).view(np.int64).data)
+    elif isinstance(values, np.ndarray) and values.dtype != object:
+        h.update(np.ascontiguousarray(values).data)
+    else:
+        h.update(pd.util.hash_array(np.asarray(values, dtype=object)).data)
+
+
+def _plain(label):
+    """
+    Convert NumPy scalars in a label (e.g. names read from HDF5) to Python
+    objects, so that equal labels hash alike.
+    """
+    if isinstance(label, np.generic):
+        return label.item()
+    elif isinstance(label, (list, tuple)):
+        return type(label)(_plain(v) for v in label)
+    return label
+
+
+def hash_columns(obj):
+    """
+    Hash the index, each column (or the values of a series), and the field
+    values (if any) of a data object.
+
+    Args:
+        obj: Series, dataframe, or field
+
+    Returns:
+        hashes (list): Pairs of column label ("index", "values", or "field_values") and digest
+    """
+    def digest(values, name=None):
+        h = hashlib.blake2b(digest_size=16)
+        h.update(repr(_plain(name)).encode())
+        _hash_values(h, values)
+        return h.hexdigest()
+
+    hashes = [('index', digest(obj.index, obj.index.names))]
+    if isinstance(obj, pd.Series):
+        hashes.append(('values', digest(obj, obj.name)))
+        return hashes
+    hashes += [(_plain(col), digest(obj.iloc[:, i])) for i, col in enumerate(obj.columns)]
+    if getattr(obj, 'field_values', None):
+        h = hashlib.blake2b(digest_size=16)
+        for values in obj.field_values:
+            h.update(hash_object(values).encode())
+        hashes.append(('field_values', h.hexdigest()))
+    return hashes
+
+
+def combine(hashes):
+    """Combine pairs of labels and digests (see :func:`~exa.core.cache.hash_columns`)."""
+    h = hashlib.blake2b(digest_size=16)
+    for label, digest in hashes:
+        h.update(repr(label).encode())
+        h.update(digest.encode())
+    return h.hexdigest()
+
+
+def hash_object(obj):
+    """
+    Hash the content (values, index, and labels) of a data object.
+
+    Args:
+        obj: Series, dataframe, field, or other (picklable) object
+
+    Returns:
+        digest (str): Hexadecimal digest
+    """
+    if isinstance(obj, (pd.Series, pd.DataFrame)):
+        return combine([('type', type(obj).__name__)] + hash_columns(obj))
+    return hashlib.blake2b(pickle.dumps(obj), digest_size=16).hexdigest()
+
+
+def method_version(func):
+    """
+    Get the version of a (compute) method: its declared version (see
+    :func:`~exa.core.container.requires`), or its source code.
+    """
+    func = getattr(func, '__func__', func)
+    version = getattr(func, 'version', None)
+    if version is not None:
+        return str(version)
+    try:
+        return inspect.getsource(func)
+    except (OSError, TypeError):
+        return func.__code__.co_code.hex()
+
+
+class ResultCache(object):
+    """
+    On-disk cache of data objects keyed by content hash.
+
+    Args:
+        path (str): Cache directory (default ~/.cache/exa)
+        max_size: Maximum size (bytes, or a string such as "10GB") of the cache
+    """
+    def key(self, method, inputs):
+        """
+        Get the key of the result of a compute method given its inputs.
+
+        Args:
+            method: Compute method (bound or function)
+            inputs (list): Required data objects
+
+        Returns:
+            key (str): Hexadecimal digest
+        """
+        h = hashlib.blake2b(digest_size=16)
+        h.update(getattr(method, '__qualname__', repr(method)).encode())
+        h.update(method_version(method).encode())
+        for obj in inputs:
+            h.update(hash_object(obj).encode())
+        return h.hexdigest()
+
+    def get(self, key):
+        """Read a cached data object (None if not cached)."""
+        entry = os.path.join(self.path, key)
+        try:
+            with open(os.path.join(entry, 'object.json')) as f:
+                desc = json.load(f)
+            obj = npydir.read_object(entry, desc, mmap=False)
+        except (OSError, ValueError):
+            return None
+        os.utime(entry)    # Most recently used
+        return obj
+
+    def put(self, key, obj):
+        """Cache a data object, evicting least recently used entries if needed."""
+        entry = os.path.join(self.path, key)
+        tmp = entry + '.' + uuid4().hex
+        os.makedirs(tmp)
+        try:
+            desc = npydir.write_object(obj, tmp, 'data')
+            with open(os.path.join(tmp, 'object.json'), 'w') as f:
+                json.dump(desc, f, default=npydir._json)
+            os.rename(tmp, entry)
+        except OSError:    # Cached concurrently (or not writable)
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits its maximum size."""
+        entries = []
+        for name in os.listdir(self.path):
+            entry = os.path.join(self.path, name)
+            if '.' in name or not os.path.isdir(entry):    # Entries being written
+                continue
+            size = sum(os.path.getsize(os.path.join(root, fname))
+                       for root, _, fnames in os.walk(entry) for fname in fnames)
+            entries.append((os.path.getmtime(entry), size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """Remove all entries."""
+        shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path, exist_ok=True)
+
+    def __init__(self, path=None, max_size='10GB'):
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.cache', 'exa')
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.max_size = parse_bytes(max_size)
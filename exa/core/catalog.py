@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Catalog
+###################################
+Index (an SQLite database) of saved containers: their uuid, path, metadata
+(name, description, meta), the shape of their data objects, and their
+fingerprints (see :func:`~exa.core.container.Container.fingerprint`).
+Searching the catalog answers questions such as "which files hold a given
+name, meta value, or number of frames" without opening any file.
+
+.. code-block:: Python
+
+    catalog = Container.catalog = Catalog()    # Saved containers are added to the catalog
+    catalog.scan(glob('calcs/*.hdf5'))                # Add previously saved containers
+    catalog.search(meta={'basis': 'sto-3g'}, rows={'frame': (100, None)})
+    calcs = catalog.search(name='calc*', load=True)
+
+Files are added by reading their metadata only (not their data).
+"""
+import os
+import json
+import sqlite3
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from . import npydir
+from .container import Container, _open_store, _stored_name, _fingerprint, zone_prefix
+from .cache import combine
+
+
+schema = """
+CREATE TABLE IF NOT EXISTS containers (path TEXT PRIMARY KEY, uuid TEXT, name TEXT,
+                                       description TEXT, meta TEXT, fingerprint TEXT,
+                                       modified REAL);
+CREATE TABLE IF NOT EXISTS tables (path TEXT, name TEXT, rows INTEGER, columns INTEGER,
+                                   fingerprint TEXT, PRIMARY KEY (path, name));
+CREATE TABLE IF NOT EXISTS meta (path TEXT, key TEXT, value TEXT, PRIMARY KEY (path, key));
+CREATE INDEX IF NOT EXISTS containers_name ON containers (name);
+CREATE INDEX IF NOT EXISTS containers_uuid ON containers (uuid);
+CREATE INDEX IF NOT EXISTS containers_fingerprint ON containers (fingerprint);
+CREATE INDEX IF NOT EXISTS tables_rows ON tables (name, rows);
+CREATE INDEX IF NOT EXISTS meta_value ON meta (key, value);
+"""
+
+
+def _dumps(value):
+    """Serialize a (meta) value for storage and comparison."""
+    return json.dumps(value, sort_keys=True, default=npydir._json)
+
+
+def describe(path):
+    """
+    Read the metadata, the shapes of the data objects, and the column hashes
+    (if stored) of a saved container, without reading its data.
+
+    Returns:
+        rel (dict): Descriptive kwargs (name, meta, etc.)
+        shapes (dict): Shape of each data object
+        hashes (dict): Column hashes of each data object (or None)
+    """
+    if npydir.is_npydir(path):
+        with open(os.path.join(path, npydir.manifest)) as f:
+            layout = json.load(f)
+        return npydir._decode(layout['rel']), layout.get('shapes', {}), npydir.hashes(path)
+    with _open_store(path, 'r') as store:
+        attrs = store.get_storer('kwargs').attrs
+        rel = attrs.metadata
+        hashes = getattr(attrs, 'exa_fingerprint', None)
+        shapes = dict(getattr(attrs, 'exa_shapes', None) or {})
+        for key in store.keys():    # Containers appended by a writer
+            name = _stored_name(key)
+            if key.startswith(zone_prefix) or name == 'kwargs' or name in shapes:
+                continue
+            if 'FIELD' not in key or key.endswith('/data'):
+                shapes[name] = [int(n) for n in np.atleast_1d(store.get_storer(key).shape)]
+    return rel, shapes, hashes
+
+
+class Catalog(object):
+    """
+    SQLite catalog of saved containers (see :mod:`~exa.core.catalog`).
+
+    Args:
+        path (str): Database file (default ~/.cache/exa/catalog.sqlite)
+    """
+    def add(self, path):
+        """Add (or update) a saved container."""
+        path = os.path.abspath(path)
+        rel, shapes, hashes = describe(path)
+        meta = rel.get('meta') or {}
+        fingerprint = None if hashes is None else _fingerprint(hashes, False)
+        with self._connect() as conn:
+            self._remove(conn, path)
+            conn.execute('INSERT INTO containers VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (path, rel.get('uuid'), rel.get('name'), rel.get('description'),
+                          _dumps(meta), fingerprint, os.path.getmtime(path)))
+            conn.executemany('INSERT INTO tables VALUES (?, ?, ?, ?, ?)',
+                             [(path, name, shape[0] if shape else None,
+                               shape[1] if len(shape) > 1 else None,
+                               combine(hashes[name]) if name in (hashes or {}) else None)
+                              for name, shape in shapes.items()])
+            conn.executemany('INSERT INTO meta VALUES (?, ?, ?)',
+                             [(path, str(key), _dumps(value)) for key, value in meta.items()])
+
+    def scan(self, paths, workers=None):
+        """
+        Add (or update) many saved containers, reading their metadata in parallel.
+
+        Args:
+            paths (list): Paths of saved containers
+            workers (int): Number of threads (default determined by Python)
+        """
+        with ThreadPoolExecutor(workers) as pool:
+            list(pool.map(self.add, paths))
+
+    def remove(self, path):
+        """Remove a container from the catalog."""
+        with self._connect() as conn:
+            self._remove(conn, os.path.abspath(path))
+
+    def prune(self):
+        """Remove containers whose files no longer exist."""
+        with self._connect() as conn:
+            paths = [path for path, in conn.execute('SELECT path FROM containers')]
+            for path in paths:
+                if not os.path.exists(path):
+                    self._remove(conn, path)
+
+    def search(self, name=None, meta=None, rows=None, uuid=None, fingerprint=None,
+               load=False, container=Container):
+        """
+        Search the catalog.
+
+        .. code-block:: Python
+
+            catalog.search(name='water*', meta={'program': 'nwchem'}, rows={'frame': (10, None)})
+
+        Args:
+            name (str): Container name (Unix shell-style wildcards allowed)
+            meta (dict): Metadata values
+            rows (dict): Number of rows (or minimum and maximum, None if unbounded) by data object
+            uuid (str): Container uuid
+            fingerprint (str): Container fingerprint
+            load (bool): Load the matching containers (default false)
+            container: Container class used to load
+
+        Returns:
+            results (:class:`~pandas.DataFrame`): Path, uuid, name, etc. of matching containers (or list of containers if **load**)
+        """
+        sql = 'SELECT path, uuid, name, description, meta, fingerprint FROM containers c WHERE 1'
+        params = []
+        if name is not None:
+            sql += ' AND name GLOB ?'
+            params.append(name)
+        for column, value in (('uuid', uuid), ('fingerprint', fingerprint)):
+            if value is not None:
+                sql += ' AND {} = ?'.format(column)
+                params.append(value)
+        for key, value in (meta or {}).items():
+            sql += ' AND EXISTS (SELECT 1 FROM meta m WHERE m.path = c.path AND m.key = ? AND m.value = ?)'
+            params += [str(key), _dumps(value)]
+        for table, n in (rows or {}).items():
+            low, high = n if isinstance(n, (tuple, list)) else (n, n)
+            sql += ' AND EXISTS (SELECT 1 FROM tables t WHERE t.path = c.path AND t.name = ?'
+            params.append(table)
+            if low is not None:
+                sql += ' AND t.rows >= ?'
+                params.append(int(low))
+            if high is not None:
+                sql += ' AND t.rows <= ?'
+                params.append(int(high))
+            sql += ')'
+        with closing(sqlite3.connect(self.path, timeout=self.timeout)) as conn:
+            results = pd.read_sql_query(sql + ' ORDER BY path', conn, params=params)
+        results['meta'] = results['meta'].map(json.loads)
+        if load:
+            return [container.load(path) for path in results['path']]
+        return results
+
+    def tables(self, path):
+        """Shapes and fingerprints of the data objects of a cataloged container."""
+        with closing(sqlite3.connect(self.path, timeout=self.timeout)) as conn:
+            return pd.read_sql_query('SELECT name, rows, columns, fingerprint FROM tables '
+                                     'WHERE path = ? ORDER BY name', conn,
+                                     params=[os.path.abspath(path)]).set_index('name')
+
+    def _connect(self):
+        """Open a connection; used as a context manager, commits and closes it."""
+        return _Connection(self.path, self.timeout)
+
+    @staticmethod
+    def _remove(conn, path):
+        for table in ('containers', 'tables', 'meta'):
+            conn.execute('DELETE FROM {} WHERE path = ?'.format(table), (path, ))
+
+    def __len__(self):
+        with closing(sqlite3.connect(self.path, timeout=self.timeout)) as conn:
+            return conn.execute('SELECT COUNT(*) FROM containers').fetchone()[0]
+
+    def __init__(self, path=None, timeout=30):
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.cache', 'exa', 'catalog.sqlite')
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.timeout = timeout
+        with self._connect() as conn:
+            conn.executescript(schema)
+
+
+class _Connection(object):
+    """SQLite connection committed (or rolled back) and closed on exit."""
+    def __enter__(self):
+        self.conn = sqlite3.connect(self.path, timeout=self.timeout)
+        return self.conn
+
+    def __exit__(self, exc_type, *args):
+        if exc_type is None:
+            self.conn.commit()
+        else:
+            self.conn.rollback()
+        self.conn.close()
+
+    def __init__(self, path, timeout):
+        self.path = path
+        self.timeout = timeout
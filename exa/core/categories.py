@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Category Registry
+###################################
+Process-wide categorical dictionaries, by column name. Declared categorical
+columns of data objects whose class opts in (``_shared_categories = True``,
+see :class:`~exa.core.numerical.DataFrame`) are encoded with the dictionary
+of their column name, shared by every such data object (and container) of
+the process, so that categoricals of the same column have the same
+categories (and codes): concatenation operates directly on the integer codes
+instead of taking the union of the categories and recoding.
+
+.. code-block:: Python
+
+    from exa.core.categories import registry
+
+    registry.categorize('symbol', ['H', 'O', 'H'])    # Categories ['H', 'O']
+    registry.categorize('symbol', ['C', 'H'])         # Categories ['H', 'O', 'C']
+    registry.save('categories.json')                  # Reused by other processes
+    registry.load('categories.json')
+
+Dictionaries only grow (categories are appended), so that the codes of
+existing categoricals remain valid: their categories are a prefix of the
+dictionary, and :func:`~exa.core.categories.CategoryRegistry.align` updates
+them to the full dictionary without recoding.
+
+Warning:
+    Shared categories are in order of first appearance in the process (not
+    sorted), and include the categories of unrelated data objects (e.g.
+    listed with zero counts by groupby and value_counts, unless
+    ``observed=True``); categoricals created at different times must be
+    aligned before they are compared.
+"""
+import json
+import threading
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+
+def _is_prefix(categories, full):
+    """Check if categories are the first categories of a (larger) index."""
+    if categories is full:
+        return True
+    n = len(categories)
+    return n <= len(full) and categories.dtype == full.dtype and full[:n].equals(categories)
+
+
+def _json(value):
+    """Serialize numpy scalars (see :func:`~exa.core.categories.CategoryRegistry.save`)."""
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError('Category {} cannot be saved.'.format(value))
+
+
+class CategoryRegistry(object):
+    """
+    Shared categorical dictionaries by column name (see :mod:`~exa.core.categories`).
+    """
+    def dtype(self, name):
+        """Current categorical dtype of a column name (None if not registered)."""
+        return self._dtypes.get(name)
+
+    def categorize(self, name, values):
+        """
+        Encode values with the shared dictionary of a column name, adding new
+        categories to it.
+
+        Args:
+            name (str): Column name
+            values (array-like): Values (or categorical)
+
+        Returns:
+            categorical (:class:`~pandas.Categorical`): Values encoded with the shared categories
+
+        Note:
+            Values of a type different from the dictionary's (e.g. integers
+            for a dictionary of strings) and ordered categoricals are encoded
+            with their own categories.
+        """
+        local = values.values if isinstance(values, (pd.Series, pd.Index)) else values
+        if not isinstance(getattr(local, 'dtype', None), CategoricalDtype):
+            local = pd.Categorical(local)
+        if local.ordered:
+            return local
+        current = self._dtypes.get(name)
+        if current is not None and _is_prefix(local.categories, current.categories):
+            if local.dtype is current:
+                return local
+            return pd.Categorical.from_codes(local.codes, dtype=current)
+        with self._lock:
+            current = self._dtypes.get(name)
+            if current is None:
+                full = local.categories
+            else:
+                full = current.categories
+                if len(local.categories) > 0 and local.categories.dtype != full.dtype:
+                    return local
+                new = local.categories[full.get_indexer(local.categories) < 0]
+                if len(new) > 0:
+                    full = full.append(new)
+            if current is None or len(full) > len(current.categories):
+                current = self._dtypes[name] = CategoricalDtype(full)
+        mapping = full.get_indexer(local.categories)
+        codes = np.where(local.codes < 0, -1, mapping[local.codes])
+        return pd.Categorical.from_codes(codes, dtype=current)
+
+    def align(self, obj):
+        """
+        Update the categoricals of a data object (series or dataframe) whose
+        categories are a prefix of the shared dictionary of their column name
+        to the full dictionary, without recoding (i.e. inplace, for merges
+        and comparisons of objects categorized at different times).
+        """
+        if isinstance(obj, pd.Series):
+            dtype = self._dtypes.get(obj.name)
+            if (dtype is not None and isinstance(obj.dtype, CategoricalDtype) and
+                    obj.dtype is not dtype and _is_prefix(obj.cat.categories, dtype.categories)):
+                values = pd.Categorical.from_codes(obj.cat.codes.values, dtype=dtype)
+                return pd.Series(values, index=obj.index, name=obj.name)
+            return obj
+        for col in obj.columns:
+            series = obj[col]
+            aligned = self.align(series)
+            if aligned is not series:
+                obj[col] = aligned
+        return obj
+
+    def save(self, path):
+        """Save the dictionaries (as JSON)."""
+        with open(path, 'w') as f:
+            json.dump({name: dtype.categories.tolist() for name, dtype in self._dtypes.items()},
+                      f, default=_json)
+
+    def load(self, path):
+        """
+        Add saved dictionaries (see :func:`~exa.core.categories.CategoryRegistry.save`);
+        categories missing from registered dictionaries are appended.
+        """
+        with open(path) as f:
+            dictionaries = json.load(f)
+        for name, categories in dictionaries.items():
+            self.categorize(name, pd.Categorical(pd.Index(categories), categories=categories))
+
+    def clear(self):
+        """Remove all dictionaries (existing categoricals are unaffected)."""
+        with self._lock:
+            self._dtypes.clear()
+
+    def __contains__(self, name):
+        return name in self._dtypes
+
+    def __len__(self):
+        return len(self._dtypes)
+
+    def __init__(self):
+        self._dtypes = {}
+        self._lock = threading.Lock()
+
+
+registry = CategoryRegistry()
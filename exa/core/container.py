@@ -13,27 +13,93 @@ See Also:
     For a description of data objects see :mod:`~exa.core.numerical`.
 """
 import os
+import re
+import ast
+import time
+import inspect
 import logging
+import shutil
+import weakref
+import threading
 from uuid import uuid4
+from tempfile import mkdtemp
 from sys import getsizeof
 from copy import deepcopy
-from collections import defaultdict
+from functools import partial
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from collections import defaultdict, OrderedDict
 import numpy as np
 import pandas as pd
+from pandas.api.types import union_categoricals, is_integer_dtype
 from pandas.core.dtypes.dtypes import CategoricalDtype
 import networkx as nx
+import tables
 import matplotlib.pyplot as plt
-from exa.util.utility import convert_bytes
+from exa.util.utility import convert_bytes, parse_bytes
 from exa.util import mpl
-from .numerical import check_key, Field, Series, DataFrame
+from .numerical import check_key, Field, _columns
+from .shared import SharedHandle
+from .cache import ResultCache, hash_columns, combine
+from .categories import _is_prefix
+from . import npydir
+
+
+zone_prefix = '/exa_zones/'    # Keys of saved zone maps (see Container.zone_map)
 
 
 class Container(object):
     """
     Container class responsible for all features related to data management.
+
+    Containers created with a **memory_limit** (bytes, or a string such as
+    "8GB") keep the size of their data objects in memory within the limit by
+    spilling the least recently used data objects (as tracked by the typed
+    getters) to a scratch directory; spilled data objects are read back
+    transparently on access.
+
+    .. code-block:: Python
+
+        container = MyContainer(atom=atom, memory_limit='8GB')
     """
+    catalog = None      # Catalog updated on save (see exa.core.catalog)
     _getter_prefix = 'compute'
     _cardinal = None    # Name of the cardinal data table
+    _stored = None      # Path and state of data objects when last saved or loaded
+    _placeholders = None    # Readers of lazily loaded data objects (see load)
+    _memory_limit = None    # Memory budget (bytes) of data objects
+    _lru = None         # Spans and buffers of data objects in memory, least recently used first
+    _lock = None        # Guards reading and spilling data objects (lazy or memory limited containers)
+    _scratch = None     # Directory of data objects spilled to disk (see memory_limit)
+    _cache = None       # Result cache of compute methods (see result_cache)
+    _zones = None       # Zone maps of data objects (see zone_map)
+    _hashed = None      # Column hashes of data objects with read-only buffers (see fingerprint)
+
+    @property
+    def result_cache(self):
+        """
+        On-disk cache (:class:`~exa.core.cache.ResultCache`) of the results of
+        compute methods that declare their requirements (see
+        :func:`~exa.core.container.requires`); set to a directory path or a
+        result cache (None disables caching).
+
+        .. code-block:: Python
+
+            container.result_cache = '/scratch/exa-cache'
+            container.bond    # Read from the cache if computed before from the same data
+        """
+        return self._cache
+
+    @result_cache.setter
+    def result_cache(self, cache):
+        if cache is not None and not isinstance(cache, ResultCache):
+            cache = ResultCache(cache)
+        self._cache = cache
+
+    @property
+    def memory_limit(self):
+        """Memory budget (bytes) of the data objects in memory (None if unlimited)."""
+        return self._memory_limit
 
     @property
     def log(self):
@@ -41,20 +107,45 @@ class Container(object):
                          self.__class__.__name__])
         return logging.getLogger(name)
 
-    def copy(self, name=None, description=None, meta=None):
+    def copy(self, name=None, description=None, meta=None, cow=False):
         """
         Create a copy of the current object (may alter the container's name,
         description, and update the metadata if needed).
+
+        With copy-on-write (**cow**), data objects of the copy share their
+        buffers with those of this container; a data object's buffers are
+        duplicated only when either side modifies it in place (indexers,
+        item assignment, in-place operators, or ``inplace=True`` methods). Assigning a new object
+        (e.g. via the typed setters) never affects the other container.
+
+        .. code-block:: Python
+
+            renamed = container.copy(name='renamed', cow=True)    # No data copied
+
+        Args:
+            name (str): New name
+            description (str): New description
+            meta (dict): New metadata
+            cow (bool): Copy-on-write instead of deep copying data (default false)
+
+        Note:
+            Shared buffers are read-only: writing into them other than through
+            the data object (e.g. ``copy.df['x'].values[0] = 1``, or chained
+            assignment such as ``copy.df['x'][0] = 1``) raises an error.
         """
         cls = self.__class__
         kwargs = self._rel(copy=True)
-        kwargs.update(self._data(copy=True))
+        kwargs.update(self._data(copy=True, cow=cow))
         if name is not None:
             kwargs['name'] = name
         if description is not None:
             kwargs['description'] = description
         if meta is not None:
             kwargs['meta'] = meta
+        if self._memory_limit is not None:
+            kwargs['memory_limit'] = self._memory_limit
+        if 'catalog' in vars(self):
+            kwargs['catalog'] = self.catalog
         return cls(**kwargs)
 
     def concat(self, *args, **kwargs):
@@ -65,7 +156,7 @@ class Container(object):
         See Also:
             For argument description, see :func:`~exa.core.container.concat`.
         """
-        raise NotImplementedError()
+        return concat(self, *args, **kwargs)
 
     def slice_naive(self, key):
         """
@@ -195,7 +286,9 @@ class Container(object):
         on metadata and visualization objects is also provided).
 
         Note:
-            Sizes are reported in bytes.
+            Sizes are reported in bytes, including objects referenced by
+            object columns and field values (see also
+            :func:`~exa.core.container.Container.memory_report`).
         """
         names = []
         types = []
@@ -213,29 +306,300 @@ class Container(object):
         for name, obj in self._data().items():
             names.append(name[1:] if name.startswith('_') else name)
             types.append('.'.join((obj.__module__, obj.__class__.__name__)))
-            if isinstance(obj, pd.Series):
-                sizes.append(obj.memory_usage())
-            else:
-                sizes.append(obj.memory_usage().sum())
+            sizes.append(_nbytes(obj))
         inf = pd.DataFrame.from_dict({'object': names, 'type': types, 'size': sizes})
         inf.set_index('object', inplace=True)
         return inf.sort_index()
 
+    def compact(self, float_precision=None, max_unique=0.5, inplace=False, report=False):
+        """
+        Reduce the memory footprint of the container's data objects: integer
+        columns are downcast to the smallest (signed) type that holds their
+        values, float columns optionally to single precision, and object
+        columns with few unique values are converted to categoricals.
+
+        .. code-block:: Python
+
+            compacted, report = container.compact(float_precision='single', report=True)
+
+        Args:
+            float_precision (str): "single" to downcast double precision floats (default keep)
+            max_unique (float): Maximum fraction of unique values of object columns to convert (default 0.5)
+            inplace (bool): Compact this container instead of returning a compacted copy
+            report (bool): Also return the size (bytes) of each data object before and after
+
+        Returns:
+            compacted: Compacted container (None if inplace)
+            report (:class:`~pandas.DataFrame`): Sizes before and after (if requested)
+
+        Note:
+            Indices are not downcast (pandas indices only hold 64 bit integers).
+        """
+        if float_precision not in (None, 'double', 'single'):
+            raise ValueError('Float precision must be "single" or "double".')
+        single = float_precision == 'single'
+        sizes = {}
+        data = {}
+        for key, obj in self._data().items():
+            data[key] = _compact(obj, single, max_unique)
+            sizes[key[1:] if key.startswith('_') else key] = (_nbytes(obj), _nbytes(data[key]))
+        if inplace:
+            compacted = None
+            for key, obj in data.items():
+                setattr(self, key[1:] if key.startswith('_') else key, obj)
+        else:
+            kwargs = self._rel(copy=True)
+            kwargs.update(data)
+            compacted = self.__class__(**kwargs)
+        if report:
+            df = pd.DataFrame.from_dict(sizes, orient='index', columns=['before', 'after'])
+            df.index.name = 'name'
+            return compacted, df
+        return compacted
+
     def memory_usage(self, string=False):
         """
         Get the memory usage estimate of the container.
 
         Args:
-            string (bool): Human readable string (default false)
+            string (bool): Human readable string of the total (default false)
 
         See Also:
-            :func:`~exa.core.container.Container.info`
+            :func:`~exa.core.container.Container.info` and
+            :func:`~exa.core.container.Container.memory_report`
         """
         if string:
-            n = getsizeof(self)
+            n = int(self.memory_report()['unique'].sum())
             return ' '.join((str(s) for s in convert_bytes(n)))
         return self.info()['size']
 
+    def compute_all(self, workers=None, force=False):
+        """
+        Compute all data objects that have a compute method (e.g.
+        ``compute_bond`` for the data object "bond") and are not yet
+        present, running independent compute methods concurrently.
+
+        Compute methods are the getters of typed attributes (see
+        :class:`~exa.core.container.TypedMeta`) and the methods decorated with
+        :func:`~exa.core.container.requires`, which declares the data objects
+        they use; a compute method runs once all of its (computable)
+        requirements have been computed. Other ``compute_*`` methods (e.g.
+        helpers taking arguments) are not called.
+
+        .. code-block:: Python
+
+            class MyContainer(Container, metaclass=MyMeta):
+                @requires('atom')
+                def compute_bond(self):
+                    self.bond = ...
+
+            timing = container.compute_all(workers=4)
+
+        Args:
+            workers (int): Number of threads (default determined by Python)
+            force (bool): Recompute data objects that are present (default false)
+
+        Returns:
+            timing (:class:`~pandas.DataFrame`): Start, stop, and duration (seconds) of each compute method
+
+        Raises:
+            TypeError: If a compute method takes arguments (other than self)
+
+        Note:
+            Compute methods run on a thread pool (they set data objects of this
+            container); they should release the GIL (e.g. NumPy, pandas, numba
+            code) to run concurrently.
+        """
+        prefix = self._getter_prefix + '_'
+        methods = {}
+        for attr in dir(type(self)):
+            name = attr[len(prefix):]
+            func = getattr(type(self), attr)
+            if (not attr.startswith(prefix) or not callable(func) or not
+                    (isinstance(getattr(type(self), name, None), property) or hasattr(func, 'requires'))):
+                continue
+            method = getattr(self, attr)
+            required = [p.name for p in inspect.signature(method).parameters.values()
+                        if p.default is p.empty and p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD)]
+            if required:
+                raise TypeError('Compute method {} takes arguments: {}'.format(attr, ', '.join(required)))
+            methods[name] = method
+
+        def present(name):
+            return any(key in vars(self) or key in (self._placeholders or {})
+                       for key in (name, '_' + name))
+
+        graph = nx.DiGraph()
+        for name, method in methods.items():
+            if force or not present(name):
+                graph.add_node(name)
+        for name in graph.nodes:
+            for req in getattr(methods[name], 'requires', ()):
+                if req in graph:
+                    graph.add_edge(req, name)
+        if not nx.is_directed_acyclic_graph(graph):
+            raise ValueError('Compute methods have circular requirements: {}'.format(
+                nx.find_cycle(graph)))
+        start = time.perf_counter()
+
+        def run(name):
+            begin = time.perf_counter() - start
+            self._compute(name)
+            return name, begin, time.perf_counter() - start
+
+        timing = {}
+        remaining = dict(graph.in_degree())
+        with ThreadPoolExecutor(workers) as pool:
+            pending = {pool.submit(run, name) for name, n in remaining.items() if n == 0}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, begin, end = future.result()
+                    timing[name] = (begin, end, end - begin)
+                    for child in graph.successors(name):
+                        remaining[child] -= 1
+                        if remaining[child] == 0:
+                            pending.add(pool.submit(run, child))
+        timing = pd.DataFrame.from_dict(timing, orient='index', columns=['start', 'stop', 'duration'])
+        timing.index.name = 'name'
+        return timing
+
+    def memory_report(self, deep=True):
+        """
+        Memory usage of each column (and index, and field values) of the
+        container's data objects. Buffers shared between columns (e.g. of
+        copy-on-write copies or views of other data objects) are counted once:
+        "size" is the size of a column and "unique" the size not already
+        counted for a previous column, so that the sum of "unique" is the
+        memory used by the container.
+
+        .. code-block:: Python
+
+            report = container.memory_report()
+            report.groupby(level='object')['unique'].sum()    # By data object
+
+        Args:
+            deep (bool): Include the size of objects (e.g. strings) referenced by object columns (default true)
+
+        Returns:
+            report (:class:`~pandas.DataFrame`): Sizes (bytes) by data object and column
+
+        Note:
+            Lazily loaded data objects that have not been read are not
+            included. Without **deep**, the report only inspects array
+            metadata and is cheap to compute regardless of size.
+        """
+        coverage = _Coverage()
+        rows = []
+        for key, obj in self._data(load=False).items():
+            name = key[1:] if key.startswith('_') else key
+            for col, dtype, buffers in _usage(obj, deep):
+                size = unique = 0
+                for span, nbytes in buffers:
+                    size += nbytes
+                    unique += coverage.add(span, nbytes)
+                rows.append((name, col, None if dtype is None else str(dtype), size, unique))
+        report = pd.DataFrame(rows, columns=['object', 'column', 'dtype', 'size', 'unique'])
+        return report.set_index(['object', 'column'])
+
+    def fingerprint(self, detail=False):
+        """
+        Hash of the content of the container's data objects, computed from
+        hashes of each column (and index) of each data object. Column hashes
+        are stored on save so that saved containers can be compared without
+        reading their data (see
+        :func:`~exa.core.container.Container.stored_fingerprint`).
+
+        .. code-block:: Python
+
+            container.fingerprint() == Container.stored_fingerprint('other.hdf5')
+            container.fingerprint(detail=True)    # Hashes by data object and column
+
+        Args:
+            detail (bool): Return the hash of each column (default false)
+
+        Returns:
+            fingerprint (str): Hexadecimal digest (or series of digests if **detail**)
+
+        Note:
+            Column hashes are cached only for data objects whose buffers are
+            all read-only (e.g. shared copy-on-write, memory mapped, or shared
+            memory data objects) until they are replaced or detached: pandas
+            provides no reliable signal of in-place modification of writeable
+            buffers (e.g. by chained assignment, or by writing into
+            ``.values``), so other data objects are hashed again on every
+            call. Lazily loaded (or spilled) data objects that are not in
+            memory are not read if their hashes were stored.
+        """
+        return _fingerprint(self._hashes(), detail)
+
+    @staticmethod
+    def stored_fingerprint(path, detail=False):
+        """
+        Fingerprint of a saved container (see
+        :func:`~exa.core.container.Container.fingerprint`), without reading its data.
+
+        Args:
+            path (str): HDF5 file (or directory) path
+            detail (bool): Return the hash of each column (default false)
+
+        Raises:
+            ValueError: If no fingerprint was stored (e.g. older files)
+        """
+        if npydir.is_npydir(path):
+            hashes = npydir.hashes(path)
+        else:
+            with _open_store(path, 'r') as store:
+                hashes = getattr(store.get_storer('kwargs').attrs, 'exa_fingerprint', None)
+        if hashes is None:
+            raise ValueError('No fingerprint stored in {}; load and save it again.'.format(path))
+        return _fingerprint(hashes, detail)
+
+    def equals(self, other):
+        """
+        Check that the data objects of the container and of another container
+        (or saved container, given its path) are equal, by fingerprint.
+        """
+        if isinstance(other, Container):
+            return self.fingerprint() == other.fingerprint()
+        return self.fingerprint() == self.stored_fingerprint(other)
+
+    def zone_map(self, name, chunksize=65536):
+        """
+        Zone map of a data object: the minimum and maximum of each numeric
+        column, and the number of rows, of each cardinal value (frame), or of
+        each chunk of rows if the data object has no cardinal index or column.
+
+        Zone maps are computed from the data in memory on every call (data
+        objects not in memory are not read if their zone map was loaded),
+        saved on request (see :func:`~exa.core.container.Container.save`),
+        and used to skip frames (or chunks) that cannot match a predicate
+        (see :func:`~exa.core.container.Container.load`, and
+        :func:`~exa.core.container.Container.query` on request).
+
+        .. code-block:: Python
+
+            zm = container.zone_map('atom')
+            zm['max']['z']    # Maximum z of each frame
+
+        Args:
+            name (str): Name of the data object
+            chunksize (int): Number of rows of each chunk (if not by frame)
+
+        Returns:
+            zm (:class:`~pandas.DataFrame`): Statistics ("min", "max", "count") by frame (or chunk)
+        """
+        key = '_' + name if isinstance(getattr(type(self), name, None), property) else name
+        if self._zones is None:
+            self._zones = {}
+        obj = self.__dict__.get(key)
+        if obj is None and key in self._zones:    # Loaded, and not read since
+            return self._zones[key]
+        if obj is None:
+            obj = getattr(self, key)
+        zm = self._zones[key] = _zone_map(obj, name, self._cardinal, chunksize)
+        return zm
+
     def network(self, figsize=(14, 9), fig=True):
         """
         Display information about the container's object relationships.
@@ -294,29 +658,12 @@ class Container(object):
         node_size_dict = info['size'].to_dict()      # Can pull all nodes from keys
         node_class_name_dict = info['type'].to_dict()
         node_type_dict = {}    # Values are tuple of "underlying" type and color
-        node_conn_dict = {}    # Values are tuple of connection type and color
-        items = self._data().items()
-        for k0, v0 in items:
-            n0 = k0[1:] if k0.startswith('_') else k0
-            node_type_dict[n0] = get_node_type_color(v0)
-            for k1, v1 in items:
-                if v0 is v1:
-                    continue
-                n1 = k1[1:] if k1.startswith('_') else k1
-                for name in v0.index.names:    # Check the index of data object 0 against the index
-                    if name is None:           # and columns of data object 1
-                        continue
-                    if name in v1.index.names:
-                        contyp = 'index-index'
-                        node_conn_dict[(n0, n1)] = (contyp, conn[contyp])
-                        node_conn_dict[(n1, n0)] = (contyp, conn[contyp])
-                    if hasattr(v1, "columns"):
-                        for col in v1.columns:
-                            # Catches index "atom", column "atom1"; does not catch atom10
-                            if name == col or (name == col[:-1] and col[-1].isdigit()):
-                                contyp = 'index-column'
-                                node_conn_dict[(n0, n1)] = (contyp, conn[contyp])
-                                node_conn_dict[(n1, n0)] = ('column-index', conn[contyp])
+        data = self._data()
+        for key, obj in data.items():
+            node_type_dict[key[1:] if key.startswith('_') else key] = get_node_type_color(obj)
+        # Values are tuple of connection type and color
+        node_conn_dict = {edge: (contyp, conn['index-column' if contyp == 'column-index' else contyp])
+                          for edge, contyp in _relationships(data).items()}
         g = nx.Graph()
         g.add_nodes_from(node_size_dict.keys())
         g.add_edges_from(node_conn_dict.keys())
@@ -339,57 +686,233 @@ class Container(object):
         g.edge_types = {node: value[0] for node, value in node_conn_dict.items()}  # Attached connection information to network graph
         return g
 
-    def save(self, path=None, complevel=1, complib='zlib'):
+    def query(self, table, expr, cardinal=False, zones=False):
+        """
+        Select the rows of a data object matching a predicate, and the related
+        rows of the other data objects.
+
+        The predicate is evaluated (vectorized, see :meth:`~pandas.DataFrame.eval`)
+        on the given data object; the selection then propagates, breadth first
+        from it, through the relationships between data objects (see
+        :func:`~exa.core.container.Container.network`) by matching index values
+        against the (selected) index or key columns of the neighboring data object.
+
+        .. code-block:: Python
+
+            sub = container.query('atom', 'z > 10 and symbol == "O"')
+            sub = container.query('atom', 'z > 10', cardinal=True)    # Whole frames
+
+        Args:
+            table (str): Name of the data object evaluating the predicate
+            expr (str): Boolean expression of the data object's columns
+            cardinal (bool): Select every row of the cardinal values (e.g. frames) matched (default false)
+            zones (bool): Skip frames (or chunks) excluded by the last computed (or loaded) zone map (default false)
+
+        Returns:
+            sub: Sub container of the same format
+
+        Note:
+            Rows referencing several selected rows (e.g. a bond referencing
+            columns "atom0" and "atom1") are selected if all references are.
+            Data objects unrelated to the queried data object are not sliced.
+            With **zones**, the predicate is only evaluated on the frames (or
+            chunks) that may match given the zone map of the data object, if
+            one was computed or loaded (see
+            :func:`~exa.core.container.Container.zone_map`); zone maps are not
+            checked against the data, so only use them for data objects not
+            modified since.
+        """
+        data = {(key[1:] if key.startswith('_') else key): obj for key, obj in self._data().items()}
+        candidates = None    # Rows that may match, given the zone map
+        key = '_' + table if isinstance(getattr(type(self), table, None), property) else table
+        zm = (self._zones or {}).get(key) if zones else None
+        if table in data and zm is not None:
+            candidates = _zone_rows(data[table], table, self._cardinal, zm, _candidates(zm, expr))
+        selected = _query(data, table, expr, self._cardinal if cardinal else None, candidates=candidates)
+        kwargs = {'name': self.name, 'description': self.description, 'meta': self.meta}
+        kwargs.update(data)
+        kwargs.update(selected)
+        return self.__class__(**kwargs)
+
+    def save(self, path=None, complevel=1, complib='zlib', incremental=False, format='fixed',
+             codecs=None, threads=None, report=False, delta=False, tolerance=None, zones=False):
         """
-        Save the container as an HDF5 archive.
+        Save the container as an HDF5 archive (or a directory of NumPy files).
+
+        The "table" **format** is slower to write but supports selective
+        loading (see :func:`~exa.core.container.Container.load`): columns
+        referencing keys (e.g. the cardinal column "frame", "atom0") are
+        stored as indexed data columns.
 
         Args:
             path (str): Path where to save the container
+            complevel (int): Compression level (default 1)
+            complib (str): Compression library (default zlib)
+            incremental (bool): Only (re)write data objects set or modified since the last save or load (default false)
+            format (str): HDF5 storage format, "fixed" (default) or "table", or "npydir"
+            codecs (dict): Compression library (or library and level) by data object name
+            threads (int): Number of compression threads (default determined by PyTables)
+            report (bool): Also return the stored bytes and compression ratio by data object
+            delta (bool): Frame-wise encoding of per-frame data objects (fixed format only)
+            tolerance (float): Quantization step of delta encoded floats (default lossless)
+            zones (bool): Also save the zone map of each dataframe (see :func:`~exa.core.container.Container.zone_map`)
 
         Returns:
             savepath (str): Path where the container was saved
+            report (:class:`~pandas.DataFrame`): Storage report (if requested)
+
+        .. code-block:: Python
+
+            path, report = container.save(path, complib='blosc:lz4', threads=8, report=True,
+                                          codecs={'atom': ('blosc:zstd', 5)})
+
+        Note:
+            Incremental saves fall back to a full save if the container was
+            not last saved to (or loaded from) the given path. Rewritten data
+            objects leave unused space in the file; a full save reclaims it.
+
+        Note:
+            The "npydir" format stores each column as an uncompressed NumPy
+            file in a directory with a ".npydir" extension (see
+            :mod:`~exa.core.npydir`), which can be loaded as memory maps.
+            Compression and incremental saving do not apply to it; data objects
+            are written in parallel by **threads** threads.
+
+        Note:
+            Compression libraries are those supported by PyTables (e.g.
+            "zlib", "blosc:lz4", "blosc:zstd"); blosc codecs use byte shuffling
+            and compress chunks of each data object on **threads** threads
+            (HDF5 writes themselves are serialized).
+
+        Note:
+            Categorical columns are stored as integer codes and categories,
+            and are loaded as categoricals (except indexed data columns of
+            table format data objects, which are stored as raw values).
+
+        Note:
+            With **delta** encoding, data objects with a column of the same
+            name as the cardinal data object and the same number of rows for
+            each (sorted) cardinal value (e.g. atoms of a trajectory) store
+            columns that are identical for all frames once, and float columns
+            as differences from frame to frame (of their bits, or, given a
+            **tolerance**, of values rounded to multiples of the tolerance).
+            Loading reconstructs the columns exactly (or within half the
+            tolerance; the stored fingerprint, see
+            :func:`~exa.core.container.Container.fingerprint`, is that of the
+            data before rounding).
         """
+        if format == 'npydir':
+            if path is None:
+                path = self.uuid + npydir.extension
+            elif os.path.isdir(path) and not npydir.is_npydir(path):
+                path += os.sep + self.uuid + npydir.extension
+            elif not path.rstrip(os.sep).endswith(npydir.extension):
+                raise ValueError('Directory path must have a "{}" extension.'.format(npydir.extension))
+            path = npydir.write(self, path, threads, zones)
+            self._record(path, npydir.hashes(path))
+            if self.catalog is not None:
+                self.catalog.add(path)
+            if report:
+                return path, _report(npydir.stats(path))
+            return path
         if path is None:
             path = self.uuid + '.hdf5'
         elif os.path.isdir(path):
             path += os.sep + self.uuid + '.hdf5'
         elif not (path.endswith('.hdf5') or path.endswith('.hdf')):
             raise ValueError('File path must have a ".hdf5" or ".hdf" extension.')
-        with pd.HDFStore(path, 'w', complevel=complevel, complib=complib) as store:
-            store['kwargs'] = pd.Series()
-            store.get_storer('kwargs').attrs.metadata = self._rel()
-            fc = 0    # Field counter (see special handling of fields below)
-            for name, data in self._data().items():
-                if hasattr(data, '_revert_categories'):
-                    data._revert_categories()
+        if delta and format != 'fixed':
+            raise ValueError('Delta encoding requires the fixed format.')
+        if tolerance is not None and not tolerance > 0:
+            raise ValueError('Tolerance must be positive.')
+        hashes = self._hashes()
+        changes = self._changes(path, hashes) if incremental else None
+        mode = 'w' if changes is None else 'a'
+        objs = self._data(load=changes is None)
+        keys = {obj.index.name for obj in objs.values()}
+        keys.add(self._cardinal)
+
+        def put(key, value, filters):
+            """
+            Write a data object; categoricals are stored as codes and categories
+            (key columns of table format data objects as indexed data columns).
+            """
+            if format == 'table' and isinstance(value, pd.DataFrame):
+                cols = [col for col in value.columns if _key_name(col, keys)]
+                value, categories = _encode(_as_plain(value, cols))
+                store.put(key, value, format=format, data_columns=cols)
+            else:
+                value, categories = _encode(value)
+                encoding = None
+                if delta:
+                    value, encoding = _delta(value, self._cardinal, tolerance)
+                store.put(key, value, format=format)
+                _put_delta(store, key, encoding, filters)
+            _put_categories(store, key, categories, filters)
+
+        def filters(name):
+            """Compression filters of a data object (see codecs)."""
+            codec = (codecs or {}).get(name, complib)
+            lib, level = codec if isinstance(codec, tuple) else (codec, complevel)
+            return tables.Filters(level, lib)
+
+        stats = {}    # Storage report
+        shapes = {}    # Shapes of the data objects (see Catalog)
+        fc = 0    # Field counter (see special handling of fields below)
+        with _blosc_threads(threads):
+            with pd.HDFStore(path, mode) as store:
+                if changes is not None:
+                    shapes = dict(getattr(store.get_storer('kwargs').attrs, 'exa_shapes', None) or {})
+                store['kwargs'] = pd.Series(dtype=np.float64)
+                store.get_storer('kwargs').attrs.metadata = self._rel()
+                if changes is not None:
+                    names, removed = changes
+                    stale = {name[1:] if name.startswith('_') else name for name in names + removed}
+                    for name in stale:
+                        shapes.pop(name, None)
+                    for key in store.keys():
+                        match = re.match(r'/FIELD(\d+)_', key)
+                        if match:
+                            fc = max(fc, int(match.group(1)) + 1)
+                        if _stored_name(key) in stale or (key.startswith(zone_prefix) and
+                                                           key[len(zone_prefix):] in stale):
+                            store.remove(key)
+                    objs = {name: objs[name] if name in objs else getattr(self, name)
+                            for name in names}    # Modified data objects may have been spilled
+            groups = defaultdict(list)    # Data objects by compression filters
+            for name, data in objs.items():
                 name = name[1:] if name.startswith('_') else name
-                if isinstance(data, Field):    # Fields are handled separately
-                    fname = 'FIELD{}_'.format(fc) + name + '/'
-                    store[fname + 'data'] = pd.DataFrame(data)
-                    for i, field in enumerate(data.field_values):
-                        ffname = fname + 'values' + str(i)
-                        if isinstance(field, pd.Series):
-                            store[ffname] = pd.Series(field)
+                codec = filters(name)
+                groups[(codec.complevel, codec.complib)].append((name, data, codec))
+            for (level, lib), group in groups.items():
+                with pd.HDFStore(path, 'a', complevel=level, complib=lib) as store:
+                    for name, data, codec in group:
+                        key = name
+                        if isinstance(data, Field):    # Fields are handled separately
+                            fname = 'FIELD{}_'.format(fc) + name + '/'
+                            key = fname[:-1]
+                            put(fname + 'data', data, codec)
+                            for i, field in enumerate(data.field_values):
+                                ffname = fname + 'values' + str(i)
+                                if isinstance(field, pd.Series):
+                                    store[ffname] = pd.Series(field)
+                                else:
+                                    store[ffname] = pd.DataFrame(field)
+                            fc += 1
                         else:
-                            store[ffname] = pd.DataFrame(field)
-                    fc += 1
-                elif isinstance(data, Series):
-                    s = pd.Series(data)
-                    if isinstance(data.dtype, CategoricalDtype):
-                        s = s.astype('O')
-                    store[name] = s
-                elif isinstance(data, DataFrame):
-                    store[name] = pd.DataFrame(data)
-                else:
-                    if hasattr(data, 'dtype') and isinstance(data.dtype, CategoricalDtype):
-                        data = data.astype('O')
-                    else:
-                        for col in data:
-                            if isinstance(data[col].dtype, CategoricalDtype):
-                                data[col] = data[col].astype('O')
-                    store[name] = data
-                if hasattr(data, '_set_categories'):
-                    data._set_categories()
+                            put(name, data, codec)
+                            if zones and isinstance(data, pd.DataFrame):
+                                store.put(zone_prefix + name, self.zone_map(name))
+                        stats[name] = (lib,) + _stored_bytes(store, key)
+                        shapes[name] = list(data.shape)
+            with pd.HDFStore(path, 'a') as store:
+                store.get_storer('kwargs').attrs.exa_fingerprint = hashes
+                store.get_storer('kwargs').attrs.exa_shapes = shapes
+        self._record(path, hashes)
+        if self.catalog is not None:
+            self.catalog.add(path)
+        if report:
+            return path, _report(stats)
         return path
 
     def to_hdf(self, *args, **kwargs):
@@ -397,72 +920,424 @@ class Container(object):
         self.save(*args, **kwargs)
 
     @classmethod
-    def load(cls, pkid_or_path=None):
+    def load(cls, pkid_or_path=None, tables=None, columns=None, frames=None, lazy=False,
+             mmap=True, threads=None, where=None):
         """
         Load a container object from a persistent location or file path.
 
+        Selections are pushed down to PyTables for containers saved in table
+        format (see :func:`~exa.core.container.Container.save`) so that only
+        the selected rows and columns are read. For fixed format containers
+        the selection is applied after reading each data object.
+
+        Lazily loaded containers read each data object on first access (and
+        keep it in memory until it is unloaded, see
+        :func:`~exa.core.container.Container.unload`). Operations on all data
+        objects (e.g. save, copy, slicing) read any data object not yet read.
+
+        Containers saved in the "npydir" format are loaded as read-only memory
+        maps of their columns (unless **mmap** is false): loading is nearly
+        instant, data is read from disk on access, and processes loading the
+        same container share memory.
+
+        .. code-block:: Python
+
+            traj = MyContainer.load(path, frames=range(1000, 1100),
+                                    columns={'atom': ['frame', 'x', 'y', 'z']})
+
         Args:
             pkid_or_path: Integer pkid corresponding to the container table or file path
+            tables (list): Names of the data objects to load (default all)
+            columns (dict): Names of the columns to load, by data object name
+            frames: Cardinal values (int, list, array, range, or slice of values) to load
+            lazy (bool): Read data objects on first access (default false)
+            mmap (bool): Memory map columns of "npydir" containers (default true)
+            threads (int): Number of decompression (or "npydir" reading) threads
+            where (dict): Predicates (see :func:`~exa.core.container.Container.query`) by data object name; frames that cannot match are skipped
 
         Returns:
             container: The saved container object
+
+        Note:
+            Frame selection applies to the cardinal data object (by index) and
+            to data objects with a column of the same name as the cardinal
+            data object; others are loaded entirely.
+
+        Note:
+            Frames are skipped given **where** using the zone maps saved with
+            the container (see :func:`~exa.core.container.Container.zone_map`),
+            without reading the data objects: frames that may match are
+            loaded whole (use query to select matching rows).
         """
         path = pkid_or_path
-        if not os.path.isfile(path):
+        if not (os.path.isfile(path) or npydir.is_npydir(path)):
             raise FileNotFoundError('File {} not found.'.format(path))
+        if (frames is not None or where is not None) and cls._cardinal is None:
+            raise ValueError('Selecting frames requires a cardinal data object.')
+        columns = {} if columns is None else columns
         kwargs = {}
-        fields = defaultdict(dict)
-        with pd.HDFStore(path) as store:
-            for key in store.keys():
-                if 'kwargs' in key:
-                    kwargs.update(store.get_storer(key).attrs.metadata)
-                elif "FIELD" in key:
-                    name, dname = "_".join(key.split("_")[1:]).split("/")
-                    dname = dname.replace('values', '')
-                    fields[name][dname] = store[key]
-                else:
-                    name = str(key[1:])
-                    kwargs[name] = store[key]
-        for name, field_data in fields.items():
-            fps = field_data.pop('data')
-            kwargs[name] = Field(fps, field_values=[field_data[str(arr)] for arr in
-                                                    sorted(map(int, field_data.keys()))])
-        return cls(**kwargs)
+        readers = {}    # Readers of each data object (for lazy loading)
+        hashes = None   # Column hashes stored on save (see fingerprint)
+        if npydir.is_npydir(path):
+            stored_zones = npydir.zones(path)
+            if where is not None:
+                frames = _where_frames(stored_zones, where, frames, cls._cardinal)
+            rel, readers = npydir.read(path, tables, None if frames is not None else columns, mmap)
+            kwargs.update(rel)
+            hashes = npydir.hashes(path)
+            if frames is not None:    # Columns are memory mapped, select after mapping
+                readers = {name: partial(_read_filtered, reader, name, columns.get(name),
+                                         frames, cls._cardinal)
+                           for name, reader in readers.items()}
+            if not lazy:
+                with ThreadPoolExecutor(threads) as pool:
+                    futures = {name: pool.submit(reader) for name, reader in readers.items()}
+                kwargs.update((name, future.result()) for name, future in futures.items())
+        else:
+            groups = defaultdict(list)    # Keys of each data object
+            stored_zones = {}
+            with _blosc_threads(threads), _open_store(path, 'r') as store:
+                for key in store.keys():
+                    if 'kwargs' in key:
+                        attrs = store.get_storer(key).attrs
+                        kwargs.update(attrs.metadata)
+                        hashes = getattr(attrs, 'exa_fingerprint', None)
+                    elif key.startswith(zone_prefix):
+                        stored_zones[key[len(zone_prefix):]] = store[key]
+                    elif tables is None or _stored_name(key) in tables:
+                        groups[_stored_name(key)].append(key)
+                if where is not None:
+                    frames = _where_frames(stored_zones, where, frames, cls._cardinal)
+                if not lazy:
+                    for name, keys in groups.items():
+                        kwargs[name] = _read(store, keys, columns.get(name), frames, cls._cardinal)
+            for name, keys in groups.items():
+                readers[name] = partial(_read_path, path, keys, columns.get(name), frames, cls._cardinal)
+        container = cls(**kwargs)
+        if lazy:
+            if container._lock is None:
+                container._lock = threading.RLock()
+            container._placeholders = {}
+            for name, reader in readers.items():
+                prop = getattr(cls, name, None)
+                key = '_' + name if isinstance(prop, property) else name
+                pairs = (hashes or {}).get(name) if not columns and frames is None else None
+                container._placeholders[key] = _Placeholder(name, path, reader, pairs)
+        container._zones = {}
+        for name, zm in stored_zones.items():
+            if frames is not None and zm.index.name != cls._cardinal:
+                continue    # Chunks of rows do not match a selection of frames
+            prop = getattr(cls, name, None)
+            key = '_' + name if isinstance(prop, property) else name
+            if key in vars(container) or key in (container._placeholders or {}):
+                container._zones[key] = zm
+        if tables is None and not columns and frames is None:
+            container._record(path, hashes)    # Only complete containers may be saved incrementally
+        return container
+
+    def unload(self, name):
+        """
+        Release a lazily loaded data object (see
+        :func:`~exa.core.container.Container.load`); it is read again on next
+        access.
+
+        Args:
+            name (str): Name of the data object
+
+        Raises:
+            ValueError: If the data object was set or modified since it was read
+        """
+        key = '_' + name if isinstance(getattr(type(self), name, None), property) else name
+        placeholder = (self._placeholders or {}).get(key)
+        if placeholder is None:
+            raise KeyError('Data object {} was not lazily loaded.'.format(name))
+        with self._guard():
+            if key in vars(self):
+                if not placeholder.unchanged(vars(self)[key]):
+                    raise ValueError('Data object {} was modified; save it first.'.format(name))
+                del self.__dict__[key]
+                if self._lru is not None:
+                    self._lru.pop(key, None)
 
     @classmethod
     def from_hdf(cls, *args, **kwargs):
         """Alias for :func:`~exa.core.container.Container`."""
         return cls.load(*args, **kwargs)
 
+    def to_shared(self):
+        """
+        Copy the container's data objects into shared memory, for transport to
+        other processes without pickling the data.
+
+        .. code-block:: Python
+
+            with container.to_shared() as handle:
+                pool.map(func, [handle]*n)    # func calls Container.from_shared
+
+        Returns:
+            handle: Picklable :class:`~exa.core.shared.SharedHandle`
+
+        Warning:
+            The segments exist until the handle is unlinked (or exits its
+            context, or is garbage collected) in this process; keep the handle
+            alive while workers use it.
+        """
+        return SharedHandle(self)
+
+    @classmethod
+    def from_shared(cls, handle):
+        """
+        Rebuild a container from shared memory (see
+        :func:`~exa.core.container.Container.to_shared`).
+
+        Data objects are read-only views of the shared segments (no data is
+        copied); use :func:`~exa.core.container.Container.copy` to obtain a
+        private, writable container.
+
+        Args:
+            handle: :class:`~exa.core.shared.SharedHandle`
+
+        Returns:
+            container: Container whose data objects view shared memory
+        """
+        container = cls(**handle.attach())
+        container._shared = handle    # Keep the segments mapped
+        return container
+
     def _rel(self, copy=False):
         """
-        Get descriptive kwargs of the container (e.g. name, description, meta).
+        Get descriptive kwargs of the container (e.g. name, description, meta);
+        the catalog (see :mod:`~exa.core.catalog`) is not descriptive (nor saved).
         """
         rel = {}
         for key, obj in vars(self).items():
-            if not isinstance(obj, (pd.Series, pd.DataFrame)) and not key.startswith('_'):
+            if (not isinstance(obj, (pd.Series, pd.DataFrame)) and not key.startswith('_') and
+                    key != 'catalog'):
                 if copy and 'id' not in key:
                     rel[key] = deepcopy(obj)
                 else:
                     rel[key] = obj
         return rel
 
-    def _data(self, copy=False):
+    def _record(self, path, hashes=None):
+        """
+        Record the content (column hashes, see
+        :func:`~exa.core.container.Container.fingerprint`) of the data
+        objects as saved to (or loaded from) the given path (see
+        :func:`~exa.core.container.Container._changes`).
+        """
+        path = os.path.abspath(path)
+        data = self._data(load=False)
+        hashes = hashes or {}
+        self._stored = (path, {key: hashes.get(key[1:] if key.startswith('_') else key)
+                               for key in set(data) | set(self._placeholders or {})})
+        for key, placeholder in (self._placeholders or {}).items():
+            placeholder.dirty = False
+            if key in data and os.path.abspath(placeholder.path) == path:
+                placeholder.hashes = self._stored[1][key]
+                placeholder.loaded(data[key])
+
+    def _changes(self, path, hashes=None):
+        """
+        Get the data objects that were set (or modified) and removed since the
+        container was last saved to (or loaded from) the given path. Data
+        objects in memory are compared by content (column hashes, computed
+        unless given, see :func:`~exa.core.container.Container._hashes`), so
+        that any modification is found (e.g. by chained assignment); data
+        objects whose content was not recorded are considered modified.
+
+        Returns:
+            changes (tuple): Lists of set/modified and removed names (None if unknown)
+        """
+        if self._stored is None or self._stored[0] != os.path.abspath(path) or not os.path.isfile(path):
+            return None
+        stored = self._stored[1]
+        data = self._data(load=False)
+        hashes = hashes or {}
+        names = [name for name, obj in data.items()
+                 if not _unchanged(obj, stored.get(name),
+                                   hashes.get(name[1:] if name.startswith('_') else name))]
+        names += [name for name, placeholder in (self._placeholders or {}).items()
+                  if name not in data and placeholder.dirty]
+        removed = [name for name in stored if name not in data and
+                   name not in (self._placeholders or {})]
+        return names, removed
+
+    def _data(self, copy=False, cow=False, load=True):
         """
         Get data kwargs of the container (i.e. dataframe and series objects).
+        Lazily loaded data objects are read first unless **load** is false.
         """
+        if load and self._placeholders:
+            for key in self._placeholders:
+                if key not in vars(self):
+                    getattr(self, key)
         data = {}
         for key, obj in vars(self).items():
             if isinstance(obj, (pd.Series, pd.DataFrame)):
-                if copy:
+                if copy and cow and hasattr(obj, '_share'):
+                    data[key] = obj._share()
+                elif copy:
                     data[key] = obj.copy(deep=True)
                 else:
                     data[key] = obj
         return data
 
     def __delitem__(self, key):
-        if key in vars(self):
-            del self.__dict__[key]
+        with self._guard():
+            if key in vars(self):
+                del self.__dict__[key]
+            if self._hashed:
+                self._hashed.pop(key, None)
+            if self._lru is not None:
+                self._lru.pop(key, None)
+            if self._placeholders and key in self._placeholders:
+                del self._placeholders[key]
+
+    def __getattr__(self, key):
+        # Only called if the attribute does not exist; lazily loaded data
+        # objects (see load) are read (and cached) here on first access.
+        placeholders = self.__dict__.get('_placeholders')
+        if not placeholders or key not in placeholders:
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, key))
+        with self._guard():
+            obj = self.__dict__.get(key)
+            if obj is None:    # Not read by another thread meanwhile
+                placeholder = placeholders[key]
+                setattr(self, placeholder.name, placeholder.read())
+                obj = self.__dict__[key]
+                placeholder.loaded(obj)
+        return obj
+
+    def __setattr__(self, key, value):
+        if self._hashed:
+            self._hashed.pop(key, None)
+        if self._lru is None or not isinstance(value, (pd.Series, pd.DataFrame)):
+            super(Container, self).__setattr__(key, value)
+            return
+        with self._guard():
+            super(Container, self).__setattr__(key, value)
+            if self.__dict__.get(key) is value:
+                self._lru[key] = (None, [])
+                self._lru.move_to_end(key)
+                self._enforce(key)
+
+    def _guard(self):
+        """Lock guarding data objects being read or spilled (if any, see _lock)."""
+        return self._lock if self._lock is not None else nullcontext()
+
+    def _compute(self, name):
+        """
+        Run the compute method of a data object; the results of compute methods
+        that declare their requirements are read from (or written to) the
+        result cache, if set.
+        """
+        method = getattr(self, '{}_{}'.format(self._getter_prefix, name))
+        names = getattr(method, 'requires', None)
+        if self._cache is None or names is None:
+            method()
+            return
+        key = self._cache.key(method, [getattr(self, n) for n in names])
+        obj = self._cache.get(key)
+        if obj is not None:
+            setattr(self, name, obj)
+            return
+        method()
+        for k in ('_' + name, name):
+            if isinstance(self.__dict__.get(k), (pd.Series, pd.DataFrame)):
+                self._cache.put(key, self.__dict__[k])
+                break
+
+    def _hashes(self):
+        """
+        Get the column hashes of each data object (see
+        :func:`~exa.core.container.Container.fingerprint`); data objects not
+        in memory are only read if their hashes are unknown.
+        """
+        placeholders = self._placeholders or {}
+        hashes = {}
+        for key in sorted(set(self._data(load=False)) | set(placeholders)):
+            obj = self.__dict__.get(key)
+            if obj is None and placeholders[key].hashes is not None:
+                pairs = placeholders[key].hashes
+            else:
+                pairs = self._hash(key, obj if obj is not None else getattr(self, key))
+            hashes[key[1:] if key.startswith('_') else key] = pairs
+        return hashes
+
+    def _hash(self, key, obj):
+        """
+        Get the column hashes of a data object, cached while its buffers are
+        read-only and unchanged (see fingerprint).
+        """
+        signature = _signature(obj)
+        if signature is None:
+            if self._hashed:
+                self._hashed.pop(key, None)
+            return hash_columns(obj)
+        cached = (self._hashed or {}).get(key)
+        if (cached is not None and cached[0]() is obj and cached[1] is obj.index and
+                cached[2] == signature):
+            return cached[3]
+        pairs = hash_columns(obj)
+        if self._hashed is None:
+            self._hashed = {}
+        self._hashed[key] = (weakref.ref(obj), obj.index, signature, pairs)
+        return pairs
+
+    def _touch(self, key):
+        """Record access to a data object (see memory_limit)."""
+        with self._guard():
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self._enforce(key)
+
+    def _enforce(self, keep=None):
+        """
+        Spill least recently used data objects (other than **keep**) to disk
+        until the data objects in memory fit the memory limit. Data objects
+        whose buffers changed since they were last counted (e.g. by adding,
+        replacing, or resizing columns) are counted again.
+        """
+        for key, (spans, _) in list(self._lru.items()):
+            obj = self.__dict__[key]
+            current = [buf for _, _, bufs in _usage(obj, deep=False) for buf in bufs]
+            if current != spans:
+                self._lru[key] = (current, [buf for _, _, bufs in _usage(obj) for buf in bufs])
+        for key in list(self._lru):
+            if _footprint(buf for _, bufs in self._lru.values() for buf in bufs) <= self._memory_limit:
+                break
+            if key != keep:
+                self._spill(key)
+
+    def _spill(self, key):
+        """
+        Release a data object from memory; it is read from the scratch
+        directory on next access (objects read from, and unchanged since, a
+        saved container or the scratch directory are not written again).
+        """
+        obj = self.__dict__[key]
+        if self._placeholders is None:
+            self._placeholders = {}
+        placeholder = self._placeholders.get(key)
+        if self._zones:
+            self._zones.pop(key, None)    # May predate modifications (recomputed on request)
+        hashes = hash_columns(obj)
+        if placeholder is None or not placeholder.unchanged(obj, hashes):
+            if self._scratch is None:
+                self._scratch = mkdtemp(prefix='exa-')
+                weakref.finalize(self, shutil.rmtree, self._scratch, True)
+            shutil.rmtree(os.path.join(self._scratch, key), ignore_errors=True)
+            desc = npydir.write_object(obj, self._scratch, key)
+            stored = (self._stored or (None, {}))[1].get(key)
+            name = key[1:] if isinstance(getattr(type(self), key[1:], None), property) else key
+            placeholder = _Placeholder(name, self._scratch,
+                                       partial(npydir.read_object, self._scratch, desc, None, False))
+            placeholder.dirty = stored is None or _pairs(hashes) != _pairs(stored)
+            placeholder.loaded(obj, hashes)
+            self._placeholders[key] = placeholder
+        del self.__dict__[key]
+        del self._lru[key]
 
     def __sizeof__(self):
         """Note that this function must return a Python integer."""
@@ -477,7 +1352,12 @@ class Container(object):
             return self.slice_cardinal(key)
         raise KeyError()
 
-    def __init__(self, name=None, description=None, meta=None, uuid=None, **kwargs):
+    def __init__(self, name=None, description=None, meta=None, uuid=None, memory_limit=None,
+                 **kwargs):
+        if memory_limit is not None:
+            self._memory_limit = parse_bytes(memory_limit)
+            self._lock = threading.RLock()
+            self._lru = OrderedDict()
         self.log.info('adding {} attrs'.format(len(kwargs)))
         for key, value in kwargs.items():
             setattr(self, key, value)
@@ -488,6 +1368,1269 @@ class Container(object):
         if uuid is None:
             self.uuid = str(uuid4())
 
+    def __getstate__(self):
+        # Locks cannot be pickled and the scratch directory is removed with
+        # this container: spilled data objects are read back into the state
+        # and the memory usage of data objects is counted again on unpickle.
+        with self._guard():
+            state = self.__dict__.copy()
+            state.pop('_lock', None)
+            state.pop('_scratch', None)
+            state.pop('_hashed', None)
+            spilled = []
+            if self._placeholders is not None:
+                state['_placeholders'] = {}
+                for key, placeholder in self._placeholders.items():
+                    if self._scratch is None or placeholder.path != self._scratch:
+                        state['_placeholders'][key] = placeholder
+                    elif key not in state:
+                        state[key] = placeholder.read()
+                        spilled.append(key)
+            if self._lru is not None:
+                state['_lru'] = OrderedDict((key, (None, [])) for key in spilled + list(self._lru))
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._lru is not None or self._placeholders is not None:
+            self._lock = threading.RLock()
+
+
+def _open_store(path, mode, timeout=10, **kwargs):
+    """
+    Open an HDF5 store, waiting (up to timeout seconds) while another process
+    holds a conflicting lock on the file (e.g. a
+    :class:`~exa.core.container.ContainerWriter` committing frames).
+    """
+    start = time.time()
+    while True:
+        try:
+            return pd.HDFStore(path, mode, **kwargs)
+        except tables.HDF5ExtError as e:
+            if 'lock' not in str(e) or time.time() - start > timeout:
+                raise
+            time.sleep(0.05)
+
+
+@contextmanager
+def _blosc_threads(threads):
+    """Temporarily set the number of (de)compression threads used by Blosc."""
+    if threads is None:
+        yield
+        return
+    previous = tables.set_blosc_max_threads(threads)
+    try:
+        yield
+    finally:
+        tables.set_blosc_max_threads(previous)
+
+
+def _compact_values(values, single, max_unique):
+    """Compacted values of a series (see :func:`~exa.core.container.Container.compact`)."""
+    dtype = values.dtype
+    if not isinstance(dtype, np.dtype) or len(values) == 0:
+        return values
+    if is_integer_dtype(dtype):
+        return pd.to_numeric(values, downcast='integer')
+    elif single and dtype == np.float64:
+        return values.astype(np.float32)
+    elif dtype == object:
+        try:
+            nunique = values.nunique(dropna=False)
+        except TypeError:    # Unhashable objects
+            return values
+        if nunique <= max_unique*len(values):
+            return values.astype('category')
+    return values
+
+
+def _compact(obj, single, max_unique):
+    """
+    Get a compacted copy of a data object (see
+    :func:`~exa.core.container.Container.compact`).
+    """
+    if isinstance(obj, pd.Series):
+        values = _compact_values(pd.Series(obj), single, max_unique)
+        return type(obj)(values, index=obj.index, name=obj.name, copy=True).__finalize__(obj)
+    columns = {i: _compact_values(obj.iloc[:, i], single, max_unique)
+               for i in range(obj.shape[1])}
+    df = pd.DataFrame(columns, index=obj.index, copy=True)
+    df.columns = obj.columns
+    if isinstance(obj, Field):
+        values = [_compact(v, single, max_unique) for v in obj.field_values]
+        return type(obj)(df, field_values=values)
+    return type(obj)(df).__finalize__(obj)
+
+
+def _nbytes(obj):
+    """Size (bytes) of a data object, including object values and field values."""
+    return int(np.sum(obj.memory_usage(deep=True)))
+
+
+def _buffers(array, deep=True):
+    """
+    Get the buffers of an array (column or index values) as (span, size)
+    pairs; spans are the (start, stop) memory addresses of the buffer,
+    identifying memory shared between arrays (None if unknown).
+    """
+    if isinstance(array, pd.Categorical):
+        return _buffers(array.codes, deep) + _buffers(array.categories._values, deep)
+    array = getattr(array, '_ndarray', array)    # Datetime and timedelta arrays
+    if not isinstance(array, np.ndarray):
+        return [(None, int(array.nbytes))]
+    size = array.nbytes
+    if deep and array.dtype == object:
+        size = int(pd.Series(array, copy=False).memory_usage(index=False, deep=True))
+    start = stop = array.__array_interface__['data'][0]
+    if array.size > 0:
+        for n, stride in zip(array.shape, array.strides):
+            if stride < 0:
+                start += (n - 1)*stride
+            else:
+                stop += (n - 1)*stride
+        stop += array.itemsize
+    return [((start, stop), size)]
+
+
+def _signature(obj):
+    """
+    Labels, data types, and buffers of the columns (or values) of a data
+    object if they are all read-only (non-object) NumPy buffers, i.e. cannot
+    be modified in place (None otherwise, see
+    :func:`~exa.core.container.Container.fingerprint`).
+    """
+    if getattr(obj, 'field_values', None):
+        return None
+    if isinstance(obj, pd.Series):
+        items = [(obj.name, obj.dtype, obj.array)]
+    else:
+        items = list(zip(obj.columns, obj.dtypes, _columns(obj)))
+    signature = []
+    for label, dtype, values in items:
+        array = getattr(values, '_ndarray', values)    # Categorical codes, datetimes, etc.
+        if not isinstance(array, np.ndarray) or array.flags.writeable or array.dtype == object:
+            return None    # Elements of object arrays may be modified in place
+        signature.append((label, dtype, _buffers(array, deep=False)[0][0], array.strides))
+    return signature
+
+
+class _Coverage(object):
+    """
+    Union of the memory spans of buffers (see :func:`~exa.core.container._buffers`),
+    counting bytes shared between (overlapping) buffers once.
+    """
+    def add(self, span, size):
+        """Add a buffer, returning the number of its bytes not already counted."""
+        if span is None:
+            return size
+        start, stop = span
+        if stop <= start:
+            return size
+        covered = 0
+        ranges = []
+        for s, e in self.ranges:
+            if e < start or s > stop:
+                ranges.append((s, e))
+            else:
+                covered += max(0, min(e, stop) - max(s, start))
+                start, stop = min(s, start), max(e, stop)
+        ranges.append((start, stop))
+        self.ranges = sorted(ranges)
+        extent = span[1] - span[0]
+        # Sizes may exceed (deep sizes of objects) or be less than (strided views) the span
+        return int(round(size*(extent - covered)/extent))
+
+    def __init__(self):
+        self.ranges = []
+
+
+def _footprint(buffers):
+    """Memory (bytes) used by buffers, counting shared bytes once (see _Coverage)."""
+    coverage = _Coverage()
+    return sum(coverage.add(span, size) for span, size in buffers)
+
+
+def _usage(obj, deep=True):
+    """Get the buffers of each column (and index, and field values) of a data object."""
+    index = obj.index
+    if isinstance(index, (pd.RangeIndex, pd.MultiIndex)):
+        yield 'index', index.dtype, [(None, int(index.memory_usage(deep=deep)))]
+    else:
+        yield 'index', index.dtype, _buffers(index._values, deep)
+    if isinstance(obj, pd.Series):
+        yield 'values', obj.dtype, _buffers(obj._values, deep)
+        return
+    for i, (col, values) in enumerate(zip(obj.columns, _columns(obj))):
+        yield col, obj.dtypes.iloc[i], _buffers(values, deep)
+    buffers = []
+    for values in getattr(obj, 'field_values', []):
+        for _, _, bufs in _usage(values, deep):
+            buffers += bufs
+    if buffers:
+        yield 'field_values', None, buffers
+
+
+def _stored_bytes(store, key):
+    """Uncompressed and stored size (bytes) of a data object in an HDF5 store."""
+    node = store.get_node(key)
+    if node is None:    # Empty table format data objects are not written
+        return 0, 0
+    leaves = node._f_walknodes('Leaf') if isinstance(node, tables.Group) else [node]
+    raw = stored = 0
+    for leaf in leaves:
+        raw += leaf.size_in_memory
+        try:
+            stored += leaf.size_on_disk
+        except NotImplementedError:    # Variable length (object) arrays
+            stored += leaf.size_in_memory
+    return raw, stored
+
+
+def _report(stats):
+    """Storage report (see :func:`~exa.core.container.Container.save`)."""
+    df = pd.DataFrame.from_dict(stats, orient='index', columns=['codec', 'raw', 'stored'])
+    df.index.name = 'name'
+    df['ratio'] = df['raw']/df['stored'].where(df['stored'] > 0)
+    return df
+
+
+def _as_plain(obj, columns=None):
+    """
+    Get a plain pandas (shallow) copy of a data object with categoricals
+    (of the given columns, default all) converted back to their raw values.
+    """
+    if isinstance(obj, pd.Series):
+        plain = pd.Series(obj).copy(deep=False)
+        if isinstance(plain.dtype, CategoricalDtype):
+            plain = plain.astype(plain.cat.categories.dtype)
+        return plain
+    plain = pd.DataFrame(obj).copy(deep=False)
+    for col in plain.columns if columns is None else columns:
+        if isinstance(plain[col].dtype, CategoricalDtype):
+            plain[col] = plain[col].astype(plain[col].cat.categories.dtype)
+    return plain
+
+
+def _encode(obj):
+    """
+    Get a plain pandas (shallow) copy of a data object with categoricals
+    replaced by their codes, and the categories (column, categories, and
+    ordered) that were replaced.
+    """
+    categories = []
+    if isinstance(obj, pd.Series):
+        plain = pd.Series(obj)
+        if isinstance(plain.dtype, CategoricalDtype):
+            categories.append((None, plain.cat.categories.values, plain.cat.ordered))
+            plain = pd.Series(plain.cat.codes.values, index=plain.index, name=plain.name)
+        return plain, categories
+    plain = pd.DataFrame(obj).copy(deep=False)
+    for col in plain.columns:
+        if isinstance(plain[col].dtype, CategoricalDtype):
+            categories.append((col, plain[col].cat.categories.values, plain[col].cat.ordered))
+            plain[col] = plain[col].cat.codes
+    return plain, categories
+
+
+def _put_categories(store, key, categories, filters=None):
+    """Store the categories of an encoded data object next to it (see _encode)."""
+    if not categories or store.get_node(key) is None:    # Empty tables are not written
+        return
+    storer = store.get_storer(key)
+    attr = []
+    for i, (col, values, ordered) in enumerate(categories):
+        node = 'categories{}'.format(i)
+        array = storer.group._v_file.create_vlarray(storer.group, node, tables.ObjectAtom(),
+                                                    filters=filters)
+        array.append(values)
+        attr.append((col, node, ordered))
+    storer.attrs.exa_categories = attr
+
+
+def _invariant(values):
+    """Check if the rows of a (frames, rows) array are all identical."""
+    if values.dtype.kind in 'fc':
+        return np.array_equal(values, np.broadcast_to(values[0], values.shape), equal_nan=True)
+    return bool((values == values[0]).all())
+
+
+def _delta(obj, cardinal, tolerance=None):
+    """
+    Frame-wise encoding of a dataframe with a cardinal column (see
+    :func:`~exa.core.container.Container.save`). Columns identical for all
+    frames are removed; float columns are replaced by (the smallest integer
+    type holding) their differences from frame to frame.
+
+    Returns:
+        obj: Encoded dataframe (the dataframe if it cannot be encoded)
+        encoding (dict): Description of the encoding and removed columns (or None)
+    """
+    if not isinstance(obj, pd.DataFrame) or cardinal not in obj.columns or len(obj) == 0:
+        return obj, None
+    frame = np.asarray(obj[cardinal])
+    starts = np.flatnonzero(np.r_[True, frame[1:] != frame[:-1]])
+    nframes = len(starts)
+    nrows = len(obj)//nframes
+    if (nframes < 2 or nframes*nrows != len(obj) or np.any(np.diff(starts) != nrows) or
+            np.any(np.diff(frame[starts]) <= 0)):
+        return obj, None
+    encoding = {'nframes': nframes, 'columns': list(obj.columns), 'encoded': []}
+    constant = {}
+    obj = obj.copy(deep=False)
+    for col in encoding['columns']:
+        values = obj[col].values
+        if col == cardinal or not isinstance(values, np.ndarray):
+            continue
+        values = values.reshape(nframes, nrows)
+        if _invariant(values):
+            constant[col] = values[0]
+            encoding['encoded'].append((col, 'constant', values.dtype.str))
+        elif values.dtype.kind == 'f':
+            if tolerance is None:
+                ints = values.view('i{}'.format(values.dtype.itemsize))
+            elif np.isfinite(values).all() and np.abs(values).max()/tolerance < 2**62:
+                ints = np.round(values/tolerance).astype(np.int64)
+            else:
+                continue
+            diffs = np.empty_like(ints)
+            diffs[0] = ints[0]
+            diffs[1:] = np.diff(ints, axis=0)    # Integer overflow wraps around (exactly)
+            for dtype in (np.int8, np.int16, np.int32, np.int64):
+                info = np.iinfo(dtype)
+                if diffs.min() >= info.min and diffs.max() <= info.max:
+                    break
+            obj[col] = diffs.ravel().astype(dtype)
+            encoding['encoded'].append((col, 'delta', values.dtype.str))
+    if not encoding['encoded']:
+        return obj, None
+    encoding['tolerance'] = tolerance
+    encoding['constant'] = constant
+    return obj.drop(columns=list(constant)), encoding
+
+
+def _put_delta(store, key, encoding, filters=None):
+    """Store the description (and removed columns) of a delta encoded data object."""
+    if encoding is None:
+        return
+    storer = store.get_storer(key)
+    constant = encoding.pop('constant')
+    for i, (col, kind, _) in enumerate(encoding['encoded']):
+        if kind == 'constant':
+            node = 'constant{}'.format(i)
+            values = constant[col]
+            if values.dtype == object:
+                array = storer.group._v_file.create_vlarray(storer.group, node, tables.ObjectAtom(),
+                                                            filters=filters)
+                array.append(values)
+            else:
+                storer.group._v_file.create_carray(storer.group, node, obj=values,
+                                                   filters=filters)
+    storer.attrs.exa_delta = encoding
+
+
+def _undelta(storer, obj):
+    """Reconstruct the columns of a delta encoded data object (see _delta)."""
+    encoding = storer.attrs.exa_delta
+    nframes = encoding['nframes']
+    tolerance = encoding['tolerance']
+    for i, (col, kind, dtype) in enumerate(encoding['encoded']):
+        dtype = np.dtype(dtype)
+        if kind == 'constant':
+            node = storer.group._f_get_child('constant{}'.format(i))
+            values = node[0] if isinstance(node, tables.VLArray) else node.read()
+            obj[col] = np.tile(values, nframes)
+            continue
+        ints = np.int64 if tolerance is not None else 'i{}'.format(dtype.itemsize)
+        diffs = obj[col].values.astype(ints).reshape(nframes, -1)
+        values = np.cumsum(diffs, axis=0, dtype=ints)
+        if tolerance is None:
+            values = values.view(dtype)
+        else:
+            values = (values*tolerance).astype(dtype)
+        obj[col] = values.ravel()
+    return obj[encoding['columns']]
+
+
+def _decode(storer, obj):
+    """
+    Restore columns of a data object stored delta encoded (see _delta) and
+    categoricals stored as codes (see _encode).
+    """
+    if 'exa_delta' in storer.attrs:
+        obj = _undelta(storer, obj)
+    if 'exa_categories' not in storer.attrs:
+        return obj
+    for col, node, ordered in storer.attrs.exa_categories:
+        if col is not None and col not in obj.columns:    # Not selected
+            continue
+        categories = storer.group._f_get_child(node)[0]
+        if col is None:
+            values = pd.Categorical.from_codes(obj.values, categories, ordered=ordered)
+            obj = pd.Series(values, index=obj.index, name=obj.name)
+        else:
+            obj[col] = pd.Categorical.from_codes(obj[col].values, categories, ordered=ordered)
+    return obj
+
+
+def _get(store, key):
+    """Read a data object (see :func:`~exa.core.container._decode`)."""
+    return _decode(store.get_storer(key), store[key])
+
+
+def _frames(frames):
+    """
+    Normalize a selection of cardinal values (int, list, array, range, or
+    slice of values) to a half-open range and, if not contiguous, the values.
+    Selections of non-integer values (e.g. strings) have no range.
+    """
+    if isinstance(frames, (int, np.integer)):
+        frames = [frames]
+    if isinstance(frames, range) and frames.step == 1:
+        frames = slice(frames.start, frames.stop)
+    if isinstance(frames, slice):
+        return frames.start, frames.stop, None
+    values = np.unique(np.asarray(frames))
+    if len(values) == 0:
+        return 0, 0, values
+    elif values.dtype.kind not in 'iu':
+        return None, None, values
+    return values[0], values[-1] + 1, values
+
+
+def _mask(idx, start, stop, values):
+    """
+    Mask of the cardinal values (index or column) within the half-open range
+    (or, if given, among the values; see :func:`~exa.core.container._frames`).
+    """
+    if isinstance(idx.dtype, CategoricalDtype):    # Evaluated on the categories
+        cat = idx.values
+        mask = _mask(pd.Index(cat.categories), start, stop, values)
+        return np.append(mask, False)[cat.codes]    # Missing values (-1) are not selected
+    if values is not None:
+        return np.asarray(idx.isin(values))
+    mask = np.ones(len(idx), dtype=bool)
+    if start is not None:
+        mask &= np.asarray(idx >= start)
+    if stop is not None:
+        mask &= np.asarray(idx < stop)
+    return mask
+
+
+def _filter(obj, name, columns=None, frames=None, cardinal=None):
+    """
+    Select cardinal values (frames) and columns of a data object in memory.
+    Frames are selected by index (of the cardinal data object, or an index of
+    the same name) or by the column of the same name as the cardinal data
+    object.
+    """
+    idx = None
+    if frames is None:
+        pass
+    elif name == cardinal or obj.index.name == cardinal:
+        idx = obj.index
+    elif isinstance(obj, pd.DataFrame) and cardinal in obj.columns:
+        idx = obj[cardinal]
+    if idx is not None:
+        obj = obj[_mask(idx, *_frames(frames))]
+    if columns is not None and isinstance(obj, pd.DataFrame) and list(obj.columns) != list(columns):
+        obj = obj[columns]
+    return obj
+
+
+def _select(store, key, columns=None, frames=None, cardinal=None):
+    """
+    Read a data object from an HDF5 store. For table format data objects, the
+    selection of columns and cardinal values (frames) is performed by PyTables
+    (i.e. only the selected data is read).
+
+    Args:
+        store: Open pandas.HDFStore
+        key (str): Key of the data object
+        columns (list): Columns to read (default all)
+        frames: Cardinal values (see :func:`~exa.core.container._frames`)
+        cardinal (str): Name of the cardinal data object (and key column)
+    """
+    storer = store.get_storer(key)
+    if not storer.is_table:
+        return _filter(_get(store, key), key[1:], columns, frames, cardinal)
+    on = None    # Index or column on which frames are selected
+    select = columns
+    where = []
+    if frames is not None:
+        if cardinal in (storer.data_columns or []):
+            on = cardinal
+        elif key[1:] == cardinal or storer.attrs.info['index'].get('index_name') == cardinal:
+            on = 'index'
+    if on is not None:
+        start, stop, values = _frames(frames)
+        if all(b is None or isinstance(b, (int, np.integer)) for b in (start, stop)):
+            # Conditions are only built for integer cardinal values; other
+            # values (e.g. strings, or slices of them) are selected in memory
+            if start is not None:
+                where.append('{} >= {}'.format(on, int(start)))
+            if stop is not None:
+                where.append('{} < {}'.format(on, int(stop)))
+            on = None if values is None else on    # Otherwise, the selection is complete
+        if on not in (None, 'index') and columns is not None and on not in columns:
+            select = list(columns) + [on]
+    obj = _decode(storer, store.select(key, where=' & '.join(where) or None, columns=select))
+    return _filter(obj, key[1:], columns, frames if on is not None else None, cardinal)
+
+
+def _read(store, keys, columns=None, frames=None, cardinal=None):
+    """
+    Read a data object (stored under one key, or multiple keys for fields)
+    from an HDF5 store (see :func:`~exa.core.container._select`).
+    """
+    if len(keys) == 1 and "FIELD" not in keys[0]:
+        return _select(store, keys[0], columns, frames, cardinal)
+    field_data = {}
+    for key in keys:
+        field_data[key.split("/")[-1].replace('values', '')] = _get(store, key)
+    fps = field_data.pop('data')
+    return Field(fps, field_values=[field_data[str(arr)] for arr in
+                                    sorted(map(int, field_data.keys()))])
+
+
+def _relationships(data, by=None):
+    """
+    Get the types ("index-index", "index-column", or "column-index") of the
+    relationships between data objects (see :func:`~exa.core.container.Container.network`),
+    ignoring the index level **by** if given.
+    """
+    types = {}
+    items = data.items()
+    for k0, v0 in items:
+        n0 = k0[1:] if k0.startswith('_') else k0
+        for k1, v1 in items:
+            if v0 is v1:
+                continue
+            n1 = k1[1:] if k1.startswith('_') else k1
+            for name in v0.index.names:    # Check the index of data object 0 against the index
+                if name is None or name == by:    # and columns of data object 1
+                    continue
+                if name in v1.index.names:
+                    types[(n0, n1)] = types[(n1, n0)] = 'index-index'
+                if hasattr(v1, "columns"):
+                    for col in v1.columns:
+                        if _references(name, col):
+                            types[(n0, n1)] = 'index-column'
+                            types[(n1, n0)] = 'column-index'
+    return types
+
+
+def _references(name, col):
+    """Check if a column references an index; catches index "atom", column "atom1" (not "atom10")."""
+    return name == col or (isinstance(col, str) and name == col[:-1] and col[-1].isdigit())
+
+
+def _query(data, table, expr, cardinal=None, by=None, candidates=None):
+    """
+    Select the rows of a data object matching a predicate and the related rows
+    of the other data objects (see :func:`~exa.core.container.Container.query`).
+
+    Args:
+        data (dict): Data objects by name
+        table (str): Name of the data object evaluating the predicate
+        expr (str): Boolean expression of the data object's columns
+        cardinal (str): Name of the cardinal data object, to select whole cardinal values
+        by (str): Index level grouping all relationships (e.g. "source" of stacked containers)
+        candidates (array): Mask of the rows of the data object that may match (default all)
+
+    Returns:
+        selected (dict): Selected rows of the (related) data objects
+    """
+    if table not in data:
+        raise KeyError('Data object {} not found.'.format(table))
+    obj = data[table] if candidates is None else data[table][candidates]
+    frame = obj if isinstance(obj, pd.DataFrame) else obj.to_frame(obj.name or table)
+    types = _relationships(data, by)
+    graph = nx.Graph()
+    graph.add_nodes_from(data)
+    graph.add_edges_from(types)
+
+    def propagate(name, rows):
+        selected = {name: rows}
+        for parent, child in nx.bfs_edges(graph, name):
+            selected[child] = _select_related(selected[parent], data[child], types[(parent, child)], by)
+        return selected
+
+    selected = propagate(table, obj[np.asarray(frame.eval(expr), dtype=bool)])
+    if cardinal is not None:
+        if cardinal not in selected:
+            raise ValueError('Data object {} is not related to the cardinal data object.'.format(table))
+        obj = data[cardinal]
+        selected = propagate(cardinal, obj[obj.index.isin(selected[cardinal].index)])
+    return selected
+
+
+def _keys(obj, values, by):
+    """Key values of the rows of a data object (paired with the values of its index level **by**)."""
+    if by is None:
+        return pd.Index(values)
+    return pd.MultiIndex.from_arrays([obj.index.get_level_values(by), values])
+
+
+def _select_related(parent, child, typ, by=None):
+    """
+    Select the rows of a data object related to the (selected) rows of another
+    (see :func:`~exa.core.container.Container.query`); relationships hold
+    within groups of the index level **by**, if given.
+    """
+    if typ == 'index-index':
+        mask = np.ones(len(child), dtype=bool)
+        for name in parent.index.names:
+            if name is not None and name != by and name in child.index.names:
+                keys = _keys(parent, parent.index.get_level_values(name), by)
+                mask &= _keys(child, child.index.get_level_values(name), by).isin(keys)
+    elif typ == 'index-column':    # Child columns reference the parent's index
+        mask = np.ones(len(child), dtype=bool)
+        for name in parent.index.names:
+            if name is None or name == by:
+                continue
+            keys = _keys(parent, parent.index.get_level_values(name), by)
+            for col in child.columns:
+                if _references(name, col):
+                    mask &= _keys(child, child[col].values, by).isin(keys)
+    else:                          # Parent columns reference the child's index
+        mask = np.zeros(len(child), dtype=bool)
+        for name in child.index.names:
+            if name is None or name == by:
+                continue
+            cols = [col for col in parent.columns if _references(name, col)]
+            if not cols:    # Level not referenced by the parent
+                continue
+            keys = _keys(parent, parent[cols[0]].values, by)
+            keys = keys.append([_keys(parent, parent[col].values, by) for col in cols[1:]])
+            mask |= _keys(child, child.index.get_level_values(name), by).isin(keys)
+    return child[mask]
+
+
+def _zone_map(obj, name, cardinal, chunksize):
+    """Compute the zone map of a data object (see :func:`~exa.core.container.Container.zone_map`)."""
+    if isinstance(obj, pd.Series):
+        obj = obj.to_frame()
+    cols = [col for i, col in enumerate(obj.columns) if col != cardinal and
+            isinstance(obj.dtypes.iloc[i], np.dtype) and obj.dtypes.iloc[i].kind in 'iuf']
+    if name == cardinal or obj.index.name == cardinal:
+        keys, zone = np.asarray(obj.index), cardinal
+    elif cardinal is not None and cardinal in obj.columns:
+        keys, zone = np.asarray(obj[cardinal]), cardinal
+    else:
+        keys, zone = np.arange(len(obj)) // chunksize, 'chunk'
+    grouped = obj[cols].groupby(keys, sort=True)
+    zm = pd.concat({'min': grouped.min(), 'max': grouped.max(), 'count': grouped.size().to_frame('')},
+                   axis=1, names=['stat', 'column'])
+    zm.index.name = zone
+    return zm
+
+
+def _candidates(zm, expr):
+    """
+    Mask of the zones (rows of a zone map) that may hold rows matching a
+    predicate. Comparisons of columns with numbers, combined with and/or, are
+    evaluated on the minima and maxima; any other expression may match.
+    """
+    everything = np.ones(len(zm), dtype=bool)
+    flip = {ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Gt: ast.Lt, ast.GtE: ast.LtE, ast.Eq: ast.Eq}
+
+    def number(node):
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            value = number(node.operand)
+            return None if value is None else -value
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            return node.value
+        return None
+
+    def compare(left, op, right):
+        if isinstance(right, ast.Name) and type(op) in flip:
+            left, op, right = right, flip[type(op)](), left
+        value = number(right)
+        if not isinstance(left, ast.Name) or value is None or left.id not in zm['min'].columns:
+            return everything
+        low, high = zm['min'][left.id].values, zm['max'][left.id].values
+        with np.errstate(invalid='ignore'):
+            if isinstance(op, ast.Lt):
+                return low < value
+            elif isinstance(op, ast.LtE):
+                return low <= value
+            elif isinstance(op, ast.Gt):
+                return high > value
+            elif isinstance(op, ast.GtE):
+                return high >= value
+            elif isinstance(op, ast.Eq):
+                return (low <= value) & (high >= value)
+        return everything
+
+    def evaluate(node):
+        if isinstance(node, ast.BoolOp):
+            masks = [evaluate(value) for value in node.values]
+            reduce = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return reduce.reduce(masks)
+        elif isinstance(node, ast.BinOp) and isinstance(node.op, (ast.BitAnd, ast.BitOr)):
+            left, right = evaluate(node.left), evaluate(node.right)
+            return left & right if isinstance(node.op, ast.BitAnd) else left | right
+        elif isinstance(node, ast.Compare):
+            mask = everything
+            left = node.left
+            for op, right in zip(node.ops, node.comparators):
+                mask = mask & compare(left, op, right)
+                left = right
+            return mask
+        return everything
+
+    try:
+        return evaluate(ast.parse(expr.strip(), mode='eval').body)
+    except SyntaxError:
+        return everything
+
+
+def _zone_rows(obj, name, cardinal, zm, mask):
+    """Mask of the rows of a data object in the given zones (see _candidates)."""
+    if zm.index.name == 'chunk':
+        return np.repeat(mask, zm[('count', '')].values)
+    keys = obj.index if name == cardinal or obj.index.name == cardinal else obj[cardinal]
+    return np.asarray(pd.Index(keys).isin(zm.index[mask]))
+
+
+def _where_frames(zones, where, frames, cardinal):
+    """
+    Select the frames that may match the predicates of each data object (see
+    :func:`~exa.core.container.Container.load`), among the selected frames.
+    """
+    keep = None
+    for name, expr in where.items():
+        zm = zones.get(name)
+        if zm is None or zm.index.name != cardinal:    # Frames cannot be skipped
+            continue
+        values = zm.index.values[_candidates(zm, expr)]
+        keep = values if keep is None else np.intersect1d(keep, values)
+    if keep is None:
+        return frames
+    if frames is not None:
+        keep = keep[_mask(pd.Index(keep), *_frames(frames))]
+    return keep
+
+
+def _pairs(hashes):
+    """Column hashes as a comparable list (of (column, hash) tuples)."""
+    return [tuple(pair) for pair in hashes]
+
+
+def _unchanged(obj, hashes, current=None):
+    """
+    Check that a data object has the given column hashes (None if unknown);
+    its **current** hashes are computed unless given.
+    """
+    if hashes is None:
+        return False
+    return _pairs(hash_columns(obj) if current is None else current) == _pairs(hashes)
+
+
+def _fingerprint(hashes, detail):
+    """Combine column hashes by data object (see :func:`~exa.core.container.Container.fingerprint`)."""
+    if detail:
+        rows = [(name, label, digest) for name, pairs in sorted(hashes.items())
+                for label, digest in pairs]
+        return pd.DataFrame(rows, columns=['object', 'column', 'hash']).set_index(
+            ['object', 'column'])['hash']
+    return combine((name, combine(pairs)) for name, pairs in sorted(hashes.items()))
+
+
+class _Placeholder(object):
+    """
+    Reader of a lazily loaded data object (see
+    :func:`~exa.core.container.Container.load`); keeps track of the object it
+    read (and of its stored column hashes, if known) so that unmodified
+    objects can be unloaded.
+    """
+    def read(self):
+        """Read the data object from its store."""
+        return self.reader()
+
+    def loaded(self, obj, hashes=None):
+        """Record the data object as read (or saved), with its column hashes if given."""
+        self.state = weakref.ref(obj)
+        if hashes is not None:
+            self.hashes = hashes
+
+    def unchanged(self, obj, hashes=None):
+        """
+        Check that the data object is the one read and that its content
+        (column hashes, computed unless given) matches the stored content.
+        """
+        if self.state is None or self.state() is not obj or self.hashes is None:
+            return False
+        return _pairs(hash_columns(obj) if hashes is None else hashes) == _pairs(self.hashes)
+
+    def __init__(self, name, path, reader, hashes=None):
+        self.name = name
+        self.path = path
+        self.reader = reader
+        self.hashes = hashes    # Column hashes of the stored data object (None if unknown)
+        self.state = None
+        self.dirty = False    # Modified relative to the saved container (see _spill)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['state'] = None    # Weak references cannot be pickled
+        return state
+
+
+def _read_filtered(reader, *args):
+    """Read a data object and select from it (see :func:`~exa.core.container._filter`)."""
+    return _filter(reader(), *args)
+
+
+def _read_path(path, *args):
+    """Open an HDF5 store and read a data object (see :func:`~exa.core.container._read`)."""
+    with _open_store(path, 'r') as store:
+        return _read(store, *args)
+
+
+def _stored_name(key):
+    """
+    Get the name of the data object a key of a saved container belongs to
+    (e.g. "/FIELD0_name/values0" belongs to "name").
+    """
+    if "FIELD" in key:
+        return "_".join(key.split("_")[1:]).split("/")[0]
+    return key[1:]
+
+
+def _key_name(column, keys):
+    """
+    Get the name of the key (index name) a column references, following the
+    conventions of :func:`~exa.core.container.Container.network` (e.g. columns
+    "atom", "atom0", "atom1" reference the index "atom").
+    """
+    if not isinstance(column, str):
+        return None
+    if column in keys:
+        return column
+    if column[-1:].isdigit() and column[:-1] in keys:
+        return column[:-1]
+    return None
+
+
+def _concat_values(pieces, shifts=None, shared=False):
+    """
+    Concatenate (the values of) a list of series in a single pass, adding a
+    per-piece integer offset if given. Categoricals are combined by merging
+    their categories (no conversion to objects), or, for columns encoded with
+    a shared dictionary (**shared**, see :mod:`~exa.core.categories`), by
+    concatenating their codes if their categories are prefixes of the same
+    dictionary.
+    """
+    if all(isinstance(p.dtype, CategoricalDtype) for p in pieces):
+        if shifts is not None and all(is_integer_dtype(p.cat.categories) for p in pieces):
+            pieces = [pd.Categorical.from_codes(p.cat.codes, categories=p.cat.categories + s)
+                      for p, s in zip(pieces, shifts)]
+        elif shared:
+            dtype = max((p.dtype for p in pieces), key=lambda d: len(d.categories))
+            if not dtype.ordered and all(_is_prefix(p.dtype.categories, dtype.categories)
+                                         for p in pieces):
+                codes = np.concatenate([np.asarray(p.cat.codes) for p in pieces])
+                return pd.Categorical.from_codes(codes, dtype=dtype)
+        return union_categoricals(pieces, ignore_order=True)
+    values = pd.concat(pieces, ignore_index=True).values
+    if shifts is not None and is_integer_dtype(values):
+        values = values + np.repeat(shifts, [len(p) for p in pieces])
+    return values
+
+
+def _concat_data(objs, offsets):
+    """
+    Concatenate a single type of data object (from multiple containers) and
+    offset its key index and foreign key columns.
+
+    Args:
+        objs (list): List of (container number, data object) pairs
+        offsets (list): Offsets of each key for each container
+    """
+    first = objs[0][1]
+    pieces = [obj for _, obj in objs]
+    keys = offsets[0].keys()
+    def shifts(key):
+        if key is None:
+            return None
+        return np.array([offsets[i][key] for i, _ in objs], dtype=np.int64)
+    index = first.index.append([obj.index for obj in pieces[1:]])
+    shift = shifts(first.index.name if first.index.name in keys else None)
+    if shift is not None and is_integer_dtype(index):
+        index = pd.Index(index.values + np.repeat(shift, [len(p) for p in pieces]),
+                         name=index.name)
+    elif index.name is None and not isinstance(index, pd.MultiIndex):
+        index = pd.RangeIndex(len(index))    # Not a key: renumbered
+    if isinstance(first, pd.Series):
+        values = _concat_values([pd.Series(p) for p in pieces])
+        return type(first)(values, index=index, name=first.name)
+    columns = list(first.columns)
+    for obj in pieces[1:]:
+        columns += [col for col in obj.columns if col not in columns]
+    data = {}
+    for col in columns:
+        series = [obj[col] if col in obj.columns else pd.Series(np.nan, index=obj.index)
+                  for obj in pieces]
+        shared = getattr(first, '_shared_categories', False) and col in first._categories
+        data[col] = _concat_values(series, shifts(_key_name(col, keys)), shared)
+    df = pd.DataFrame(data, index=index, columns=columns, copy=False)
+    if isinstance(first, Field):
+        values = [v.copy() for obj in pieces for v in obj.field_values]
+        return type(first)(df, field_values=values)
+    return type(first)(df)
+
+
+def concat(*containers):
+    """
+    Concatenate any number of containers into a single container.
+
+    Each type of data object is concatenated once (i.e. not by pairwise
+    appending). Integer index values that act as keys (named indices, e.g.
+    "frame" or "atom") are offset so that they remain unique: the offset for
+    each container is the running total of the preceding containers' maximum
+    key value plus one. Every column referencing a key (e.g. "frame", "atom0",
+    "atom1", see :func:`~exa.core.container.Container.network`) is offset by
+    the same amount. Unnamed indices are renumbered (0 to n-1). Categorical
+    columns are combined by merging their categories.
+
+    .. code-block:: Python
+
+        restarted = concat(run0, run1, run2)    # Or run0.concat(run1, run2)
+
+    Args:
+        containers: Container objects (the first determines the type, name, etc.)
+
+    Returns:
+        container: New container with concatenated data objects
+    """
+    if len(containers) == 1 and isinstance(containers[0], (list, tuple)):
+        containers = containers[0]
+    if len(containers) == 0:
+        raise ValueError("No containers to concatenate.")
+    # Determine the (integer) keys and their offsets for each container
+    offsets = []
+    running = defaultdict(int)
+    tables = defaultdict(list)
+    for i, container in enumerate(containers):
+        offsets.append(dict(running))
+        maxes = {}
+        for name, obj in container._data().items():
+            tables[name].append((i, obj))
+            key = obj.index.name
+            if key is not None and is_integer_dtype(obj.index) and len(obj) > 0:
+                maxes[key] = max(maxes.get(key, 0), obj.index.max())
+        for key, value in maxes.items():
+            running[key] += int(value) + 1
+    for offset in offsets:
+        for key in running:
+            offset.setdefault(key, 0)
+    first = containers[0]
+    kwargs = {'name': first.name, 'description': first.description, 'meta': first.meta}
+    for name, objs in tables.items():
+        kwargs[name[1:] if name.startswith('_') else name] = _concat_data(objs, offsets)
+    return type(first)(**kwargs)
+
+
+class ContainerWriter(object):
+    """
+    Append (stream) containers, e.g. each holding newly produced cardinal
+    frames and their related rows, to an HDF5 store in table format.
+
+    .. code-block:: Python
+
+        with ContainerWriter('traj.hdf5', name='md') as writer:
+            for frames in simulation:          # Containers of new frames
+                writer.append(frames)
+
+        traj = MyContainer.load('traj.hdf5')   # Frames committed so far
+
+    Every append is a commit: the store is opened, appended to, flushed, and
+    closed again, so that other processes (a single writer and any number of
+    readers) may open the file between commits. Opening waits while another
+    process holds the file. Columns referencing keys (e.g. "frame", "atom0")
+    are stored as data columns; they are indexed when the writer is closed.
+
+    Args:
+        path (str): HDF5 file path (appended to if it exists)
+        name (str): Container name (default name of the first container appended)
+        description (str): Container description
+        meta (dict): Container metadata
+        complevel (int): Compression level (default 1)
+        complib (str): Compression library (default zlib)
+        min_itemsize: Minimum string sizes (see pandas.HDFStore.append)
+        timeout (float): Seconds to wait for other processes to release the file
+
+    Note:
+        Data objects are appended as is: key values (indices) must be unique
+        across appends (compare :func:`~exa.core.container.concat`).
+        Categoricals are stored as their raw values.
+    """
+    def append(self, container):
+        """
+        Append (and commit) the data objects of a container.
+
+        Args:
+            container: Container holding the rows to append
+        """
+        data = container._data()
+        keys = {obj.index.name for obj in data.values()}
+        keys.add(container._cardinal)
+        keys.discard(None)
+        with _open_store(self.path, 'a', self.timeout, complevel=self.complevel,
+                         complib=self.complib) as store:
+            stored = store.keys()
+            if '/kwargs' not in stored:
+                rel = container._rel()
+                rel.update({k: v for k, v in self.rel.items() if v is not None})
+                store['kwargs'] = pd.Series(dtype=np.float64)
+                store.get_storer('kwargs').attrs.metadata = rel
+            else:    # Stale
+                attrs = store.get_storer('kwargs').attrs
+                for attr in ('exa_fingerprint', 'exa_shapes'):
+                    if attr in attrs:
+                        delattr(attrs, attr)
+                for key in stored:
+                    if key.startswith(zone_prefix):
+                        store.remove(key)
+            fields = {_stored_name(key): key.split('/')[1] for key in stored if 'FIELD' in key}
+            for name, obj in data.items():
+                name = name[1:] if name.startswith('_') else name
+                if isinstance(obj, Field):
+                    fname = fields.get(name, 'FIELD{}_{}'.format(len(set(fields.values())), name))
+                    fields[name] = fname
+                    fname = '/' + fname + '/'
+                    n = store.get_storer(fname + 'data').nrows if fname + 'data' in stored else 0
+                    store.append(fname + 'data', _as_plain(obj), format='table', index=False)
+                    for i, field in enumerate(obj.field_values):
+                        store[fname + 'values' + str(n + i)] = _as_plain(field)
+                    continue
+                plain = _as_plain(obj)
+                columns = [] if isinstance(plain, pd.Series) else plain.columns
+                store.append(name, plain, format='table', index=False,
+                             data_columns=[col for col in columns if _key_name(col, keys)],
+                             min_itemsize=self.min_itemsize)
+            store.flush(fsync=True)
+        self.log.info('appended {} data objects'.format(len(data)))
+
+    def close(self):
+        """Index the data (key) columns of all tables for fast selection."""
+        if not os.path.isfile(self.path):
+            return
+        with _open_store(self.path, 'a', self.timeout) as store:
+            for key in store.keys():
+                storer = store.get_storer(key)
+                if storer.is_table and storer.data_columns:
+                    store.create_table_index(key, optlevel=9, kind='full')
+
+    @property
+    def log(self):
+        name = '.'.join([self.__module__,
+                         self.__class__.__name__])
+        return logging.getLogger(name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __init__(self, path, name=None, description=None, meta=None, complevel=1,
+                 complib='zlib', min_itemsize=None, timeout=10):
+        if not (path.endswith('.hdf5') or path.endswith('.hdf')):
+            raise ValueError('File path must have a ".hdf5" or ".hdf" extension.')
+        self.path = path
+        self.rel = {'name': name, 'description': description, 'meta': meta}
+        self.complevel = complevel
+        self.complib = complib
+        self.min_itemsize = min_itemsize
+        self.timeout = timeout
+
+
+class _Buffer(object):
+    """
+    Column buffer grown geometrically (see
+    :class:`~exa.core.container.ContainerBuilder`); appends are amortized
+    constant time per row.
+    """
+    def append(self, values):
+        values = np.asarray(values)
+        n = len(values)
+        if self.data is None:
+            self.data = np.empty(max(self.capacity, n), dtype=values.dtype)
+        elif not np.can_cast(values.dtype, self.data.dtype):
+            self.data = self.data.astype(np.result_type(self.data.dtype, values.dtype))
+        if self.size + n > len(self.data):
+            data = np.empty(max(2*len(self.data), self.size + n), dtype=self.data.dtype)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+        self.data[self.size:self.size+n] = values
+        self.size += n
+
+    def values(self):
+        """Get the values (the buffer itself if full, otherwise a trimmed copy)."""
+        if self.size == len(self.data):
+            return self.data
+        return self.data[:self.size].copy()
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = None
+        self.size = 0
+
+
+class _CategoryBuffer(_Buffer):
+    """Buffer of the codes of a categorical column, mapping categories as they are appended."""
+    def append(self, values):
+        if isinstance(getattr(values, 'dtype', None), CategoricalDtype):
+            values = pd.Categorical(values)
+            codes, uniques = values.codes, values.categories
+        else:
+            codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+        mapping = np.empty(len(uniques) + 1, dtype=np.int32)
+        mapping[-1] = -1    # Missing values
+        for i, category in enumerate(uniques):
+            mapping[i] = self.categories.setdefault(category, len(self.categories))
+        super(_CategoryBuffer, self).append(mapping[codes])
+
+    def values(self):
+        codes = super(_CategoryBuffer, self).values().astype(np.int32, copy=False)
+        return pd.Categorical.from_codes(codes, categories=list(self.categories))
+
+    def __init__(self, capacity):
+        super(_CategoryBuffer, self).__init__(capacity)
+        self.categories = {}
+
+
+class ContainerBuilder(object):
+    """
+    Build a container frame by frame (e.g. while parsing) by appending the
+    rows of each frame to column buffers that grow geometrically, instead of
+    concatenating dataframes.
+
+    .. code-block:: Python
+
+        builder = ContainerBuilder(MyContainer, name='md', categorical=['symbol'])
+        for i, (symbols, xyz, energy) in enumerate(blocks):
+            builder.append(i, frame={'energy': energy},
+                           atom={'symbol': symbols, 'x': xyz[:, 0], 'y': xyz[:, 1], 'z': xyz[:, 2]})
+        traj = builder.build()
+
+    The rows of the cardinal data object (e.g. "frame") are indexed by the
+    cardinal value given to each append; other data objects get a column
+    holding it (e.g. "frame") and an index named after the data object
+    (e.g. "atom"). Categorical columns (given as categoricals or named in
+    **categorical**) are buffered as integer codes.
+
+    Args:
+        cls: Container class to build (default :class:`~exa.core.container.Container`)
+        cardinal (str): Name of the cardinal data object (default that of cls, or "frame")
+        categorical (list): Names of columns to build as categoricals
+        capacity (int): Initial number of rows of each buffer (default 1024)
+        kwargs: Container name, description, etc.
+
+    Note:
+        Building copies each column at most once (buffers larger than their
+        number of rows are trimmed); the builder is empty afterwards.
+    """
+    def append(self, key, **tables):
+        """
+        Append the rows of a frame.
+
+        Args:
+            key: Cardinal value (e.g. frame number) of the rows
+            tables: Columns (dict of arrays or scalars, or dataframe) by data object name
+
+        Raises:
+            ValueError: If the frame does not match previous frames (nothing is appended)
+        """
+        frame = {}    # Columns by data object name, validated before appending any
+        for name, columns in tables.items():
+            if isinstance(columns, pd.DataFrame):
+                columns = {col: columns[col] for col in columns.columns}
+            columns = {col: v if hasattr(v, '__len__') and not isinstance(v, str) else [v]
+                       for col, v in columns.items()}
+            n = {len(v) for v in columns.values()}
+            if len(n) > 1:
+                raise ValueError('Columns of {} have different lengths.'.format(name))
+            n = n.pop() if n else 0
+            if name == self.cardinal:
+                if n != 1:
+                    raise ValueError('Append one row of {} per cardinal value.'.format(name))
+                columns[None] = [key]    # Index
+            elif n > 0:
+                columns[self.cardinal] = np.full(n, key)
+            buffers = self._tables.get(name, {})
+            if self._rows.get(name):
+                new = [col for col in columns if col not in buffers]
+                if new:
+                    raise ValueError('Column {} of {} is not in previous frames.'.format(new[0], name))
+            if n > 0 and any(col not in columns for col in buffers):
+                raise ValueError('Missing columns of {}.'.format(name))
+            frame[name] = (columns, n)
+        for name, (columns, n) in frame.items():
+            buffers = self._tables.setdefault(name, {})
+            for col, values in columns.items():
+                if col not in buffers:
+                    categorical = (col in self.categorical or
+                                   isinstance(getattr(values, 'dtype', None), CategoricalDtype))
+                    buffers[col] = (_CategoryBuffer if categorical else _Buffer)(self.capacity)
+                buffers[col].append(values)
+            self._rows[name] = self._rows.get(name, 0) + n
+
+    def build(self):
+        """
+        Build the container (emptying the builder).
+
+        Returns:
+            container: Container of the class given on creation
+        """
+        kwargs = dict(self.kwargs)
+        for name, buffers in self._tables.items():
+            values = {col: buf.values() for col, buf in buffers.items()}
+            if name == self.cardinal:
+                index = pd.Index(values.pop(None), name=name, copy=False)
+            else:
+                index = pd.RangeIndex(self._rows[name], name=name)
+            # Unconsolidated (one block per column) so that columns are not copied
+            kwargs[name] = pd.DataFrame(values, index=index, columns=list(values), copy=False)
+        self._tables = {}
+        self._rows = {}
+        return self.cls(**kwargs)
+
+    def __init__(self, cls=None, cardinal=None, categorical=None, capacity=1024, **kwargs):
+        self.cls = Container if cls is None else cls
+        self.cardinal = cardinal or self.cls._cardinal or 'frame'
+        self.categorical = set(categorical or [])
+        self.capacity = capacity
+        self.kwargs = kwargs
+        self._tables = {}
+        self._rows = {}
+
+
+def requires(*names, version=None):
+    """
+    Declare the data objects used by a compute method (see
+    :func:`~exa.core.container.Container.compute_all` and
+    :attr:`~exa.core.container.Container.result_cache`).
+
+    .. code-block:: Python
+
+        @requires('atom', 'frame', version=2)
+        def compute_bond(self):
+            ...
+
+    Args:
+        names: Names of the required data objects
+        version: Version of the compute method (default its source code) used
+            to invalidate cached results
+    """
+    def decorator(func):
+        func.requires = names
+        func.version = version
+        return func
+    return decorator
+
 
 class TypedMeta(type):
     """
@@ -561,10 +2704,13 @@ class TypedMeta(type):
             # convenience method with the signature, self.compute_name() and call
             # it prior to returning the property value.
             if not hasattr(self, pname) and hasattr(self, f'{self._getter_prefix}{pname}'):
-                self[f'{self._getter_prefix}{pname}']()
+                self._compute(name)
             if not hasattr(self, pname):
                 raise AttributeError(f'Please compute or set {name} first.')
-            return getattr(self, pname)
+            obj = getattr(self, pname)
+            if getattr(self, '_lru', None) is not None:
+                self._touch(pname)    # Least recently used data objects are spilled first
+            return obj
 
         def setter(self, obj):
             # This is the default property "setter" for container data objects.
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Dataset
+###################################
+Data objects of many saved containers (e.g. one per calculation), loaded in
+parallel and stacked into a single dataframe per type of data object. Rows
+are keyed by their container ("source", the first level of the index of
+every stacked data object), so that the data of all containers can be
+analyzed (and queried) with vectorized operations.
+
+.. code-block:: Python
+
+    ds = Dataset.load(glob('calcs/*.hdf5'), tables=['frame', 'atom'], workers=8)
+    ds.atom.groupby(level='source')['z'].max()
+    sub = ds.query('atom', 'z > 10')     # Propagates to related rows (by source)
+    ds.sources                           # Path and name of each source
+"""
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from .numerical import Field
+from .container import Container, _concat_values, _query
+
+
+def _read(cls, path, tables=None, columns=None):
+    """Read the data objects (and name) of a saved container."""
+    container = cls.load(path, tables=tables, columns=columns)
+    data = {}
+    for key, obj in container._data().items():
+        if not isinstance(obj, Field):    # Fields are not stacked
+            data[key[1:] if key.startswith('_') else key] = obj
+    return container.name, data
+
+
+def _stack(pieces, sources):
+    """
+    Stack a type of data object (from multiple containers), prepending the
+    "source" level to its index.
+    """
+    first = pieces[0]
+    lengths = [len(p) for p in pieces]
+    index = first.index.append([p.index for p in pieces[1:]])
+    levels = [index.get_level_values(i) for i in range(index.nlevels)]
+    index = pd.MultiIndex.from_arrays([np.repeat(sources, lengths)] + levels,
+                                      names=['source'] + list(first.index.names))
+    if isinstance(first, pd.Series):
+        return pd.Series(_concat_values([pd.Series(p) for p in pieces]), index=index,
+                         name=first.name)
+    columns = list(first.columns)
+    for obj in pieces[1:]:
+        columns += [col for col in obj.columns if col not in columns]
+    data = {}
+    for col in columns:
+        series = [obj[col] if col in obj.columns else pd.Series(np.nan, index=obj.index)
+                  for obj in pieces]
+        shared = getattr(first, '_shared_categories', False) and col in first._categories
+        data[col] = _concat_values(series, shared=shared)
+    return pd.DataFrame(data, index=index, columns=columns, copy=False)
+
+
+class Dataset(object):
+    """
+    Stacked data objects of many containers (see :mod:`~exa.core.dataset`).
+
+    Args:
+        data (dict): Stacked data objects by name
+        sources (:class:`~pandas.DataFrame`): Path and name of each source
+        cardinal (str): Name of the cardinal data object (see :func:`~exa.core.dataset.Dataset.query`)
+    """
+    @classmethod
+    def load(cls, paths, tables=None, columns=None, workers=None, processes=False,
+             container=Container):
+        """
+        Load (in parallel) and stack many saved containers.
+
+        Args:
+            paths (list): Paths of the saved containers (HDF5 files or directories)
+            tables (list): Names of the data objects to load (default all)
+            columns (dict): Names of the columns to load, by data object name
+            workers (int): Number of threads or processes (default determined by Python)
+            processes (bool): Load on a process pool (default false, thread pool)
+            container: Container class used to load (default :class:`~exa.core.container.Container`)
+
+        Returns:
+            dataset: Dataset of the stacked data objects
+
+        Note:
+            Threads suit (compressed) HDF5 files, whose decompression releases
+            the GIL; processes suit many small files, at the cost of pickling
+            data objects back to this process.
+        """
+        paths = list(paths)
+        read = partial(_read, container, tables=tables, columns=columns)
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool(workers) as executor:
+            results = list(executor.map(read, paths))
+        pieces = {}
+        for source, (_, data) in enumerate(results):
+            for name, obj in data.items():
+                pieces.setdefault(name, ([], []))
+                pieces[name][0].append(obj)
+                pieces[name][1].append(source)
+        data = {name: _stack(objs, np.array(sources, dtype=np.int64))
+                for name, (objs, sources) in pieces.items()}
+        sources = pd.DataFrame({'path': paths, 'name': [name for name, _ in results]})
+        sources.index.name = 'source'
+        return cls(data, sources, container._cardinal)
+
+    def query(self, table, expr, cardinal=False):
+        """
+        Select the rows of a data object matching a predicate, in all sources,
+        and the related rows of the other data objects (relationships hold
+        within each source; see :func:`~exa.core.container.Container.query`).
+
+        Args:
+            table (str): Name of the data object evaluating the predicate
+            expr (str): Boolean expression of the data object's columns
+            cardinal (bool): Select every row of the cardinal values (e.g. frames) matched (default false)
+
+        Returns:
+            dataset: Dataset of the selected rows
+        """
+        selected = _query(self._data, table, expr, self.cardinal if cardinal else None, 'source')
+        return type(self)(dict(self._data, **selected), self.sources, self.cardinal)
+
+    @property
+    def names(self):
+        """Names of the stacked data objects."""
+        return list(self._data)
+
+    def __getitem__(self, name):
+        return self._data[name]
+
+    def __getattr__(self, name):
+        data = self.__dict__.get('_data', {})
+        if name not in data:
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+        return data[name]
+
+    def __len__(self):
+        return len(self.sources)
+
+    def __repr__(self):
+        return '{}({} sources: {})'.format(type(self).__name__, len(self), ', '.join(self.names))
+
+    def __init__(self, data, sources, cardinal=None):
+        self._data = data
+        self.sources = sources
+        self.cardinal = cardinal
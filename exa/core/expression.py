@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Expressions
+###################################
+Deferred (lazy) expressions of the columns of a dataframe. An expression is
+a symbolic graph (see `sympy`_) that is only evaluated on request, compiled
+(once per expression) into a single fused, parallel kernel by
+:func:`~exa.util.nbvars.numbafy`, and evaluated chunk by chunk: a chain such
+as ``sqrt(x**2 + y**2 + z**2)`` allocates its result only, instead of one
+temporary column per operation.
+
+.. code-block:: Python
+
+    r = atom.expr('sqrt(x**2 + y**2 + z**2)')    # Nothing is computed yet
+    r2 = r**2 + atom.expr('w')                   # Expressions compose lazily
+    atom['r'] = r.evaluate()                     # Single pass over the data
+
+.. _sympy: http://docs.sympy.org/latest/index.html
+"""
+import operator
+import threading
+from functools import reduce
+import numpy as np
+import pandas as pd
+import sympy as sy
+
+
+_kernels = {}    # Compiled kernels by expression and arguments
+_lock = threading.Lock()
+_maximum = sy.Function('maximum')    # Element-wise numpy functions (see _elementwise)
+_minimum = sy.Function('minimum')
+
+
+def _elementwise(expr):
+    """Rewrite the reductions Max and Min as nested element-wise numpy maximum and minimum."""
+    expr = expr.replace(sy.Max, lambda *args: reduce(_maximum, args))
+    return expr.replace(sy.Min, lambda *args: reduce(_minimum, args))
+
+
+def _kernel(expr, args):
+    """Compile (or get the compiled) fused kernel of an expression (double precision)."""
+    key = (sy.srepr(expr), tuple(arg.name for arg in args))
+    with _lock:
+        if key not in _kernels:
+            from numba.core.errors import NumbaError    # Numba is only imported when compiling
+            from exa.util.nbvars import numbafy
+            signature = 'float64({})'.format(', '.join(['float64']*len(args)))
+            try:
+                _kernels[key] = numbafy(_elementwise(expr), args, compiler='vectorize',
+                                        signatures=[signature])
+            except (NumbaError, TypeError, ValueError) as e:
+                raise ValueError('Expression {} cannot be compiled; supported are arithmetic, '
+                                 'powers, Max, Min, and element-wise numpy functions (e.g. sqrt, '
+                                 'exp, log, sin, atan2, Abs, sign, floor).'.format(expr)) from e
+        return _kernels[key]
+
+
+class Expression(object):
+    """
+    Deferred expression of the columns of a dataframe (see :mod:`~exa.core.expression`).
+
+    Args:
+        frame (:class:`~pandas.DataFrame`): Dataframe whose columns are the expression's variables
+        expr (str): Expression (or sympy expression) of the columns
+    """
+    chunksize = 2**20    # Rows evaluated per call of the kernel
+
+    @property
+    def columns(self):
+        """Names of the columns the expression depends on (sorted)."""
+        return sorted(symbol.name for symbol in self.expr.free_symbols)
+
+    def evaluate(self, chunksize=None, out=None):
+        """
+        Evaluate the expression.
+
+        Args:
+            chunksize (int): Number of rows evaluated at once (default :attr:`~exa.core.expression.Expression.chunksize`)
+            out (array): Preallocated output array (double precision, one value per row)
+
+        Returns:
+            series (:class:`~pandas.Series`): Values of the expression
+
+        Raises:
+            ValueError: If **out** does not match, or the expression cannot be compiled
+
+        Note:
+            Columns are evaluated in double precision; only columns of another
+            type are converted, a chunk at a time. Expressions are compiled
+            from arithmetic, powers, Max and Min, and sympy functions with an
+            element-wise numpy equivalent (e.g. sqrt, exp, log, sin, Abs);
+            conditionals (e.g. Piecewise) are not supported.
+        """
+        chunksize = chunksize or self.chunksize
+        n = len(self.frame)
+        if out is None:
+            out = np.empty(n, dtype=np.float64)
+        elif out.shape != (n, ) or out.dtype != np.float64:
+            raise ValueError('Output array of shape {} and type {} given, ({}, ) and float64 '
+                             'expected.'.format(out.shape, out.dtype, n))
+        if not self.expr.free_symbols:    # Constant
+            out[:] = float(self.expr)
+        else:
+            columns = self.columns
+            args = [sy.Symbol(name) for name in columns]
+            kernel = _kernel(self.expr, args)
+            values = [np.asarray(self.frame[name].values) for name in columns]
+            for start in range(0, n, chunksize):
+                stop = min(start + chunksize, n)
+                chunk = [np.ascontiguousarray(v[start:stop], dtype=np.float64) for v in values]
+                kernel(*chunk, out=out[start:stop])
+        return pd.Series(out, index=self.frame.index, name=str(self.expr), copy=False)
+
+    def _combine(self, other, op, reverse=False):
+        """Build the expression of a binary operation (on expressions of the same dataframe)."""
+        if isinstance(other, Expression):
+            if other.frame is not self.frame:
+                raise ValueError('Expressions of different dataframes cannot be combined.')
+            other = other.expr
+        elif not np.isscalar(other):
+            return NotImplemented
+        expr = op(other, self.expr) if reverse else op(self.expr, other)
+        return type(self)(self.frame, expr)
+
+    def __add__(self, other):
+        return self._combine(other, operator.add)
+
+    def __radd__(self, other):
+        return self._combine(other, operator.add, True)
+
+    def __sub__(self, other):
+        return self._combine(other, operator.sub)
+
+    def __rsub__(self, other):
+        return self._combine(other, operator.sub, True)
+
+    def __mul__(self, other):
+        return self._combine(other, operator.mul)
+
+    def __rmul__(self, other):
+        return self._combine(other, operator.mul, True)
+
+    def __truediv__(self, other):
+        return self._combine(other, operator.truediv)
+
+    def __rtruediv__(self, other):
+        return self._combine(other, operator.truediv, True)
+
+    def __pow__(self, other):
+        return self._combine(other, operator.pow)
+
+    def __rpow__(self, other):
+        return self._combine(other, operator.pow, True)
+
+    def __neg__(self):
+        return type(self)(self.frame, -self.expr)
+
+    def __array__(self, dtype=None):
+        return np.asarray(self.evaluate().values, dtype=dtype)
+
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, self.expr)
+
+    def __init__(self, frame, expr):
+        names = {col: sy.Symbol(col) for col in frame.columns if isinstance(col, str)}
+        if isinstance(expr, str):
+            expr = sy.sympify(expr, locals=names)    # Column names take precedence (e.g. "E", "S")
+        missing = {symbol.name for symbol in expr.free_symbols}.difference(names)
+        if missing:
+            raise KeyError('Missing columns {}.'.format(sorted(missing)))
+        self.frame = frame
+        self.expr = expr
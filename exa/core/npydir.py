@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Memory-Mapped Directory Format
+###################################
+Columnar storage of a :class:`~exa.core.container.Container` as a directory
+of NumPy (.npy) files, one per column (categorical and object columns are
+stored as codes and categories), with a JSON manifest describing the
+container's metadata and the layout of its data objects.
+
+.. code-block:: text
+
+    container.npydir/
+        manifest.json
+        atom/index.npy
+        atom/0.npy                  # Numeric column
+        atom/1.codes.npy            # Categorical (or object) column
+        atom/1.categories.npy
+
+Because .npy files are not compressed, columns can be opened as read-only
+memory maps: loading is (nearly) instant regardless of size, only pages that
+are touched are read, and processes opening the same files share memory.
+
+See Also:
+    :func:`~exa.core.container.Container.save` and
+    :func:`~exa.core.container.Container.load`
+"""
+import os
+import json
+import shutil
+from uuid import uuid4
+from importlib import import_module
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from pandas.core.dtypes.dtypes import CategoricalDtype
+from .numerical import Field
+
+
+manifest = 'manifest.json'
+extension = '.npydir'
+
+
+def is_npydir(path):
+    """Check if the path is a container saved in the directory format."""
+    return os.path.isfile(os.path.join(path, manifest))
+
+
+def _json(obj):
+    """Convert NumPy objects (e.g. in metadata) for the JSON manifest."""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    elif isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError('Object of type {} is not JSON serializable.'.format(type(obj).__name__))
+
+
+def _encode(obj):
+    """
+    Encode metadata for the JSON manifest, keeping the types that JSON lacks
+    (tuples, and dictionaries with keys other than strings) so that they are
+    read back as saved, as with HDF5 (see _decode).
+    """
+    if isinstance(obj, tuple):
+        return {'__tuple__': [_encode(v) for v in obj]}
+    elif isinstance(obj, dict):
+        if all(isinstance(k, str) for k in obj) and '__tuple__' not in obj and '__items__' not in obj:
+            return {k: _encode(v) for k, v in obj.items()}
+        return {'__items__': [[_encode(k), _encode(v)] for k, v in obj.items()]}
+    elif isinstance(obj, list):
+        return [_encode(v) for v in obj]
+    return obj
+
+
+def _decode(obj):
+    """Decode metadata encoded by _encode."""
+    if isinstance(obj, dict):
+        if list(obj) == ['__tuple__']:
+            return tuple(_decode(v) for v in obj['__tuple__'])
+        elif list(obj) == ['__items__']:
+            return {_decode(k): _decode(v) for k, v in obj['__items__']}
+        return {k: _decode(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [_decode(v) for v in obj]
+    return obj
+
+
+def _label(label):
+    """JSON converts tuples (e.g. column names) to lists; convert them back."""
+    return tuple(_label(v) for v in label) if isinstance(label, list) else label
+
+
+def _class(desc, base):
+    """
+    Get the class of a data object written by
+    :func:`~exa.core.npydir.write_object` (**base** if it is not recorded,
+    cannot be imported, or is not a subclass of base).
+    """
+    if 'class' not in desc:
+        return base
+    module, qualname = desc['class']
+    try:
+        cls = import_module(module)
+        for name in qualname.split('.'):
+            cls = getattr(cls, name)
+    except (ImportError, AttributeError):
+        return base
+    return cls if isinstance(cls, type) and issubclass(cls, base) else base
+
+
+def _write_values(values, root, base):
+    """Write the values of a series or index, returning their description."""
+    if isinstance(values.dtype, CategoricalDtype):
+        cat = pd.Categorical(values)
+        desc = {'kind': 'category', 'ordered': bool(cat.ordered)}
+    elif isinstance(values.dtype, np.dtype) and values.dtype.kind in 'biufcmM':
+        np.save(os.path.join(root, base + '.npy'), np.ascontiguousarray(values.values))
+        return {'kind': 'array', 'file': base + '.npy'}
+    else:    # Objects (e.g. strings) are encoded as codes and unique values
+        cat = pd.Categorical(np.asarray(values))
+        desc = {'kind': 'object'}
+    np.save(os.path.join(root, base + '.codes.npy'), cat.codes)
+    np.save(os.path.join(root, base + '.categories.npy'), cat.categories.values,
+            allow_pickle=True)
+    desc['file'] = base
+    return desc
+
+
+def _read_values(desc, root, mmap):
+    """Read (or memory map) values written by _write_values."""
+    mode = 'r' if mmap else None
+    path = os.path.join(root, desc['file'])
+    if desc['kind'] == 'array':
+        return np.load(path, mmap_mode=mode)
+    codes = np.load(path + '.codes.npy', mmap_mode=mode)
+    categories = np.load(path + '.categories.npy', allow_pickle=True)
+    cat = pd.Categorical.from_codes(codes, categories=categories,
+                                    ordered=desc.get('ordered', False))
+    return cat if desc['kind'] == 'category' else np.asarray(cat, dtype=object)
+
+
+def _write_index(index, root, base):
+    """Write an index, returning its description."""
+    if isinstance(index, pd.RangeIndex):
+        return {'kind': 'range', 'range': [index.start, index.stop, index.step],
+                'name': index.name}
+    elif isinstance(index, pd.MultiIndex):
+        levels = [_write_values(index.get_level_values(i), root, '{}{}'.format(base, i))
+                  for i in range(index.nlevels)]
+        return {'kind': 'multi', 'levels': levels, 'names': list(index.names)}
+    desc = _write_values(index, root, base)
+    desc['name'] = index.name
+    return desc
+
+
+def _read_index(desc, root, mmap):
+    """Read an index written by _write_index."""
+    if desc['kind'] == 'range':
+        return pd.RangeIndex(*desc['range'], name=_label(desc['name']))
+    elif desc['kind'] == 'multi':
+        return pd.MultiIndex.from_arrays([_read_values(d, root, mmap) for d in desc['levels']],
+                                         names=[_label(n) for n in desc['names']])
+    return pd.Index(_read_values(desc, root, mmap), name=_label(desc['name']), copy=False)
+
+
+def write_object(obj, root, base):
+    """
+    Write a data object (series, dataframe, or field) to the directory
+    root/base, returning its description (see
+    :func:`~exa.core.npydir.read_object`).
+    """
+    os.makedirs(os.path.join(root, base))
+    desc = {'index': _write_index(obj.index, root, base + '/index'),
+            'class': [type(obj).__module__, type(obj).__qualname__]}
+    if isinstance(obj, pd.Series):
+        desc['kind'] = 'series'
+        desc['name'] = obj.name
+        desc['values'] = _write_values(obj, root, base + '/values')
+        return desc
+    desc['kind'] = 'frame'
+    desc['columns'] = [[col, _write_values(obj.iloc[:, i], root, '{}/{}'.format(base, i))]
+                       for i, col in enumerate(obj.columns)]
+    if isinstance(obj, Field):
+        desc['kind'] = 'field'
+        desc['field_values'] = [write_object(v, root, '{}/values{}'.format(base, i))
+                                for i, v in enumerate(obj.field_values)]
+    return desc
+
+
+def read_object(root, desc, columns=None, mmap=True):
+    """
+    Read a data object written by :func:`~exa.core.npydir.write_object`
+    (memory mapped, i.e. without reading data, if **mmap**) as an instance of
+    the class it was written from (if importable and all columns are read).
+    """
+    index = _read_index(desc['index'], root, mmap)
+    if desc['kind'] == 'series':
+        obj = pd.Series(_read_values(desc['values'], root, mmap), index=index,
+                        name=_label(desc['name']), copy=False)
+        cls = _class(desc, pd.Series)
+        return obj if cls is pd.Series else cls(obj)
+    cols = [(_label(col), d) for col, d in desc['columns']
+            if columns is None or _label(col) in columns]
+    # Unconsolidated (one block per column) so that memory maps are kept
+    df = pd.DataFrame({col: _read_values(d, root, mmap) for col, d in cols}, index=index,
+                      columns=[col for col, _ in cols], copy=False)
+    if desc['kind'] == 'field':
+        values = [read_object(root, d, None, mmap) for d in desc['field_values']]
+        return _class(desc, Field)(df, field_values=values)
+    cls = _class(desc, pd.DataFrame) if columns is None else pd.DataFrame    # May lack required columns
+    return df if cls is pd.DataFrame else cls(df)
+
+
+def write(container, path, threads=None, zones=False):
+    """
+    Write a container in the directory format.
+
+    The directory is written next to the target and then moved into place,
+    so that processes that have memory mapped a previous version of the
+    container are unaffected. Data objects are written in parallel.
+
+    Metadata (see :func:`~exa.core.container.Container._rel`) is stored as
+    JSON; tuples and dictionaries with keys other than strings are encoded
+    so that they are read back as saved, other objects that JSON does not
+    support (besides NumPy scalars and arrays) raise a TypeError.
+
+    Args:
+        container: Container to save
+        path (str): Directory path
+        threads (int): Number of writing threads (default determined by Python)
+        zones (bool): Also write the zone map of each dataframe (see
+            :func:`~exa.core.container.Container.zone_map`)
+
+    Returns:
+        path (str): Directory path
+
+    Note:
+        Replacing an existing directory is not atomic: the existing directory
+        is renamed aside before the new one is moved into place, so that for
+        a moment the path does not exist. On Windows, the existing directory
+        cannot be replaced while another process has its files memory mapped.
+    """
+    path = path.rstrip(os.sep)
+    rel = _encode(container._rel())
+    json.dumps(rel, default=_json)    # Unsupported metadata raises before writing
+    tmp = path + '.' + uuid4().hex
+    os.makedirs(tmp)
+    layout = {'rel': rel, 'tables': {}, 'shapes': {}, 'zones': {}}
+    with ThreadPoolExecutor(threads) as pool:
+        futures = {}
+        zone_futures = {}
+        for key, obj in container._data().items():
+            name = key[1:] if key.startswith('_') else key
+            futures[name] = pool.submit(write_object, obj, tmp, name)
+            layout['shapes'][name] = list(obj.shape)
+            if zones and isinstance(obj, pd.DataFrame) and not isinstance(obj, Field):
+                zone_futures[name] = pool.submit(write_object, container.zone_map(name), tmp,
+                                                 '.zones/' + name)
+    for name, future in futures.items():
+        layout['tables'][name] = future.result()
+    for name, future in zone_futures.items():
+        layout['zones'][name] = future.result()
+    layout['fingerprint'] = container._hashes()
+    with open(os.path.join(tmp, manifest), 'w') as f:
+        json.dump(layout, f, default=_json)
+    try:
+        if os.path.isdir(path):
+            old = tmp + '.old'
+            os.rename(path, old)
+            try:
+                os.rename(tmp, path)
+            except OSError:
+                os.rename(old, path)
+                raise
+            shutil.rmtree(old, ignore_errors=True)
+        else:
+            os.rename(tmp, path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return path
+
+
+def stats(path):
+    """
+    Stored bytes of each data object of a container saved in the directory
+    format (data is not compressed, i.e. raw and stored sizes are equal).
+
+    Returns:
+        stats (dict): Codec (None), raw, and stored bytes by data object name
+    """
+    sizes = {}
+    with open(os.path.join(path, manifest)) as f:
+        names = list(json.load(f)['tables'])
+    for name in names:
+        stored = sum(os.path.getsize(os.path.join(root, fname))
+                     for root, _, fnames in os.walk(os.path.join(path, name)) for fname in fnames)
+        sizes[name] = (None, stored, stored)
+    return sizes
+
+
+def hashes(path):
+    """
+    Column hashes of each data object of a container saved in the directory
+    format (see :func:`~exa.core.container.Container.fingerprint`).
+    """
+    with open(os.path.join(path, manifest)) as f:
+        stored = json.load(f).get('fingerprint')
+    if stored is None:
+        return None
+    return {name: [(_label(label), digest) for label, digest in pairs]
+            for name, pairs in stored.items()}
+
+
+def zones(path):
+    """
+    Read the zone maps of a container saved in the directory format (see
+    :func:`~exa.core.container.Container.zone_map`).
+    """
+    with open(os.path.join(path, manifest)) as f:
+        descs = json.load(f).get('zones', {})
+    zones = {}
+    for name, desc in descs.items():
+        zm = read_object(path, desc, mmap=False)
+        zm.columns = pd.MultiIndex.from_tuples(zm.columns, names=['stat', 'column'])
+        zones[name] = zm
+    return zones
+
+
+def read(path, tables=None, columns=None, mmap=True):
+    """
+    Read the manifest of a container saved in the directory format.
+
+    Args:
+        path (str): Directory path
+        tables (list): Names of the data objects to read (default all)
+        columns (dict): Names of the columns to read, by data object name
+        mmap (bool): Memory map columns (default true) instead of reading them
+
+    Returns:
+        rel (dict): Descriptive kwargs of the container (name, meta, etc.)
+        readers (dict): Callables returning each data object
+    """
+    columns = {} if columns is None else columns
+    with open(os.path.join(path, manifest)) as f:
+        layout = json.load(f)
+    readers = {}
+    for name, desc in layout['tables'].items():
+        if tables is None or name in tables:
+            readers[name] = partial(read_object, path, desc, columns.get(name), mmap)
+    return _decode(layout['rel']), readers
@@ -14,9 +14,164 @@ module may be extended.
 """
 import logging
 import warnings
+import weakref
 import numpy as np
 import pandas as pd
 from exa.core.error import RequiredColumnError
+from exa.core.categories import registry
+
+
+class _Shared(object):
+    """
+    Data objects sharing (copy-on-write) buffers. Objects are weakly referenced
+    so that garbage collected objects no longer count as sharing. Shared
+    buffers are read-only (**frozen**) until the last object sharing them
+    modifies them, or until all other objects sharing them are garbage
+    collected.
+    """
+    def add(self, obj):
+        self.refs[id(obj)] = weakref.ref(obj)
+        weakref.finalize(obj, self.collect).atexit = False
+
+    def discard(self, obj):
+        self.refs.pop(id(obj), None)
+
+    def freeze(self, obj):
+        """Make the (writeable) buffers of a data object read-only."""
+        for values in _arrays(obj):
+            if values.flags.writeable:
+                values.flags.writeable = False
+                self.frozen.append(values)
+
+    def thaw(self):
+        """Make the buffers frozen by :func:`~exa.core.numerical._Shared.freeze` writeable again."""
+        for values in self.frozen:
+            values.flags.writeable = True
+        self.frozen = []
+
+    def collect(self):
+        """
+        Release the buffers once at most one object still shares them (called
+        when an object sharing them is garbage collected).
+        """
+        objs = [ref() for ref in self.refs.values()]
+        objs = [obj for obj in objs if obj is not None]
+        if len(objs) <= 1:
+            for obj in objs:
+                obj._cow = None
+                _clear_cache(obj)    # Cached columns are read-only views
+            self.refs = {}
+            self.thaw()
+
+    def __len__(self):
+        return sum(ref() is not None for ref in self.refs.values())
+
+    def __init__(self):
+        self.refs = {}
+        self.frozen = []
+
+
+def _columns(obj):
+    """Values (NumPy or extension arrays) of the columns of a DataFrame, in order."""
+    mgr = getattr(obj, '_mgr', None)
+    if hasattr(mgr, 'iget_values'):
+        return [mgr.iget_values(i) for i in range(obj.shape[1])]
+    return [obj.iloc[:, i].values for i in range(obj.shape[1])]
+
+
+def _arrays(obj):
+    """
+    NumPy arrays holding the values of the columns of a data object (the
+    arrays of the blocks, if the block manager is available).
+    """
+    mgr = getattr(obj, '_mgr', None)
+    if hasattr(mgr, 'arrays'):
+        arrays = mgr.arrays
+    elif isinstance(obj, pd.Series):
+        arrays = [obj.array]
+    else:
+        arrays = _columns(obj)
+    for values in arrays:
+        values = getattr(values, '_ndarray', values)    # Categorical codes, datetimes, etc.
+        if isinstance(values, np.ndarray):
+            yield values
+
+
+def _clear_cache(obj):
+    """Drop the cached columns of a data object (pandas versions that cache them)."""
+    clear = getattr(obj, '_clear_item_cache', None)
+    if clear is not None:
+        clear()
+
+
+class _Indexer(object):
+    """
+    Indexer (e.g. ``.loc``) of an object sharing copy-on-write buffers that
+    detaches the buffers prior to setting values; everything else is
+    delegated to the pandas indexer.
+    """
+    def __getitem__(self, key):
+        return self.indexer[key]
+
+    def __setitem__(self, key, value):
+        self.obj._detach()
+        self.indexer[key] = value
+
+    def __call__(self, *args, **kwargs):
+        return type(self)(self.obj, self.indexer(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self.indexer, name)
+
+    def __init__(self, obj, indexer):
+        self.obj = obj
+        self.indexer = indexer
+
+
+def _cow_indexer(name):
+    """
+    Create an indexer property (e.g. ``.loc``); objects sharing copy-on-write
+    buffers get an indexer that detaches them prior to setting values, all
+    other objects get the pandas indexer.
+    """
+    def indexer(self):
+        obj = getattr(super(Numerical, self), name)
+        return obj if self._cow is None else _Indexer(self, obj)
+
+    indexer.__name__ = name
+    return property(indexer)
+
+
+def _cow_inplace(name):
+    """
+    Create a method that detaches copy-on-write buffers prior to calling the
+    pandas method of the same name in place (i.e. writing into the buffers).
+    """
+    def method(self, *args, **kwargs):
+        if self._cow is not None and (kwargs.get('inplace', False) or name == 'update'):
+            self._detach()
+        return getattr(super(Numerical, self), name)(*args, **kwargs)
+
+    method.__name__ = name
+    method.__doc__ = "See pandas' {}; detaches copy-on-write buffers if in place.".format(name)
+    return method
+
+
+def _cow_operator(name):
+    """
+    Create an in-place operator (e.g. ``+=``) that detaches copy-on-write
+    buffers prior to calling the pandas operator.
+    Objects with read-only buffers (e.g. columns of a shared dataframe) are
+    not modified; the result is a new object (i.e. ``a = a + b``).
+    """
+    def method(self, other):
+        self._detach()
+        if not all(values.flags.writeable for values in _arrays(self)):
+            return getattr(self, name.replace('__i', '__', 1))(other)
+        return getattr(super(Numerical, self), name)(other)
+
+    method.__name__ = name
+    return method
 
 
 class Numerical(object):
@@ -25,12 +180,57 @@ class Numerical(object):
     :class:`~exa.core.numerical.DataFrame`, and :class:`~exa.numerical.Field`
     objects, providing default trait functionality and clean representations
     when present as part of containers.
+
+    Data objects may share their buffers with copies (see
+    :func:`~exa.core.numerical.Numerical._share`); in that case the buffers are
+    copied (once) when the object is modified in place via indexers
+    (``.loc``, ``.iloc``, ``.at``, ``.iat``), item assignment, in-place
+    operators (``+=``, etc.), or methods called with ``inplace=True``. Shared
+    buffers are read-only while shared, so that writing into them by other
+    means (e.g. into ``.values``, or by chained assignment) raises an error
+    instead of modifying every object sharing them; they become writeable
+    again once all copies are garbage collected.
     """
+    _cow = None       # Copy-on-write buffer sharing (see _share)
+
     @property
     def log(self):
         name = '.'.join([self.__module__, self.__class__.__name__])
         return logging.getLogger(name)
 
+    def _share(self):
+        """
+        Create a shallow copy whose buffers are shared with this object until
+        either object is modified in place (copy-on-write).
+
+        Returns:
+            obj: Copy of self sharing the underlying data
+        """
+        obj = self.copy(deep=False)
+        if self._cow is None:
+            self._cow = _Shared()
+            self._cow.add(self)
+            self._cow.freeze(self)
+        self._cow.add(obj)
+        obj._cow = self._cow
+        return obj
+
+    def _detach(self):
+        """
+        Copy shared (copy-on-write) buffers, if any other object still shares
+        them, prior to in-place modification.
+        """
+        shared = self._cow
+        if shared is not None:
+            shared.discard(self)
+            self._cow = None
+            if len(shared) > 0:
+                self._mgr = self._mgr.copy(deep=True)
+                _clear_cache(self)
+            else:    # Last object sharing the buffers
+                shared.thaw()
+                _clear_cache(self)
+
     def slice_naive(self, key):
         """
         Slice a data object based on its index, either by value (.loc) or
@@ -54,6 +254,15 @@ class Numerical(object):
         return self.__repr__()
 
 
+for _name in ('loc', 'iloc', 'at', 'iat'):
+    setattr(Numerical, _name, _cow_indexer(_name))
+for _name in ('fillna', 'replace', 'where', 'mask', 'clip', 'interpolate', 'update'):
+    setattr(Numerical, _name, _cow_inplace(_name))
+for _name in ('__iadd__', '__isub__', '__imul__', '__itruediv__', '__ifloordiv__', '__imod__',
+              '__ipow__', '__iand__', '__ior__', '__ixor__'):
+    setattr(Numerical, _name, _cow_operator(_name))
+
+
 class BaseSeries(Numerical):
     """
     Base class for dense and sparse series objects (labeled arrays).
@@ -85,6 +294,10 @@ class BaseSeries(Numerical):
                 self.index.name = self._iname
         self.meta = meta
 
+    def __setitem__(self, key, value):
+        self._detach()    # Series item assignment is always in place
+        super(BaseSeries, self).__setitem__(key, value)
+
 
 class BaseDataFrame(Numerical):
     """
@@ -99,12 +312,14 @@ class BaseDataFrame(Numerical):
         _index (str): Name of index (may be used as foreign key in another table)
         _columns (list): Required columns
         _categories (dict): Dict of column names, raw types that if present will be converted to and from categoricals automatically
+        _shared_categories (bool): Encode the _categories columns with the process-wide dictionaries (see :mod:`~exa.core.categories`)
     """
     _metadata = ['name', 'meta']
     _cardinal = None     # Tuple of column name and raw type that acts as foreign key to index of another table
     _index = None      # Name of index (may be used as foreign key in another table)
     _columns = []      # Required columns
     _categories = {}   # Dict of column names, raw types that if present will be converted to and from categoricals automatically
+    _shared_categories = False    # Opt in to the process-wide categorical dictionaries
 
     def cardinal_groupby(self):
         """
@@ -128,6 +343,12 @@ class BaseDataFrame(Numerical):
         key = check_key(self, key, cardinal=True)
         return cls(self[self[self._cardinal[0]].isin(key)])
 
+    def __setitem__(self, key, value):
+        # Column assignment replaces the column; masks set values in place
+        if isinstance(key, (pd.DataFrame, np.ndarray)):
+            self._detach()
+        super(BaseDataFrame, self).__setitem__(key, value)
+
     def __init__(self, *args, **kwargs):
         meta = kwargs.pop('meta', None)
         super(BaseDataFrame, self).__init__(*args, **kwargs)
@@ -193,6 +414,24 @@ class DataFrame(BaseDataFrame, pd.DataFrame):
         cls = self.__class__    # Note that type conversion does not perform copy
         return cls(pd.DataFrame(self).copy(*args, **kwargs))
 
+    def expr(self, expression):
+        """
+        Deferred expression of the columns of this object, evaluated by a
+        single fused kernel (see :mod:`~exa.core.expression`).
+
+        .. code-block:: Python
+
+            r = atom.expr('sqrt(x**2 + y**2 + z**2)').evaluate()
+
+        Args:
+            expression (str): Expression of the columns (sympy syntax)
+
+        Returns:
+            expr (:class:`~exa.core.expression.Expression`): Unevaluated expression
+        """
+        from .expression import Expression    # Sympy is only imported when needed
+        return Expression(self, expression)
+
     def _revert_categories(self):
         """
         Inplace conversion to categories.
@@ -203,11 +442,15 @@ class DataFrame(BaseDataFrame, pd.DataFrame):
 
     def _set_categories(self):
         """
-        Inplace conversion from categories.
+        Inplace conversion from categories, encoded with the shared dictionary
+        of the column if the class opts in (see _shared_categories).
         """
         for column, _ in self._categories.items():
             if column in self.columns:
-                self[column] = self[column].astype('category')
+                if self._shared_categories:
+                    self[column] = registry.categorize(column, self[column])
+                else:
+                    self[column] = self[column].astype('category')
 
     def __init__(self, *args, **kwargs):
         super(DataFrame, self).__init__(*args, **kwargs)
@@ -263,17 +506,25 @@ class Field(DataFrame):
         """
         cls = self.__class__    # Note that type conversion does not perform copy
         data = pd.DataFrame(self).copy(*args, **kwargs)
-        values = [field.copy() for field in self.field_values]
+        values = [field.copy(*args, **kwargs) for field in self.field_values]
         return cls(data, field_values=values)
 
-    def memory_usage(self):
+    def _share(self):
+        """
+        Create a shallow (copy-on-write) copy sharing field data and values.
+        """
+        obj = super(Field, self)._share()
+        obj.field_values = [field._share() for field in self.field_values]
+        return obj
+
+    def memory_usage(self, index=True, deep=False):
         """
         Get the combined memory usage of the field data and field values.
         """
-        data = super(Field, self).memory_usage()
+        data = super(Field, self).memory_usage(index=index, deep=deep)
         values = 0
         for value in self.field_values:
-            values += value.memory_usage()
+            values += np.sum(value.memory_usage(index=index, deep=deep))
         data['field_values'] = values
         return data
 
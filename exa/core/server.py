@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Container Server
+###################################
+A local, read-only server holding containers open once (memory mapped, for
+containers saved in the "npydir" format) for any number of concurrent
+clients (e.g. dashboards and notebooks on the same node), over a Unix socket
+(or a localhost TCP port).
+
+.. code-block:: Python
+
+    # Server process
+    server = ContainerServer('/tmp/exa.sock', {'md': 'traj.npydir'})
+    server.serve_forever()
+
+    # Clients
+    client = ContainerClient('/tmp/exa.sock')
+    md = client['md']
+    sub = md[100:200]                          # Frames 100-199, as a container
+    atom = md.atom                             # A single data object
+    hot = md.query('atom', 'z > 10', cardinal=True)
+
+Data objects are sent as a (pickled) description followed by their raw
+arrays, laid out as for shared memory (see :mod:`~exa.core.shared`); clients
+receive the arrays into a single buffer and build the data objects as
+(read-only) views of it, without copying.
+
+Warning:
+    Descriptions are pickled: only connect to servers you trust (requests
+    sent to the server are JSON). Query expressions sent by clients are
+    evaluated by the server, so TCP servers only bind loopback addresses
+    unless explicitly allowed to accept remote clients (see
+    :class:`~exa.core.server.ContainerServer`).
+"""
+import os
+import json
+import ipaddress
+import pickle
+import struct
+import socket
+import socketserver
+import threading
+import numpy as np
+from .container import Container, _filter
+from .shared import _Layout, _describe, _rebuild
+
+
+_size = struct.Struct('!Q')    # Length prefix of messages
+
+
+def _recv_exactly(sock, n):
+    """Receive exactly n bytes (into a writable buffer)."""
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if k == 0:
+            raise ConnectionError('Connection closed.')
+        got += k
+    return buf
+
+
+def _send_message(sock, header, arrays=()):
+    """Send a header and the arrays of a layout (see :class:`~exa.core.shared._Layout`)."""
+    nbytes = 0
+    for offset, values in arrays:
+        nbytes = offset + values.nbytes
+    sock.sendall(_size.pack(len(header)) + header + _size.pack(nbytes))
+    position = 0
+    for offset, values in arrays:
+        if offset > position:
+            sock.sendall(bytes(offset - position))
+        sock.sendall(memoryview(values.reshape(-1).view(np.uint8)))
+        position = offset + values.nbytes
+
+
+def _recv_message(sock):
+    """Receive a header and its payload."""
+    header = _recv_exactly(sock, _size.unpack(_recv_exactly(sock, _size.size))[0])
+    payload = _recv_exactly(sock, _size.unpack(_recv_exactly(sock, _size.size))[0])
+    return bytes(header), payload
+
+
+def _json_frames(frames):
+    """Encode a selection of frames (see :func:`~exa.core.container._frames`) for a request."""
+    if frames is None:
+        return None
+    if isinstance(frames, range) and frames.step == 1:
+        frames = slice(frames.start, frames.stop)
+    if isinstance(frames, slice):
+        return {'start': frames.start, 'stop': frames.stop}
+    return np.atleast_1d(np.asarray(frames)).tolist()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    """Answer the requests of a connection (see :class:`~exa.core.server.ContainerServer`)."""
+    def handle(self):
+        while True:
+            try:
+                header, _ = _recv_message(self.request)
+            except ConnectionError:
+                return
+            try:
+                specs, arrays = self.server.answer(json.loads(header.decode()))
+            except Exception as e:
+                specs, arrays = {'error': '{}: {}'.format(type(e).__name__, e)}, []
+            _send_message(self.request, pickle.dumps(specs, protocol=pickle.HIGHEST_PROTOCOL), arrays)
+
+
+def _is_loopback(host):
+    """Check if a TCP host (name or address) resolves to a loopback address."""
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback if host else False
+    except (OSError, ValueError):
+        return False
+
+
+class ContainerServer(socketserver.ThreadingMixIn, socketserver.BaseServer):
+    """
+    Read-only server of containers (see :mod:`~exa.core.server`); each
+    connection is served by its own thread.
+
+    Args:
+        address: Unix socket path, or (host, port) tuple for TCP
+        containers (dict): Containers (or paths of saved containers) by name
+        container: Container class used to load paths (default :class:`~exa.core.container.Container`)
+        allow_remote (bool): Allow binding a TCP host other than a loopback address (default false)
+
+    Raises:
+        ValueError: If the TCP host is not a loopback address and remote clients are not allowed
+
+    Warning:
+        Responses are pickled and query expressions are evaluated by the
+        server: with **allow_remote**, anyone who can reach the port can read
+        the containers and run code on the server (and clients trusting it).
+        Only allow remote clients on trusted networks.
+    """
+    daemon_threads = True
+
+    def answer(self, request):
+        """
+        Answer a request.
+
+        Returns:
+            specs (dict): Response (descriptions of data objects, etc.)
+            arrays (list): Offsets and arrays of the payload
+
+        Raises:
+            ValueError: If frames are requested from a container without cardinal data object
+        """
+        op = request.get('op')
+        if op == 'list':
+            return {name: c._rel() for name, c in self.containers.items()}, []
+        container = self.containers[request['container']]
+        if op == 'info':
+            return {'rel': container._rel(), 'cardinal': container._cardinal,
+                    'tables': {(k[1:] if k.startswith('_') else k): list(obj.shape)
+                               for k, obj in container._data().items()}}, []
+        elif op != 'get':
+            raise ValueError('Unknown request {}.'.format(op))
+        frames = request.get('frames')
+        if isinstance(frames, dict):
+            frames = slice(frames['start'], frames['stop'])
+        if frames is not None and container._cardinal is None:
+            raise ValueError('Selecting frames requires a cardinal data object.')
+        if request.get('query') is not None:
+            table, expr, cardinal = request['query']
+            container = container.query(table, expr, cardinal)
+        tables = request.get('tables')
+        columns = request.get('columns') or {}
+        layout = _Layout()
+        specs = {'rel': container._rel(), 'tables': {}}
+        for key, obj in container._data().items():
+            name = key[1:] if key.startswith('_') else key
+            if tables is not None and name not in tables:
+                continue
+            obj = _filter(obj, name, columns.get(name), frames, container._cardinal)
+            specs['tables'][name] = _describe(obj, layout)
+        return specs, layout.arrays
+
+    def fileno(self):
+        return self.socket.fileno()
+
+    def get_request(self):
+        return self.socket.accept()
+
+    def server_close(self):
+        self.socket.close()
+        if isinstance(self.server_address, str) and os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.server_close()
+
+    def __init__(self, address, containers, container=Container, allow_remote=False):
+        if not isinstance(address, str) and not allow_remote and not _is_loopback(address[0]):
+            raise ValueError('Refusing to serve containers on non-loopback host {!r} '
+                             '(see allow_remote).'.format(address[0]))
+        super(ContainerServer, self).__init__(address, _Handler)
+        self.containers = {name: c if isinstance(c, Container) else container.load(c)
+                           for name, c in containers.items()}
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind(address)
+        self.server_address = self.socket.getsockname()
+        self.socket.listen(64)
+
+
+class RemoteContainer(object):
+    """
+    A container held by a server (see :class:`~exa.core.server.ContainerClient`);
+    slicing (by cardinal values), data object access, and queries return
+    (sub) containers or data objects read from the server.
+    """
+    def get(self, tables=None, columns=None, frames=None):
+        """
+        Get (a selection of) the container.
+
+        Args:
+            tables (list): Names of the data objects (default all)
+            columns (dict): Names of the columns, by data object name
+            frames: Cardinal values (int, list, array, range, or slice of values)
+        """
+        return self.client._container(self.name, tables=tables, columns=columns,
+                                      frames=_json_frames(frames))
+
+    def query(self, table, expr, cardinal=False, tables=None):
+        """Query the container (see :func:`~exa.core.container.Container.query`)."""
+        return self.client._container(self.name, tables=tables, query=[table, expr, cardinal])
+
+    @property
+    def info(self):
+        """Metadata, cardinal data object, and shapes of the data objects."""
+        return self.client._request({'op': 'info', 'container': self.name})
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.get(tables=[key])._data()[key]
+        return self.get(frames=key)
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name not in self.info['tables']:
+            raise AttributeError("'{}' object has no attribute '{}'".format(type(self).__name__, name))
+        return self[name]
+
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+
+class ContainerClient(object):
+    """
+    Client of a :class:`~exa.core.server.ContainerServer`.
+
+    Args:
+        address: Unix socket path, or (host, port) tuple for TCP
+        container: Container class built from responses (default :class:`~exa.core.container.Container`)
+    """
+    def names(self):
+        """Names (and metadata) of the served containers."""
+        return self._request({'op': 'list'})
+
+    def _request(self, request):
+        """Send a request (on a new connection), returning the response and its payload."""
+        family = socket.AF_UNIX if isinstance(self.address, str) else socket.AF_INET
+        with socket.socket(family, socket.SOCK_STREAM) as sock:
+            sock.connect(self.address)
+            _send_message(sock, json.dumps(request).encode())
+            header, payload = _recv_message(sock)
+        specs = pickle.loads(header)
+        if 'error' in specs:
+            raise RuntimeError(specs['error'])
+        if request['op'] == 'get':
+            return specs, payload
+        return specs
+
+    def _container(self, name, **request):
+        specs, payload = self._request(dict(request, op='get', container=name))
+        kwargs = dict(specs['rel'])
+        for table, spec in specs['tables'].items():
+            kwargs[table] = _rebuild(spec, payload)
+        return self.container(**kwargs)
+
+    def __getitem__(self, name):
+        return RemoteContainer(self, name)
+
+    def __init__(self, address, container=Container):
+        self.address = address
+        self.container = container
@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Shared Memory
+###################################
+Transport of :class:`~exa.core.container.Container` objects between processes
+without pickling their data. Each data object (table) is copied once into a
+`shared memory`_ segment; the small, picklable
+:class:`~exa.core.shared.SharedHandle` describing the layout of the segments
+is what gets sent to worker processes. Workers rebuild the data objects as
+(read-only) NumPy-backed views of the segments, i.e. without copying.
+
+.. code-block:: Python
+
+    with container.to_shared() as handle:
+        with multiprocessing.Pool() as pool:
+            results = pool.map(work, [handle]*8)
+
+    def work(handle):
+        container = MyContainer.from_shared(handle)
+        ...
+
+Note:
+    Numeric, boolean, and datetime columns (and categorical codes) are shared.
+    Object (e.g. string) columns, categories, and non-numeric indices are small
+    enough (or cannot be shared) and are pickled with the handle.
+
+.. _shared memory: https://docs.python.org/3/library/multiprocessing.shared_memory.html
+"""
+import sys
+import weakref
+import threading
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import pandas as pd
+from pandas.core.dtypes.dtypes import CategoricalDtype
+from .numerical import Field
+
+
+_align = 64    # Byte alignment of arrays within a segment
+_tracking = threading.Lock()    # Guards suppressed resource tracker registration (see _attach)
+
+
+class _Segment(SharedMemory):
+    """
+    A shared memory segment that can be garbage collected while arrays built
+    on its buffer are still alive (the mapping is released with the arrays).
+    """
+    def close(self):
+        try:
+            super(_Segment, self).close()
+        except BufferError:
+            pass
+
+    def __del__(self):
+        try:
+            self.close()
+        except OSError:
+            pass
+
+
+def _attach(name):
+    """
+    Attach to an existing segment without registering it with this process's
+    resource tracker, which would otherwise destroy the segment when this
+    process exits. The registration is skipped rather than undone because
+    worker processes may share the owner's resource tracker.
+    """
+    if sys.version_info >= (3, 13):
+        return _Segment(name=name, track=False)
+    register = resource_tracker.register
+
+    def skip(rname, rtype):
+        if rtype != 'shared_memory' or rname.lstrip('/') != name.lstrip('/'):
+            register(rname, rtype)
+
+    with _tracking:
+        resource_tracker.register = skip
+        try:
+            return _Segment(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class _Layout(object):
+    """Byte offsets of the arrays of a single data object within its segment."""
+    def add(self, values):
+        """Reserve space for an array, returning its description."""
+        values = np.ascontiguousarray(values)
+        offset = -(-self.nbytes//_align)*_align
+        self.arrays.append((offset, values))
+        self.nbytes = offset + values.nbytes
+        return ('shm', values.dtype.str, values.shape, offset)
+
+    def __init__(self):
+        self.arrays = []
+        self.nbytes = 0
+
+
+def _pack(values, layout):
+    """
+    Describe an index or column; shareable arrays are added to the layout,
+    everything else is kept (pickled) as is.
+    """
+    if isinstance(values, pd.RangeIndex):
+        return ('range', values.start, values.stop, values.step)
+    elif isinstance(values, pd.MultiIndex):
+        return ('obj', values)
+    values = getattr(values, 'values', values)
+    if isinstance(getattr(values, 'dtype', None), CategoricalDtype):
+        return ('cat', _pack(values.codes, layout), values.categories, values.ordered)
+    elif isinstance(values, np.ndarray) and values.dtype.kind in 'biufcmM':
+        return layout.add(values)
+    return ('obj', values)
+
+
+def _unpack(spec, buf):
+    """Rebuild the values described by :func:`~exa.core.shared._pack`."""
+    kind = spec[0]
+    if kind == 'shm':
+        _, dtype, shape, offset = spec
+        values = np.ndarray(shape, dtype=np.dtype(dtype), buffer=buf, offset=offset)
+        values.flags.writeable = False
+        return values
+    elif kind == 'cat':
+        return pd.Categorical.from_codes(_unpack(spec[1], buf), categories=spec[2],
+                                         ordered=spec[3])
+    elif kind == 'range':
+        return pd.RangeIndex(*spec[1:])
+    return spec[1]
+
+
+def _describe(obj, layout):
+    """Describe a data object (series, dataframe, or field)."""
+    spec = {'type': type(obj), 'index': _pack(obj.index, layout),
+            'iname': obj.index.names}
+    if isinstance(obj, pd.Series):
+        spec['name'] = obj.name
+        spec['values'] = _pack(obj, layout)
+    else:
+        spec['columns'] = [(col, _pack(obj[col], layout)) for col in obj.columns]
+        if isinstance(obj, Field):
+            spec['field_values'] = [_describe(v, layout) for v in obj.field_values]
+    return spec
+
+
+def _rebuild(spec, buf):
+    """Build a data object from its description without copying shared arrays."""
+    index = _unpack(spec['index'], buf)
+    if not isinstance(index, pd.Index):
+        index = pd.Index(index, copy=False)
+    index.names = spec['iname']
+    if 'values' in spec:
+        obj = pd.Series(_unpack(spec['values'], buf), index=index,
+                        name=spec['name'], copy=False)
+    else:
+        # Unconsolidated (one block per column) so that nothing is copied
+        obj = pd.DataFrame({col: _unpack(s, buf) for col, s in spec['columns']},
+                           index=index, columns=[col for col, _ in spec['columns']],
+                           copy=False)
+    cls = spec['type']
+    if 'field_values' in spec:
+        return cls(obj, field_values=[_rebuild(s, buf) for s in spec['field_values']])
+    return obj if type(obj) is cls else cls(obj)
+
+
+def _release(segments, unlink):
+    """Close (and possibly destroy) shared memory segments."""
+    for segment in segments.values():
+        segment.close()
+        if unlink:
+            try:
+                segment.unlink()
+            except FileNotFoundError:    # Already destroyed
+                resource_tracker.unregister(segment._name, 'shared_memory')
+    segments.clear()
+
+
+class SharedHandle(object):
+    """
+    Picklable description of a container whose data objects have been placed
+    in shared memory (see :func:`~exa.core.container.Container.to_shared`).
+
+    The process that created the handle owns the segments: they exist until
+    :func:`~exa.core.shared.SharedHandle.unlink` is called, the handle is used
+    as a context manager and exits, or the owning handle is garbage collected.
+    Unpickled copies of the handle (in worker processes) only attach to the
+    segments; :func:`~exa.core.shared.SharedHandle.close` releases their
+    mappings.
+
+    Attributes:
+        rel (dict): Descriptive kwargs of the container (name, meta, etc.)
+        tables (dict): Description of each data object (and its segment)
+        nbytes (int): Total size of the shared segments
+    """
+    @property
+    def nbytes(self):
+        return sum(size for _, size in self._names.values())
+
+    def attach(self):
+        """
+        Rebuild the container's kwargs (descriptive and data objects) from the
+        shared segments.
+
+        Returns:
+            kwargs (dict): Keyword arguments for creation of a container
+        """
+        kwargs = dict(self.rel)
+        for name, spec in self.tables.items():
+            if name not in self._segments:
+                self._segments[name] = _attach(self._names[name][0])
+            kwargs[name] = _rebuild(spec, self._segments[name].buf)
+        return kwargs
+
+    def close(self):
+        """Release this process's mappings of the segments."""
+        if self._owner:    # Keep the segments around until they are unlinked
+            for segment in self._segments.values():
+                segment.close()
+        else:
+            self._finalizer()
+
+    def unlink(self):
+        """Destroy the shared segments (only allowed for the owning process)."""
+        if not self._owner:
+            raise RuntimeError('Only the process that created the segments may unlink them.')
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        if self._owner:
+            self.unlink()
+        else:
+            self.close()
+
+    def __getstate__(self):
+        return {'rel': self.rel, 'tables': self.tables, '_names': self._names}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._owner = False
+        self._segments = {}
+        self._finalizer = weakref.finalize(self, _release, self._segments, False)
+
+    def __init__(self, container):
+        self.rel = container._rel()
+        self.tables = {}
+        self._names = {}
+        self._owner = True
+        self._segments = {}
+        self._finalizer = weakref.finalize(self, _release, self._segments, True)
+        for key, obj in container._data().items():
+            name = key[1:] if key.startswith('_') else key
+            layout = _Layout()
+            self.tables[name] = _describe(obj, layout)
+            segment = _Segment(create=True, size=max(layout.nbytes, 1))
+            self._segments[name] = segment
+            self._names[name] = (segment.name, segment.size)
+            for offset, values in layout.arrays:
+                dest = np.ndarray(values.shape, dtype=values.dtype,
+                                  buffer=segment.buf, offset=offset)
+                dest[...] = values
+                del dest
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Tests for :mod:`~exa.core.cache`
+#######################################
+"""
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+import numpy as np
+import pandas as pd
+from exa import Container, DataFrame
+from exa.core.container import requires
+from exa.core.cache import ResultCache, hash_object
+
+
+class Derived(DataFrame):
+    _columns = ['y', 'label']
+
+
+class CachedContainer(Container):
+    calls = 0
+
+    @requires('x')
+    def compute_y(self):
+        CachedContainer.calls += 1
+        self.y = Derived({'y': self.x * 2, 'label': 'a'})
+
+
+class TestCache(TestCase):
+    def setUp(self):
+        self.path = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.path, ignore_errors=True)
+
+    def test_hash_object(self):
+        df = pd.DataFrame({'x': np.arange(5.0), 'cat': pd.Categorical(list('abcab')),
+                           'label': list('vwxyz')})
+        self.assertEqual(hash_object(df), hash_object(df.copy()))
+        other = df.copy()
+        other.loc[4, 'label'] = 'q'
+        self.assertNotEqual(hash_object(df), hash_object(other))
+        self.assertNotEqual(hash_object(df), hash_object(df.rename(columns={'x': 'w'})))
+
+    def test_hash_datetime(self):
+        df = pd.DataFrame({'t': pd.date_range('2020-01-01', periods=3),
+                           'dt': pd.to_timedelta([1, 2, 3], unit='s')},
+                          index=pd.date_range('2021-01-01', periods=3, tz='UTC'))
+        self.assertEqual(hash_object(df), hash_object(df.copy()))
+        other = df.copy()
+        other.iloc[1, 0] = pd.Timestamp('1999-01-01')
+        self.assertNotEqual(hash_object(df), hash_object(other))
+
+    def test_evict(self):
+        cache = ResultCache(self.path, max_size='40kB')
+        for i in range(5):
+            cache.put(str(i), pd.Series(np.random.rand(1000)))
+            os.utime(os.path.join(self.path, str(i)), (i, i))
+        self.assertIsNotNone(cache.get('3'))
+        self.assertIsNone(cache.get('0'))
+        self.assertTrue(len(os.listdir(self.path)) < 5)
+
+    def test_result_cache(self):
+        c = CachedContainer(x=pd.Series(np.arange(4.0)))
+        c.result_cache = self.path
+        CachedContainer.calls = 0
+        c.compute_all()
+        new = CachedContainer(x=pd.Series(np.arange(4.0)))
+        new.result_cache = c.result_cache
+        new.compute_all()
+        self.assertEqual(CachedContainer.calls, 1)
+        pd.testing.assert_frame_equal(new.y, c.y)
+        self.assertIs(type(new.y), type(c.y))    # Untyped results keep their class
+        new = CachedContainer(x=pd.Series(np.arange(5.0)))
+        new.result_cache = c.result_cache
+        new.compute_all()
+        self.assertEqual(CachedContainer.calls, 2)
+        new = CachedContainer(x=pd.Series(pd.to_timedelta(np.arange(3), unit='s')))
+        new.result_cache = c.result_cache
+        new.compute_all()    # Datetime inputs are hashed (and cached)
+        self.assertEqual(CachedContainer.calls, 3)
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Tests for :mod:`~exa.core.catalog`
+#######################################
+"""
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+import numpy as np
+import pandas as pd
+from exa import Container
+from exa.core.catalog import Catalog
+
+
+class TestCatalog(TestCase):
+    def setUp(self):
+        self.tmpdir = mkdtemp()
+        self.catalog = Catalog(os.path.join(self.tmpdir, 'catalog.sqlite'))
+
+    def tearDown(self):
+        rmtree(self.tmpdir)
+
+    def container(self, i):
+        frame = pd.DataFrame({'energy': np.arange(i + 1.0)}, index=pd.Index(range(i + 1), name='frame'))
+        return Container(name='calc{}'.format(i), meta={'basis': ['sto-3g', '6-31g'][i % 2], 'n': i},
+                         frame=frame)
+
+    def test_save(self):
+        Container.catalog = self.catalog
+        try:
+            paths = [self.container(i).save(self.tmpdir + '/calc{}.hdf5'.format(i)) for i in range(3)]
+            paths.append(self.container(3).save(self.tmpdir + '/calc3.npydir', format='npydir'))
+        finally:
+            Container.catalog = None
+        self.assertEqual(len(self.catalog), 4)
+        results = self.catalog.search(meta={'basis': '6-31g'})
+        self.assertListEqual(results['name'].tolist(), ['calc1', 'calc3'])
+        self.assertEqual(results['fingerprint'].iloc[0], Container.stored_fingerprint(paths[1]))
+        self.assertListEqual(self.catalog.search(rows={'frame': (2, None)})['name'].tolist(),
+                             ['calc1', 'calc2', 'calc3'])
+        self.assertListEqual(self.catalog.search(name='calc*', rows={'frame': 3})['name'].tolist(),
+                             ['calc2'])
+        self.assertEqual(self.catalog.tables(paths[2]).loc['frame', 'rows'], 3)
+        loaded = self.catalog.search(meta={'n': 0}, load=True)
+        self.assertEqual(loaded[0].name, 'calc0')
+        os.remove(paths[0])
+        self.catalog.prune()
+        self.assertEqual(len(self.catalog), 3)
+
+    def test_save_instance(self):
+        for i, ext in enumerate(('.hdf5', '.npydir')):
+            c = self.container(i)
+            c.catalog = self.catalog    # Not saved as metadata
+            self.assertNotIn('catalog', c._rel())
+            c.copy().save(self.tmpdir + '/calc' + ext, format='npydir' if ext == '.npydir' else 'fixed')
+        self.assertEqual(len(self.catalog), 2)
+
+    def test_scan(self):
+        paths = [self.container(i).save(self.tmpdir + '/calc{}.hdf5'.format(i)) for i in range(3)]
+        self.catalog.scan(paths, workers=2)
+        self.catalog.scan(paths[:1])    # Updated, not duplicated
+        self.assertEqual(len(self.catalog), 3)
+        self.assertEqual(len(self.catalog.search(name='calc2')), 1)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Tests for :mod:`~exa.core.categories`
+#######################################
+"""
+import os
+from tempfile import mkstemp
+from unittest import TestCase
+import numpy as np
+import pandas as pd
+from exa import DataFrame
+from exa.core.categories import CategoryRegistry, registry
+from exa.core.container import _concat_values
+
+
+class Atom(DataFrame):
+    _categories = {'element': str}
+    _shared_categories = True
+
+
+class LocalAtom(DataFrame):
+    _categories = {'element': str}
+
+
+class TestCategoryRegistry(TestCase):
+    def test_categorize(self):
+        reg = CategoryRegistry()
+        a = reg.categorize('symbol', ['H', 'O', 'H', None])
+        b = reg.categorize('symbol', pd.Series(['C', 'H']))
+        self.assertListEqual(b.categories.tolist(), ['H', 'O', 'C'])
+        self.assertListEqual(b.codes.tolist(), [2, 0])
+        self.assertListEqual(a.codes.tolist(), [0, 1, 0, -1])
+        self.assertEqual(reg.categorize('symbol', ['O']).dtype, b.dtype)
+        ints = reg.categorize('symbol', [1, 2])    # Different type, own categories
+        self.assertListEqual(ints.categories.tolist(), [1, 2])
+        aligned = reg.align(pd.DataFrame({'symbol': a}))
+        self.assertEqual(aligned['symbol'].dtype, b.dtype)
+        self.assertListEqual(aligned['symbol'].cat.codes.tolist(), [0, 1, 0, -1])
+
+    def tearDown(self):
+        registry.clear()    # Do not leak dictionaries to other tests
+
+    def test_shared(self):
+        local = LocalAtom({'element': ['O', 'H']})
+        self.assertListEqual(local['element'].cat.categories.tolist(), ['H', 'O'])
+        self.assertNotIn('element', registry)
+        df0 = Atom({'element': ['H', 'O']})
+        df1 = Atom({'element': ['Zn', 'H']})
+        self.assertListEqual(df1['element'].cat.codes.tolist(),
+                             registry.dtype('element').categories.get_indexer(['Zn', 'H']).tolist())
+        values = _concat_values([df0['element'], df1['element']], shared=True)
+        self.assertEqual(values.dtype, df1['element'].dtype)
+        self.assertListEqual(list(values), ['H', 'O', 'Zn', 'H'])
+        pieces = [pd.Series(pd.Categorical(['b'], categories=['b', 'a'])),
+                  pd.Series(pd.Categorical(['a']))]    # Not shared, categories merged
+        self.assertListEqual(_concat_values(pieces).categories.tolist(), ['b', 'a'])
+        self.assertListEqual(_concat_values(pieces[::-1]).categories.tolist(), ['a', 'b'])
+
+    def test_save_load(self):
+        reg = CategoryRegistry()
+        reg.categorize('symbol', ['H', 'O'])
+        reg.categorize('frame', np.array([3, 1]))
+        _, path = mkstemp(suffix='.json')
+        reg.save(path)
+        new = CategoryRegistry()
+        new.categorize('symbol', ['O', 'C'])
+        new.load(path)
+        os.remove(path)
+        self.assertListEqual(new.dtype('symbol').categories.tolist(), ['C', 'O', 'H'])
+        self.assertListEqual(new.dtype('frame').categories.tolist(), [1, 3])
@@ -5,13 +5,22 @@
 Tests for :mod:`~exa.core.container`
 #######################################
 """
+import gc
+import os
 import sys
+import pickle
+import time
 from os import remove
+from shutil import rmtree
 from unittest import TestCase
 from tempfile import mkdtemp
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
 from pandas.core.dtypes.dtypes import CategoricalDtype
 from exa import Container, TypedMeta, DataFrame, Series, Field
+from exa.core.container import (concat, ContainerWriter, ContainerBuilder, requires, _candidates,
+                                _select_related)
 
 
 class DummyDataFrame(DataFrame):
@@ -36,6 +45,29 @@ class DummyContainer(Container, metaclass=DummyMeta):
     pass
 
 
+class FrameContainer(Container):
+    _cardinal = 'frame'
+
+
+class ComputeContainer(Container):
+    @requires()
+    def compute_a(self):
+        time.sleep(0.2)
+        self.a = pd.Series([1.0, 2.0])
+
+    @requires()
+    def compute_b(self):
+        time.sleep(0.2)
+        self.b = pd.Series([3.0, 4.0])
+
+    @requires('a', 'b')
+    def compute_c(self):
+        self.c = self.a + self.b
+
+    def compute_distance(self, other):    # Helper, not a compute method
+        return (self.c - other.c).abs().sum()
+
+
 class TestContainer(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -64,9 +96,81 @@ class TestContainer(TestCase):
         self.assertEqual(cp.description, "descr")
         self.assertDictEqual(cp.meta, {'key': "value"})
 
+    def test_copy_on_write(self):
+        orig = self.container.copy()
+        cp = orig.copy(name="cow", cow=True)
+        self.assertTrue(np.shares_memory(cp.df['y'].values, orig.df['y'].values))
+        cp.df.loc[0, 'y'] = -1.0
+        self.assertEqual(orig.df.loc[0, 'y'], 1.1)
+        self.assertFalse(np.shares_memory(cp.df['y'].values, orig.df['y'].values))
+        cp = orig.copy(cow=True)
+        orig.s0.iloc[0] = -1.0
+        self.assertEqual(cp.s0.iloc[0], 1.1)
+        cp.df = cp.df.iloc[:2]
+        self.assertEqual(orig.df.shape, (5, 5))
+
+    def test_copy_on_write_inplace(self):
+        orig = self.container.copy()
+        cp = orig.copy(cow=True)
+        cp.s0 += 1.0
+        self.assertEqual(orig.s0.iloc[0], 1.1)
+        self.assertAlmostEqual(cp.s0.iloc[0], 2.1)
+        with self.assertRaises(ValueError):    # Shared buffers are read-only
+            cp.df['z'].values[0] = -1.0
+        with self.assertRaises(ValueError):
+            orig.df['z'].to_numpy()[0] = -1.0
+        cp.df['y'] *= 2
+        self.assertEqual(orig.df.loc[0, 'y'], 1.1)
+        self.assertAlmostEqual(cp.df.loc[0, 'y'], 2.2)
+        self.assertEqual(orig.df.loc[0, 'z'], 0.5)
+        del cp
+        orig.df.loc[0, 'z'] = -1.0    # No longer shared, buffers writeable again
+        self.assertTrue(orig.df['z'].values.flags.writeable)
+
+    def test_copy_on_write_dropped(self):
+        orig = self.container.copy()
+        cp = orig.copy(cow=True)
+        self.assertFalse(orig.df['z'].values.flags.writeable)
+        del cp
+        gc.collect()
+        orig.df['z'].values[0] = -1.0    # Buffers writeable once no copy shares them
+        np.multiply(orig.df['y'].values, 2, out=orig.df['y'].values)
+        self.assertEqual(orig.df.loc[0, 'z'], -1.0)
+        self.assertAlmostEqual(orig.df.loc[0, 'y'], 2.2)
+        self.assertIsInstance(orig.df.loc, pd.core.indexing._LocIndexer)
+
     def test_concat(self):
-        with self.assertRaises(NotImplementedError):
-            self.container.concat()
+        c = self.container.concat(self.container, self.container)
+        self.assertIsInstance(c, DummyContainer)
+        self.assertEqual(c.df.shape, (15, 5))
+        self.assertEqual(c.s0.shape, (15, ))
+        self.assertTrue(c.df.index.is_unique)
+        self.assertIsInstance(c.df['cat'].dtype, CategoricalDtype)
+        self.assertIsInstance(c.s1.dtype, CategoricalDtype)
+
+    def test_concat_keys(self):
+        frame = DataFrame.from_dict({'energy': [0.0, 1.0]})
+        frame.index.name = 'frame'
+        atom = DataFrame.from_dict({'frame': [0, 0, 1], 'symbol': ['H', 'O', 'H']})
+        atom.index.name = 'atom'
+        atom['symbol'] = atom['symbol'].astype('category')
+        two = DataFrame.from_dict({'atom0': [0, 1], 'atom1': [1, 2]})
+        c0 = Container(frame=frame, atom=atom, two=two)
+        atom = DataFrame.from_dict({'frame': [0, 0], 'symbol': ['C', 'C']})
+        atom.index.name = 'atom'
+        atom['symbol'] = atom['symbol'].astype('category')
+        c1 = Container(frame=frame.iloc[:1], atom=atom, two=two.iloc[:1])
+        c = concat(c0, c1, c0)
+        self.assertListEqual(c.frame.index.tolist(), [0, 1, 2, 3, 4])
+        self.assertListEqual(c.atom.index.tolist(), list(range(8)))
+        self.assertListEqual(c.atom['frame'].tolist(), [0, 0, 1, 2, 2, 3, 3, 4])
+        self.assertListEqual(c.two['atom0'].tolist(), [0, 1, 3, 5, 6])
+        self.assertListEqual(c.two['atom1'].tolist(), [1, 2, 4, 6, 7])
+        self.assertListEqual(c.two.index.tolist(), list(range(5)))    # Unnamed, renumbered
+        plain = Container(table=pd.DataFrame({'x': [1.0, 2.0]}))
+        self.assertTrue(concat(plain, plain).table.index.is_unique)
+        self.assertIsInstance(c.atom['symbol'].dtype, CategoricalDtype)
+        self.assertListEqual(c.atom['symbol'].tolist(), ['H', 'O', 'H', 'C', 'C', 'H', 'O', 'H'])
 
     def test_slice_naive(self):
         c = self.container[[0]].copy()
@@ -93,9 +197,14 @@ class TestContainer(TestCase):
 
     def test_save_load_to_hdf(self):
         tmpdir = mkdtemp()
-        path = self.container.save()
+        cwd = os.getcwd()
+        os.chdir(tmpdir)    # Default path is relative to the working directory
+        try:
+            path = self.container.save()
+        finally:
+            os.chdir(cwd)
         self.assertTrue(path.endswith(".hdf5"))
-        remove(path)
+        remove(os.path.join(tmpdir, path))
         path = self.container.save(tmpdir)
         self.assertTrue(path.endswith(".hdf5"))
         remove(path)
@@ -108,6 +217,425 @@ class TestContainer(TestCase):
         self.assertEqual(c.df.shape, self.container.df.shape)
         remove(path)
 
+    def test_save_incremental(self):
+        path = mkdtemp() + "/incr.hdf5"
+        c = self.container.copy()
+        c.field = Field(pd.DataFrame({'nx': [2]}), field_values=[pd.Series([0.1, 0.2])])
+        c.save(path)
+        self.assertEqual(c._changes(path), ([], []))
+        c.df.loc[0, 'y'] = -1.0
+        c.s0 = DummySeries([9.9])
+        del c['_s1']
+        self.assertEqual(c._changes(path), (['_s0', '_df'], ['_s1']))
+        c.save(path, incremental=True)
+        self.assertEqual(c._changes(path), ([], []))
+        with pd.HDFStore(path) as store:
+            self.assertNotIn('/s1', store.keys())
+        loaded = Container.load(path)
+        self.assertEqual(loaded.df.loc[0, 'y'], -1.0)
+        self.assertEqual(loaded.s0.shape, (1, ))
+        self.assertEqual(len(loaded.field.field_values), 1)
+        self.assertEqual(loaded._changes(path), ([], []))
+        loaded.df['z'].iloc[1] = 7.0    # Chained assignment (not tracked by the data object)
+        loaded.s0 += 1.0
+        self.assertEqual(sorted(loaded._changes(path)[0]), ['df', 's0'])
+        loaded.save(path, incremental=True)
+        self.assertEqual(Container.load(path).df.loc[1, 'z'], 7.0)
+        remove(path)
+
+    def test_writer(self):
+        path = mkdtemp() + "/stream.hdf5"
+        with ContainerWriter(path, name='stream') as writer:
+            for i in range(3):
+                frame = DataFrame.from_dict({'energy': [float(i)]})
+                frame.index = pd.Index([i], name='frame')
+                atom = DataFrame.from_dict({'frame': [i, i], 'symbol': ['H', 'O']})
+                atom['symbol'] = atom['symbol'].astype('category')
+                atom.index = pd.Index([2*i, 2*i + 1], name='atom')
+                field = Field(pd.DataFrame({'nx': [2]}), field_values=[pd.Series([0.1*i])])
+                writer.append(Container(frame=frame, atom=atom, field=field))
+                c = Container.load(path)
+                self.assertEqual(c.frame.shape, (i + 1, 1))
+        self.assertEqual(c.name, 'stream')
+        self.assertListEqual(c.atom['frame'].tolist(), [0, 0, 1, 1, 2, 2])
+        self.assertListEqual(c.atom['symbol'].tolist(), ['H', 'O']*3)
+        self.assertEqual(len(c.field.field_values), 3)
+        with pd.HDFStore(path) as store:
+            self.assertListEqual(store.get_storer('atom').data_columns, ['frame'])
+        remove(path)
+
+    def test_load_select(self):
+        frame = pd.DataFrame({'energy': np.arange(10.0)}, index=pd.Index(range(10), name='frame'))
+        atom = pd.DataFrame({'frame': np.repeat(np.arange(10), 3), 'x': np.arange(30.0),
+                             'symbol': pd.Categorical(['H', 'H', 'O']*10)},
+                            index=pd.Index(range(30), name='atom'))
+        c = FrameContainer(frame=frame, atom=atom, other=pd.Series([1.0, 2.0]))
+        tmpdir = mkdtemp()
+        for fmt, ext in (('table', '.hdf5'), ('fixed', '.hdf5'), ('npydir', '.npydir')):
+            path = c.save(tmpdir + "/select_" + fmt + ext, format=fmt)
+            sub = FrameContainer.load(path, frames=slice(2, 4), columns={'atom': ['x']})
+            self.assertListEqual(sub.frame.index.tolist(), [2, 3])
+            self.assertListEqual(sub.atom.columns.tolist(), ['x'])
+            self.assertListEqual(sub.atom['x'].tolist(), [6.0, 7.0, 8.0, 9.0, 10.0, 11.0])
+            self.assertEqual(sub.other.shape, (2, ))
+            sub = FrameContainer.load(path, frames=[1, 8], tables=['atom'])
+            self.assertFalse(hasattr(sub, 'frame'))
+            self.assertListEqual(sub.atom['frame'].tolist(), [1, 1, 1, 8, 8, 8])
+            self.assertListEqual(sub.atom['symbol'].tolist(), ['H', 'H', 'O']*2)
+            rmtree(path) if fmt == 'npydir' else remove(path)
+        names = ['a', 'b', 'c']
+        frame = pd.DataFrame({'energy': np.arange(3.0)}, index=pd.Index(names, name='frame'))
+        atom = pd.DataFrame({'frame': pd.Categorical(np.repeat(names, 2)), 'x': np.arange(6.0)})
+        c = FrameContainer(frame=frame, atom=atom)    # String (categorical) cardinal values
+        for fmt, ext in (('table', '.hdf5'), ('fixed', '.hdf5'), ('npydir', '.npydir')):
+            path = c.save(tmpdir + "/names_" + fmt + ext, format=fmt)
+            sub = FrameContainer.load(path, frames=['a', 'c'], columns={'atom': ['x']})
+            self.assertListEqual(sub.frame.index.tolist(), ['a', 'c'])
+            self.assertListEqual(sub.atom['x'].tolist(), [0.0, 1.0, 4.0, 5.0])
+            sub = FrameContainer.load(path, frames=slice('b', None))
+            self.assertListEqual(sub.atom['frame'].tolist(), ['b', 'b', 'c', 'c'])
+            rmtree(path) if fmt == 'npydir' else remove(path)
+        path = tmpdir + "/select.hdf5"
+        pd.HDFStore(path, 'w').close()
+        with self.assertRaises(ValueError):
+            Container.load(path, frames=[0])
+        remove(path)
+
+    def test_query(self):
+        frame = pd.DataFrame({'energy': np.arange(3.0)}, index=pd.Index(range(3), name='frame'))
+        atom = pd.DataFrame({'frame': np.repeat(np.arange(3), 2), 'z': [0.0, 11.0, 0.0, 0.0, 12.0, 13.0]},
+                            index=pd.Index(range(6), name='atom'))
+        bond = pd.DataFrame({'atom0': [0, 4, 2], 'atom1': [1, 5, 3]})
+        c = FrameContainer(frame=frame, atom=atom, bond=bond, other=pd.Series([1.0, 2.0]))
+        sub = c.query('atom', 'z > 10')
+        self.assertListEqual(sub.atom.index.tolist(), [1, 4, 5])
+        self.assertListEqual(sub.frame.index.tolist(), [0, 2])
+        self.assertListEqual(sub.bond['atom0'].tolist(), [4])
+        self.assertEqual(len(sub.other), 2)    # Unrelated
+        sub = c.query('frame', 'energy > 1')
+        self.assertListEqual(sub.atom.index.tolist(), [4, 5])
+        sub = c.query('atom', 'z > 12', cardinal=True)    # Whole frames
+        self.assertListEqual(sub.atom.index.tolist(), [4, 5])
+        self.assertListEqual(sub.bond['atom1'].tolist(), [5])
+        pair = pd.DataFrame({'d': np.arange(6.0)}, index=pd.MultiIndex.from_product(
+            [range(3), ['a', 'b']], names=['frame', 'kind']))    # Level "kind" is unrelated
+        related = _select_related(atom[atom['z'] > 12], pair, 'column-index')
+        self.assertListEqual(related['d'].tolist(), [4.0, 5.0])
+
+    def test_zone_map(self):
+        frame = DataFrame({'energy': [0.0, 1.0, 2.0]}, index=pd.Index(range(3), name='frame'))
+        atom = DataFrame({'frame': np.repeat(np.arange(3), 2), 'z': [0.0, 1.0, 5.0, 6.0, 10.0, 11.0]},
+                         index=pd.Index(range(6), name='atom'))
+        c = FrameContainer(frame=frame, atom=atom, other=DataFrame({'x': np.arange(5.0)}))
+        zm = c.zone_map('atom')
+        self.assertListEqual(zm['max']['z'].tolist(), [1.0, 6.0, 11.0])
+        self.assertListEqual(zm[('count', '')].tolist(), [2, 2, 2])
+        self.assertListEqual(c.zone_map('other', chunksize=2)[('count', '')].tolist(), [2, 2, 1])
+        self.assertListEqual(_candidates(zm, 'z > 5.5 and 7 > z').tolist(), [False, True, False])
+        self.assertListEqual(_candidates(zm, 'z < -1 | sqrt(z) > 1').tolist(), [True]*3)
+        self.assertListEqual(c.query('atom', 'z > 5.5', zones=True).atom.index.tolist(), [3, 4, 5])
+        c.atom['z'].iloc[1] = 500.0    # Chained assignment (zone map is stale)
+        self.assertListEqual(c.query('atom', 'z > 100').atom.index.tolist(), [1])
+        self.assertEqual(c.zone_map('atom')['max']['z'].iloc[0], 500.0)
+        c.atom.loc[0, 'z'] = 20.0
+        c.atom.loc[1, 'z'] = 1.0
+        self.assertListEqual(c.query('atom', 'z > 15').atom.index.tolist(), [0])
+        tmpdir = mkdtemp()
+        for fmt in ('fixed', 'table', 'npydir'):
+            path = c.save(tmpdir + '/zones.' + ('npydir' if fmt == 'npydir' else fmt + '.hdf5'),
+                          format=fmt, zones=True)
+            loaded = FrameContainer.load(path, where={'atom': 'z > 5.5 and z < 7', 'frame': 'energy >= 1'})
+            self.assertListEqual(loaded.frame.index.tolist(), [1])
+            self.assertListEqual(loaded.atom.index.tolist(), [2, 3])
+            lazy = FrameContainer.load(path, lazy=True)
+            self.assertListEqual(lazy.zone_map('atom')['max']['z'].tolist(), [20.0, 6.0, 11.0])
+            self.assertNotIn('atom', vars(lazy))    # Not read
+        rmtree(tmpdir)
+
+    def test_builder(self):
+        builder = ContainerBuilder(FrameContainer, name='built', categorical=['symbol'], capacity=2)
+        for i in range(5):
+            builder.append(i, frame={'energy': i}, atom={'symbol': ['H', 'O', 'Ca'][:i % 3 + 1],
+                                                         'x': np.arange(i % 3 + 1) * 0.5})
+        builder.append(5, frame={'energy': 0.5}, atom=pd.DataFrame({'symbol': pd.Categorical(['Zn']),
+                                                                    'x': [1.0]}))
+        with self.assertRaises(ValueError):
+            builder.append(6, atom={'symbol': ['H', 'H'], 'x': [0.0]})
+        with self.assertRaises(ValueError):    # Frame is valid, atom misses a column
+            builder.append(6, frame={'energy': 6.0}, atom={'x': [0.0]})
+        with self.assertRaises(ValueError):
+            builder.append(6, frame={'energy': 6.0}, atom={'symbol': ['H'], 'x': [0.0], 'y': [0.0]})
+        c = builder.build()
+        self.assertIsInstance(c, FrameContainer)
+        self.assertEqual(c.name, 'built')
+        self.assertListEqual(c.frame['energy'].tolist(), [0, 1, 2, 3, 4, 0.5])
+        self.assertEqual(c.frame.index.name, 'frame')
+        self.assertListEqual(c.atom['frame'].tolist(), [0, 1, 1, 2, 2, 2, 3, 4, 4, 5])
+        self.assertListEqual(c.atom['symbol'].cat.categories.tolist(), ['H', 'O', 'Ca', 'Zn'])
+        self.assertListEqual(c.atom['symbol'].tolist()[3:6], ['H', 'O', 'Ca'])
+        self.assertEqual(c.atom.index.name, 'atom')
+
+    def test_save_categories(self):
+        tmpdir = mkdtemp()
+        atom = pd.DataFrame({'frame': np.repeat([0, 1, 2], 2), 'x': np.arange(6.0),
+                             'symbol': pd.Categorical(['H', 'O']*3)})
+        c = FrameContainer(atom=atom, s=pd.Series(pd.Categorical(['a', 'b', 'a'])))
+        for fmt in ('fixed', 'table'):
+            path = c.save(tmpdir + "/cat_" + fmt + ".hdf5", format=fmt)
+            with pd.HDFStore(path, 'r') as store:
+                self.assertIn('exa_categories', store.get_storer('atom').attrs)
+            c2 = FrameContainer.load(path)
+            pd.testing.assert_frame_equal(c2.atom, atom)
+            pd.testing.assert_series_equal(c2.s, c.s)
+            sub = FrameContainer.load(path, frames=[2], columns={'atom': ['symbol']})
+            self.assertListEqual(sub.atom['symbol'].tolist(), ['H', 'O'])
+            self.assertIsInstance(sub.atom['symbol'].dtype, CategoricalDtype)
+            remove(path)
+        self.assertIsInstance(c.atom['symbol'].dtype, CategoricalDtype)
+
+    def test_save_delta(self):
+        path = mkdtemp() + "/delta.hdf5"
+        xyz = np.cumsum(np.random.normal(0, 0.01, (10, 6)), axis=0)
+        atom = pd.DataFrame({'frame': np.repeat(np.arange(10), 6), 'x': xyz.ravel(),
+                             'symbol': pd.Categorical(['H', 'H', 'O']*20),
+                             'name': ['a', 'b', 'c', 'd', 'e', 'f']*10})
+        c = FrameContainer(atom=atom, other=pd.DataFrame({'frame': [0, 0, 1]}))
+        c.save(path, delta=True)
+        with pd.HDFStore(path, 'r') as store:
+            self.assertListEqual(store['atom'].columns.tolist(), ['frame', 'x'])
+            self.assertNotIn('exa_delta', store.get_storer('other').attrs)
+        pd.testing.assert_frame_equal(FrameContainer.load(path).atom, atom)
+        sub = FrameContainer.load(path, frames=[9], columns={'atom': ['x', 'name']})
+        self.assertListEqual(sub.atom['x'].tolist(), xyz[9].tolist())
+        c.save(path, delta=True, tolerance=1e-4)
+        self.assertTrue(np.allclose(FrameContainer.load(path).atom['x'], atom['x'],
+                                    rtol=0, atol=0.5e-4))
+        self.assertEqual(c.atom['x'].dtype, np.float64)
+        with self.assertRaises(ValueError):
+            c.save(path, delta=True, format='table')
+        remove(path)
+
+    def test_save_codecs(self):
+        path = mkdtemp() + "/codecs.hdf5"
+        c = self.container.copy()
+        path, report = c.save(path, complib='blosc:lz4', codecs={'df': ('blosc:zstd', 5)},
+                              threads=2, report=True)
+        self.assertListEqual(sorted(report.index), ['df', 's0', 's1'])
+        self.assertEqual(report.loc['df', 'codec'], 'blosc:zstd')
+        self.assertEqual(report.loc['s0', 'codec'], 'blosc:lz4')
+        self.assertTrue((report['stored'] > 0).all())
+        with pd.HDFStore(path, 'r') as store:
+            self.assertEqual(store.get_node('df/block0_values').filters.complib, 'blosc:zstd')
+            self.assertEqual(store.get_node('s0/values').filters.complevel, 1)
+        c2 = DummyContainer.load(path, threads=2)
+        pd.testing.assert_series_equal(pd.Series(c2.s0), pd.Series(c.s0))
+        remove(path)
+
+    def test_save_npydir(self):
+        tmpdir = mkdtemp()
+        c = self.container.copy(meta={'n': np.int64(2), 'shape': (2, 3), 1: ['one']})
+        c.field = Field(pd.DataFrame({'nx': [2]}), field_values=[pd.Series([0.1, 0.2])])
+        path = c.save(tmpdir, format='npydir')
+        self.assertTrue(path.endswith('.npydir'))
+        c2 = DummyContainer.load(path)
+        self.assertEqual(c2.meta, {'n': 2, 'shape': (2, 3), 1: ['one']})    # As with HDF5
+        self.assertIsInstance(c2.df, DummyDataFrame)
+        self.assertIsInstance(c2.df['cat'].dtype, CategoricalDtype)
+        # Copied, since pandas compares array classes (memory maps)
+        pd.testing.assert_frame_equal(pd.DataFrame(c2.df).copy(), pd.DataFrame(c.df))
+        pd.testing.assert_series_equal(pd.Series(c2.s1), pd.Series(c.s1))
+        self.assertListEqual(c2.field.field_values[0].tolist(), [0.1, 0.2])
+        self.assertIsInstance(c2.df._mgr.blocks[0].values, np.memmap)
+        self.assertFalse(c2.df['y'].values.flags.writeable)
+        c3 = DummyContainer.load(path, mmap=False)
+        self.assertTrue(c3.df['y'].values.flags.writeable)
+        c.save(path, format='npydir')    # Replaces the directory
+        self.assertEqual(c2.df['y'].tolist(), c.df['y'].tolist())
+        with self.assertRaises(ValueError):
+            c.save(tmpdir + "/c.hdf5", format='npydir')
+        with self.assertRaises(TypeError):
+            c.copy(meta={'obj': object()}).save(tmpdir + "/obj.npydir", format='npydir')
+        self.assertListEqual(os.listdir(tmpdir), [os.path.basename(path)])
+        rmtree(tmpdir)
+
+    def test_load_lazy(self):
+        path = mkdtemp() + "/lazy.hdf5"
+        c = self.container.copy()
+        c.field = Field(pd.DataFrame({'nx': [2]}), field_values=[pd.Series([0.1, 0.2])])
+        c.save(path)
+        lazy = DummyContainer.load(path, lazy=True)
+        self.assertNotIn('_df', vars(lazy))
+        self.assertIsInstance(lazy.df, DummyDataFrame)
+        self.assertIn('_df', vars(lazy))
+        self.assertEqual(len(lazy.field.field_values), 1)
+        lazy.unload('df')
+        self.assertNotIn('_df', vars(lazy))
+        self.assertEqual(lazy._changes(path), ([], []))
+        lazy.s0.iloc[0] = -1.0
+        with self.assertRaises(ValueError):
+            lazy.unload('s0')
+        self.assertEqual(lazy._changes(path), (['_s0'], []))
+        lazy.save(path, incremental=True)
+        self.assertNotIn('_df', vars(lazy))
+        lazy.unload('s0')
+        self.assertEqual(lazy.s0.iloc[0], -1.0)
+        self.assertEqual(len(lazy._data()), 4)
+        with self.assertRaises(AttributeError):
+            lazy.missing
+        remove(path)
+
+    def test_compact(self):
+        c = self.container.copy()
+        c.field = Field(pd.DataFrame({'nx': [2]}), field_values=[pd.Series([0.1, 0.2])])
+        compacted, report = c.compact(float_precision='single', report=True)
+        self.assertIsInstance(compacted.df, DummyDataFrame)
+        self.assertEqual(compacted.df['group'].dtype, np.int8)
+        self.assertEqual(compacted.df['y'].dtype, np.float32)
+        self.assertEqual(compacted.field.field_values[0].dtype, np.float32)
+        self.assertEqual(c.df['group'].dtype, np.int64)
+        self.assertTrue((report['after'] <= report['before']).all())
+        self.assertTrue(report.loc['df', 'after'] < report.loc['df', 'before'])
+        c.df['label'] = ['a', 'a', 'b', 'a', 'a']
+        self.assertIsNone(c.compact(inplace=True))
+        self.assertIsInstance(c.df['label'].dtype, CategoricalDtype)
+        self.assertEqual(c.df['y'].dtype, np.float64)
+        with self.assertRaises(ValueError):
+            c.compact(float_precision='half')
+
+    def test_memory_report(self):
+        c = self.container.copy()
+        c.field = Field(pd.DataFrame({'nx': [2]}), field_values=[pd.Series([0.1, 0.2])])
+        c.view = pd.DataFrame(c.df).copy(deep=False)
+        c.tail = pd.Series(c.df['y'].values[2:])    # Overlapping view
+        report = c.memory_report()
+        self.assertListEqual(report.index.names, ['object', 'column'])
+        self.assertEqual(report.loc[('df', 'y'), 'size'], 40)
+        self.assertEqual(report.loc[('view', 'y'), 'unique'], 0)
+        self.assertEqual(report.loc[('tail', 'values'), 'unique'], 0)
+        self.assertEqual(report.loc[('field', 'field_values'), 'size'], 16 + 132)
+        deep = report.loc[('df', 'cat'), 'size']
+        self.assertTrue(deep > c.memory_report(deep=False).loc[('df', 'cat'), 'size'])
+        self.assertTrue(c.info().loc['df', 'size'] >= deep)
+
+    def test_fingerprint(self):
+        c = self.container.copy()
+        digest = c.fingerprint()
+        self.assertEqual(digest, self.container.copy().fingerprint())
+        self.assertIn(('df', 'cat'), c.fingerprint(detail=True).index)
+        c.df.loc[0, 'y'] = -1.0
+        self.assertNotEqual(c.fingerprint(), digest)
+        for fmt in ('fixed', 'npydir'):
+            tmp = mkdtemp()
+            path = c.save(tmp + ('/fp.hdf5' if fmt == 'fixed' else '/fp.npydir'), format=fmt)
+            self.assertEqual(Container.stored_fingerprint(path), c.fingerprint())
+            lazy = DummyContainer.load(path, lazy=True)
+            self.assertTrue(lazy.equals(path))
+            self.assertNotIn('_df', vars(lazy))    # Not read
+            loaded = DummyContainer.load(path)
+            self.assertTrue(loaded.equals(c))
+            if fmt == 'fixed':    # Directories of NumPy files are read-only (memory mapped)
+                loaded.df['y'].iloc[0] = 7.0    # Chained assignment
+                self.assertFalse(loaded.equals(c))
+                self.assertFalse(loaded.equals(path))
+            rmtree(tmp)
+        values = DataFrame({'x': np.arange(5.0), 'y': np.arange(5)})
+        shared = Container(values=values._share())    # Read-only (copy-on-write) buffers
+        digest = shared.fingerprint()
+        self.assertIn('values', shared._hashed)
+        self.assertEqual(shared.fingerprint(), digest)    # Cached
+        self.assertEqual(Container(values=values).fingerprint(), digest)
+        self.assertNotIn('values', Container(values=values)._hashed or {})    # Writeable
+        shared.values.iloc[0, 0] = -1.0    # Detached (writeable)
+        self.assertNotEqual(shared.fingerprint(), digest)
+        self.assertNotIn('values', shared._hashed)
+        shared.values = values._share()
+        self.assertEqual(shared.fingerprint(), digest)
+        times = Container(events=pd.DataFrame({'t': pd.date_range('2020-01-01', periods=3),
+                                               'dt': pd.to_timedelta([1, 2, 3], unit='s')}))
+        tmp = mkdtemp()
+        path = times.save(tmp + '/times.hdf5')
+        self.assertEqual(Container.stored_fingerprint(path), times.fingerprint())
+        self.assertTrue(Container.load(path).equals(times))
+        times.events['t'].iloc[1] = pd.Timestamp('2021-01-01')
+        self.assertFalse(times.equals(path))
+        rmtree(tmp)
+
+    def test_memory_limit(self):
+        c = DummyContainer(memory_limit='1.5kB', s0=DummySeries(np.arange(100.0)),
+                           s1=DummySeries(np.arange(100.0)))
+        self.assertEqual(c.memory_limit, 1500)
+        views = DummyContainer(memory_limit='1.5kB', s0=DummySeries(np.arange(100.0)))
+        views.s1 = DummySeries(views.s0.values[10:])    # Shares memory, within the limit
+        self.assertIn('_s0', vars(views))
+        self.assertNotIn('_s0', vars(c))
+        self.assertEqual(c.s0.sum(), 4950.0)    # Read back, spilling s1
+        self.assertNotIn('_s1', vars(c))
+        c.s0.iloc[0] = -1.0
+        c.s1
+        self.assertEqual(c.s0.iloc[0], -1.0)
+        path = c.save(mkdtemp() + "/limit.hdf5")
+        c.s1.iloc[0] = -1.0
+        c.s0
+        self.assertEqual(c._changes(path), (['_s1'], []))
+        c.save(path, incremental=True)
+        self.assertEqual(DummyContainer.load(path).s1.iloc[0], -1.0)
+        remove(path)
+        self.assertNotIn('memory_limit', c._rel())    # Not saved as metadata
+        df = DataFrame.from_dict({'x': np.arange(20.0), 'y': np.arange(20.0),
+                                  'z': np.arange(20.0), 'cat': ['cube']*20})
+        grown = DummyContainer(memory_limit='1.7kB', s0=DummySeries(np.arange(100.0)), df=df)
+        self.assertIn('_s0', vars(grown))
+        grown.df['w'] = np.arange(20.0)    # Added column is counted on next access
+        grown.df
+        self.assertNotIn('_s0', vars(grown))
+        tight = Container(memory_limit='1kB', **{k: pd.Series(np.arange(100.0)) for k in 'abcd'})
+        with ThreadPoolExecutor(4) as pool:    # Reads (and spills) from concurrent threads
+            sums = list(pool.map(lambda k: getattr(tight, k).sum(), 'abcd'*50))
+        self.assertEqual(sums, [4950.0]*200)
+
+    def test_pickle(self):
+        c = DummyContainer(memory_limit='1.5kB', s0=DummySeries(np.arange(100.0)),
+                           s1=DummySeries(np.arange(100.0)))
+        self.assertNotIn('_s0', vars(c))    # Spilled to the scratch directory
+        c2 = pickle.loads(pickle.dumps(c))
+        del c
+        gc.collect()    # Removes the scratch directory of the original
+        self.assertEqual(c2.memory_limit, 1500)
+        self.assertEqual(c2.s0.sum() + c2.s1.sum(), 9900.0)
+        self.assertEqual(len(c2._data(load=False)), 1)    # Still within the limit
+        path = mkdtemp() + "/pickle.hdf5"
+        self.container.save(path)
+        lazy = DummyContainer.load(path, lazy=True)
+        lazy.s0
+        lazy2 = pickle.loads(pickle.dumps(lazy))
+        self.assertNotIn('_df', vars(lazy2))
+        self.assertTrue(lazy2.df.equals(self.container.df))
+        self.assertTrue(lazy2.s0.equals(self.container.s0))
+        remove(path)
+
+    def test_compute_all(self):
+        c = ComputeContainer()
+        timing = c.compute_all(workers=2)
+        self.assertListEqual(c.c.tolist(), [4.0, 6.0])
+        self.assertListEqual(sorted(timing.index), ['a', 'b', 'c'])
+        self.assertTrue(timing.loc['c', 'start'] >= timing.loc[['a', 'b'], 'stop'].max())
+        self.assertTrue(timing.loc['a', 'start'] < timing.loc['b', 'stop'])    # Concurrent
+        self.assertEqual(len(c.compute_all()), 0)
+        self.assertEqual(len(c.compute_all(force=True)), 3)
+        ComputeContainer.compute_a.requires = ('c', )
+        try:
+            with self.assertRaises(ValueError):
+                ComputeContainer().compute_all()
+        finally:
+            ComputeContainer.compute_a.requires = ()
+        self.assertEqual(c.compute_distance(c), 0.0)
+        ComputeContainer.compute_distance.requires = ('c', )
+        try:
+            with self.assertRaises(TypeError):
+                ComputeContainer().compute_all()
+        finally:
+            del ComputeContainer.compute_distance.requires
+
     def test_dunder(self):
         c = Container(x=DataFrame())
         self.assertTrue(hasattr(c, "x"))
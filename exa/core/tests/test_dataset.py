@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Tests for :mod:`~exa.core.dataset`
+#######################################
+"""
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+import numpy as np
+import pandas as pd
+from exa import Container
+from exa.core.dataset import Dataset
+
+
+class FrameContainer(Container):
+    _cardinal = 'frame'
+
+
+class TestDataset(TestCase):
+    def setUp(self):
+        self.tmpdir = mkdtemp()
+        self.paths = []
+        for i in range(3):
+            frame = pd.DataFrame({'energy': [i, i + 0.5]}, index=pd.Index([0, 1], name='frame'))
+            atom = pd.DataFrame({'frame': [0, 0, 1, 1], 'z': np.arange(4.0) + 10*i,
+                                 'symbol': pd.Categorical(['H', 'O', 'H', ['O', 'N', 'C'][i]])},
+                                index=pd.Index(range(4), name='atom'))
+            c = FrameContainer(name='calc{}'.format(i), frame=frame, atom=atom)
+            self.paths.append(c.save(self.tmpdir + '/calc{}.hdf5'.format(i)))
+
+    def tearDown(self):
+        rmtree(self.tmpdir)
+
+    def test_load(self):
+        for processes in (False, True):
+            ds = Dataset.load(self.paths, workers=2, processes=processes, container=FrameContainer)
+            self.assertEqual(len(ds), 3)
+            self.assertListEqual(ds.sources['name'].tolist(), ['calc0', 'calc1', 'calc2'])
+            self.assertListEqual(ds.atom.index.names, ['source', 'atom'])
+            self.assertEqual(len(ds.atom), 12)
+            self.assertListEqual(sorted(ds.atom['symbol'].cat.categories), ['C', 'H', 'N', 'O'])
+            self.assertEqual(ds['frame'].loc[(2, 1), 'energy'], 2.5)
+
+    def test_query(self):
+        ds = Dataset.load(self.paths, container=FrameContainer)
+        sub = ds.query('atom', 'z > 12 and z < 22')
+        self.assertListEqual(sub.atom.index.tolist(), [(1, 3), (2, 0), (2, 1)])
+        self.assertListEqual(sub.frame.index.tolist(), [(1, 1), (2, 0)])
+        sub = ds.query('atom', 'z > 12 and z < 22', cardinal=True)
+        self.assertEqual(len(sub.atom), 4)
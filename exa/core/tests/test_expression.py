@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Tests for :mod:`~exa.core.expression`
+#######################################
+"""
+from unittest import TestCase
+import numpy as np
+from exa import DataFrame
+
+
+class TestExpression(TestCase):
+    def setUp(self):
+        n = 1000
+        self.df = DataFrame({'x': np.random.rand(n), 'y': np.random.rand(n),
+                             'z': np.arange(n, dtype=np.int32), 'E': np.ones(n)})
+
+    def test_evaluate(self):
+        expr = self.df.expr('sqrt(x**2 + y**2 + z**2)')
+        self.assertListEqual(expr.columns, ['x', 'y', 'z'])
+        r = expr.evaluate(chunksize=300)
+        expected = np.sqrt(self.df['x']**2 + self.df['y']**2 + self.df['z'].astype(float)**2)
+        np.testing.assert_allclose(r.values, expected.values)
+        self.assertTrue(r.index.equals(self.df.index))
+        with self.assertRaises(KeyError):
+            self.df.expr('w + 1')
+
+    def test_compose(self):
+        combined = 2*self.df.expr('x') - self.df.expr('E')**2 + 1
+        np.testing.assert_allclose(np.asarray(combined), 2*self.df['x'].values)
+        out = np.empty(len(self.df))
+        combined.evaluate(out=out)
+        np.testing.assert_allclose(out, 2*self.df['x'].values)
+        for wrong in (np.empty(len(self.df) - 1), np.empty(len(self.df), dtype=np.float32)):
+            with self.assertRaises(ValueError):
+                combined.evaluate(out=wrong)
+
+    def test_functions(self):
+        r = self.df.expr('Max(x, 0.5) + Min(x, y, 0.25) + Abs(x - y)').evaluate()
+        x, y = self.df['x'].values, self.df['y'].values
+        np.testing.assert_allclose(r.values, np.maximum(x, 0.5) + np.minimum(np.minimum(x, y), 0.25) +
+                                   np.abs(x - y))
+        with self.assertRaisesRegex(ValueError, 'supported'):
+            self.df.expr('Piecewise((x, x > 0.5), (0.5, True))').evaluate()
@@ -9,7 +9,7 @@ from unittest import TestCase
 import numpy as np
 import pandas as pd
 from pandas.core.dtypes.dtypes import CategoricalDtype
-from exa.core.numerical import Numerical, Series, DataFrame
+from exa.core.numerical import Numerical, Series, DataFrame, _columns, _arrays
 
 
 class TSeries(Series):
@@ -102,6 +102,29 @@ class DF1Test(TestCase):
         """Test that categoricals are being handled correctly."""
         self.assertIsInstance(self.df['type'].dtype, CategoricalDtype)
 
+    def test_share(self):
+        """Test copy-on-write sharing of buffers."""
+        cp = self.df._share()
+        self.assertTrue(np.shares_memory(cp['column'].values, self.df['column'].values))
+        cp.fillna({'column': 0.0}, inplace=True)
+        cp.iloc[0, 0] = -1.0
+        self.assertFalse(np.shares_memory(cp['column'].values, self.df['column'].values))
+        self.assertTrue(self.df['column'].iloc[0] >= 0.0)
+
+    def test_columns(self):
+        """Test column values with and without the pandas block manager."""
+        class Public(object):
+            def __init__(self, df):
+                self.shape = df.shape
+                self.iloc = df.iloc
+        expected = [self.df.iloc[:, i].values for i in range(self.df.shape[1])]
+        for obj in (self.df, Public(self.df)):
+            values = _columns(obj)
+            self.assertEqual(len(values), len(expected))
+            for got, exp in zip(values, expected):
+                self.assertTrue(np.array_equal(np.asarray(got), np.asarray(exp)))
+            self.assertTrue(len(list(_arrays(obj))) > 0)
+
     def test_cardinal_groupby(self):
         grps = self.df.cardinal_groupby()
         self.assertEqual(list(grps.groups.keys()), [0, 1, 2, 3])
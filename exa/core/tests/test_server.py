@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Tests for :mod:`~exa.core.server`
+#######################################
+"""
+import os
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from exa import Container
+from exa.core.server import ContainerServer, ContainerClient
+
+
+class FrameContainer(Container):
+    _cardinal = 'frame'
+
+
+class TestServer(TestCase):
+    def setUp(self):
+        self.tmpdir = mkdtemp()
+        frame = pd.DataFrame({'energy': np.arange(5.0)}, index=pd.Index(range(5), name='frame'))
+        atom = pd.DataFrame({'frame': np.repeat(np.arange(5), 2), 'z': np.arange(10.0),
+                             'symbol': pd.Categorical(list('HO')*5)})
+        self.c = FrameContainer(name='md', frame=frame, atom=atom)
+        path = self.c.save(os.path.join(self.tmpdir, 'md.npydir'), format='npydir')
+        self.address = os.path.join(self.tmpdir, 'exa.sock')
+        self.server = ContainerServer(self.address, {'md': path}, container=FrameContainer).__enter__()
+        self.client = ContainerClient(self.address, container=FrameContainer)
+
+    def tearDown(self):
+        self.server.__exit__()
+        rmtree(self.tmpdir)
+
+    def test_slice(self):
+        self.assertEqual(self.client.names()['md']['name'], 'md')
+        md = self.client['md']
+        sub = md[1:3]
+        self.assertListEqual(sub.atom['z'].tolist(), [2.0, 3.0, 4.0, 5.0])
+        self.assertListEqual(sub.frame.index.tolist(), [1, 2])
+        self.assertFalse(sub.atom['z'].values.flags.writeable)
+        self.assertListEqual(md[[0, 4]].atom['symbol'].tolist(), list('HOHO'))
+        pd.testing.assert_frame_equal(md.atom, self.c.atom)
+        self.assertListEqual(md.get(tables=['atom'], columns={'atom': ['z']}).atom.columns.tolist(), ['z'])
+
+    def test_query(self):
+        md = self.client['md']
+        sub = md.query('atom', 'z > 6.5', cardinal=True)
+        self.assertListEqual(sub.frame.index.tolist(), [3, 4])
+        self.assertEqual(len(sub.atom), 4)
+        with self.assertRaises(RuntimeError):
+            self.client['nothing'].get()
+
+    def test_no_cardinal(self):
+        plain = Container(name='plain', atom=self.c.atom)
+        with ContainerServer(os.path.join(self.tmpdir, 'plain.sock'), {'plain': plain}):
+            client = ContainerClient(os.path.join(self.tmpdir, 'plain.sock'))
+            self.assertEqual(len(client['plain'].atom), 10)
+            with self.assertRaisesRegex(RuntimeError, 'cardinal'):    # Not rows by index
+                client['plain'][0:2]
+
+    def test_concurrent(self):
+        md = self.client['md']
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lambda i: md[i].atom['z'].sum(), list(range(5))*4))
+        self.assertListEqual(results, [4*i + 1.0 for i in range(5)]*4)
+
+    def test_loopback(self):
+        with self.assertRaises(ValueError):
+            ContainerServer(('0.0.0.0', 0), {'md': self.c})
+        with ContainerServer(('127.0.0.1', 0), {'md': self.c}, container=FrameContainer) as server:
+            client = ContainerClient(server.server_address, container=FrameContainer)
+            self.assertEqual(len(client['md'].atom), 10)
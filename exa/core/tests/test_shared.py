@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Copyright (c) 2015-2020, Exa Analytics Development Team
+# Distributed under the terms of the Apache License 2.0
+"""
+Tests for :mod:`~exa.core.shared`
+#######################################
+"""
+import os
+import sys
+import pickle
+import subprocess
+from unittest import TestCase
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import pandas as pd
+from pandas.core.dtypes.dtypes import CategoricalDtype
+from exa import Container, DataFrame, Series, Field
+from exa.core.shared import SharedHandle
+
+
+attach = """
+import sys, pickle
+from exa import Container
+handle = pickle.loads(sys.stdin.buffer.read())
+container = Container.from_shared(handle)
+print(container.df['i'].sum())
+"""
+
+
+class TestShared(TestCase):
+    def setUp(self):
+        df = DataFrame.from_dict({'x': np.random.rand(10), 'i': np.arange(10),
+                                  'cat': pd.Categorical(['a', 'b']*5),
+                                  'label': ['s{}'.format(i) for i in range(10)]})
+        field = Field(pd.DataFrame({'nx': [2]}), field_values=[np.random.rand(8)])
+        self.container = Container(name='shm', df=df, s=Series(np.random.rand(4)),
+                                   field=field)
+
+    def test_roundtrip(self):
+        with self.container.to_shared() as handle:
+            self.assertIsInstance(handle, SharedHandle)
+            self.assertTrue(handle.nbytes > 0)
+            child = pickle.loads(pickle.dumps(handle))
+            c = Container.from_shared(child)
+            self.assertEqual(c.name, 'shm')
+            pd.testing.assert_frame_equal(pd.DataFrame(c.df), pd.DataFrame(self.container.df))
+            pd.testing.assert_series_equal(pd.Series(c.s), pd.Series(self.container.s))
+            np.testing.assert_array_equal(c.field.field_values[0].values,
+                                          self.container.field.field_values[0].values)
+            self.assertIsInstance(c.df['cat'].dtype, CategoricalDtype)
+            self.assertFalse(c.df['x'].values.flags.writeable)
+            del c
+            child.close()
+
+    def test_unlink(self):
+        handle = self.container.to_shared()
+        names = [name for name, _ in handle._names.values()]
+        child = pickle.loads(pickle.dumps(handle))
+        with self.assertRaises(RuntimeError):
+            child.unlink()
+        handle.unlink()
+        for name in names:
+            with self.assertRaises(FileNotFoundError):
+                SharedMemory(name=name)
+
+    def test_independent_process(self):
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+        with self.container.to_shared() as handle:
+            proc = subprocess.run([sys.executable, '-c', attach], input=pickle.dumps(handle),
+                                  capture_output=True, cwd=root, check=True)
+            self.assertEqual(proc.stdout.split()[-1], b'45')
+            for name, _ in handle._names.values():    # Not destroyed by the exiting process
+                SharedMemory(name=name).close()
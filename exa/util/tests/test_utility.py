@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
 # Copyright (c) 2015-2020, Exa Analytics Development Team
 # Distributed under the terms of the Apache License 2.0
+import pytest
 from os import path
 from tempfile import mkdtemp
-from exa.util.utility import datetime_header, mkp, convert_bytes, get_internal_modules
+from exa.util.utility import datetime_header, mkp, convert_bytes, parse_bytes, get_internal_modules
 
 
 def test_get_internal_modules():
@@ -27,6 +28,21 @@ def test_convert_bytes():
     assert b == "TiB"
 
 
+def test_parse_bytes():
+    assert parse_bytes(1024) == 1024
+    assert parse_bytes('8GB') == 8*10**9
+    assert parse_bytes('1.5 KiB') == 1536
+    assert parse_bytes('100') == 100
+    assert parse_bytes('2k') == 2000
+    assert parse_bytes('1 mib') == 2**20
+    assert parse_bytes('1EB') == 10**18
+    assert parse_bytes('8EiB') == 8*2**60
+    assert parse_bytes('1e3 kB') == 10**6
+    for value in ['1i', '1 ib', '1 kmi', '1kbb', '1 bytes', '1 GiBi', '--1', '-1', '-1GB', -1]:
+        with pytest.raises(ValueError):
+            parse_bytes(value)
+
+
 def test_mkp():
     dir_ = mkdtemp()
     pth = path.join(dir_, "tmp")
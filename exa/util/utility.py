@@ -7,6 +7,7 @@ Utilities
 Commonly used functions (primarily for convenience and repetition reduction).
 """
 import os
+import re
 import sys
 import numpy as np
 from datetime import datetime
@@ -65,6 +66,41 @@ def convert_bytes(value):
     return value/(1024**n), sizes[n]
 
 
+_units = {'': 1, 'b': 1}    # Size units (lower case) and their factors (see parse_bytes)
+for _i, _prefix in enumerate('kmgtpe', 1):
+    _units.update({_prefix: 1000**_i, _prefix + 'b': 1000**_i,
+                   _prefix + 'i': 1024**_i, _prefix + 'ib': 1024**_i})
+
+
+def parse_bytes(value):
+    """
+    Convert a size (e.g. "8GB", "512 MiB", or a number of bytes) to bytes.
+    Decimal (kB, MB, GB, ...) and binary (KiB, MiB, GiB, ...) units are
+    supported.
+
+    Args:
+        value: Size string or number of bytes
+
+    Returns:
+        nbytes (int): Number of bytes
+
+    Raises:
+        ValueError: If the size is malformed or negative
+    """
+    if isinstance(value, (int, float, np.number)):
+        if value < 0:
+            raise ValueError('Invalid size {}.'.format(value))
+        return int(value)
+    match = re.match(r'^\s*([0-9]*\.?[0-9]+(?:[eE][+-]?[0-9]+)?)\s*([a-zA-Z]*)\s*$', value)
+    if match is None:
+        raise ValueError('Invalid size {}.'.format(value))
+    number, unit = match.groups()
+    factor = _units.get(unit.lower())
+    if factor is None:
+        raise ValueError('Invalid size unit {}.'.format(unit))
+    return int(float(number)*factor)
+
+
 def get_internal_modules(key='exa'):
     """
     Get a list of modules belonging to the given package.
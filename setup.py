@@ -28,6 +28,7 @@ setup(
     package_data={NAME: [STATIC + "/*"]},
     include_package_data=True,
     install_requires=DEPENDENCIES,
+    python_requires=">=3.8",
     packages=find_packages(),
     zip_safe=False,
     license="Apache License Version 2.0",
@@ -43,6 +44,7 @@ setup(
         "Intended Audience :: Science/Research",
         "License :: OSI Approved :: Apache Software License",
         "Programming Language :: Python :: 3",
+        "Programming Language :: Python :: 3 :: Only",
         "Natural Language :: English"
     ]
 )